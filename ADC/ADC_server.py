@@ -1,6 +1,7 @@
 import os, sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(os.path.dirname(__file__)))))
 from Lib.AMQ import *
+import Lib.offload as offload
 import asyncio
 import aio_pika
 import json
@@ -41,22 +42,26 @@ async def main():
         async def on_adc_message(message: aio_pika.IncomingMessage):
             async with message.process():
                 try:
-                    dict_data = json.loads(message.body)
+                    dict_data = decode_message(message.body, message.content_type)
                     message_text = dict_data['message']
                     print('\033[94m'+'[ADC] received: ' + message_text + '\033[0m')
 
-                    await identify_execute(ADC_server, action, message.body)
+                    await identify_execute(ADC_server, action, dict_data)
 
                 except Exception as e:
                     print(f"Error in on_gfa_message: {e}", flush=True)
 
             print('Waiting for message from client......')
 
+        offload.install()
         await ADC_server.define_consumer('ADC',on_adc_message)
         print('Waiting for message from client......')
 
-        while True:
-            await asyncio.sleep(1)
+        try:
+            while True:
+                await asyncio.sleep(1)
+        finally:
+            offload.shutdown()
 #            msg = await ADC_server.receive_message("ADC")
 #            dict_data=json.loads(msg)
 #            message=dict_data['message']
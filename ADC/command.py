@@ -9,6 +9,7 @@ from astropy.coordinates import Angle
 
 import numpy as np
 from ADC.kspec_adc_controller.src.adc_calc_angle import ADCCalc
+from Lib.dispatcher import Dispatcher
 
 AAO_LOCATION = EarthLocation(lat=-31.27118, lon=149.06256, height=1165*u.m)
 
@@ -19,10 +20,6 @@ connection, adjustment, and various operational controls. It includes utilities
 handling, and managing asynchronous tasks.
 """
 
-# Global task tracker
-adcadjust_task = None
-
-
 ADC_COMMAND_SPECS = {
     'adcconnect': {},
     'adcdisconnect': {},
@@ -77,273 +74,189 @@ def printing(message):
     print(f"\033[32m[ADC] {message}\033[0m")
 
 
-def is_missing_parameter(value):
-    return value is None or value == '' or value == 'None'
+adc = Dispatcher('ADC', mkmsg.adcmsg)
 
 
-def parse_adc_command(func, dict_data):
-    spec = ADC_COMMAND_SPECS.get(func)
-    if spec is None:
-        return None, f"Unknown ADC command: {func}"
+async def identify_execute(ADC_server, adc_action, cmd):
+    """Identify and execute the requested ADC command.
 
-    parsed = dict(spec.get('fixed', {}))
-    for name, value_type in spec.get('args', ()):
-        raw_value = dict_data.get(name)
-        if is_missing_parameter(raw_value):
-            return None, f"'{func}' command needs '{name}' parameter."
+    Args:
+        ADC_server (AMQclass): The ADC server instance.
+        adc_action (AdcActions): Instance of ADC action handler.
+        cmd (str | dict): JSON string or already-decoded dict containing the command details.
+    """
+    await adc.dispatch(ADC_server, cmd, adc_action)
 
-        try:
-            parsed[name] = value_type(raw_value)
-        except (TypeError, ValueError):
-            return (
-                None,
-                f"'{func}' command parameter '{name}' should be {value_type.__name__}. "
-                f"input value: {raw_value}",
-            )
 
-    for name, validator, message in spec.get('validators', ()):
-        if not validator(parsed[name]):
-            return None, f"{message} input value: {parsed[name]}"
+async def stop_adcadjust_task(adc_action, reason):
+    if adc.running('adjust') is None:
+        return False, None
 
-    return parsed, None
+    printing(f"Stopping adcadjust task before {reason}...")
+    stop_result = await adc_action.stop(0)
 
+    await adc.cancel('adjust')
+    printing("adcadjust task stopped.")
 
-async def send_adc_response(ADC_server, result=None, *, log=True, **updates):
-    reply_data = mkmsg.adcmsg()
-    if result is not None:
-        reply_data.update(result)
-    reply_data.update(updates)
+    return True, stop_result
 
-    rsp = json.dumps(reply_data)
-    if log and reply_data.get('message'):
-        printing(reply_data['message'])
-    await ADC_server.send_message('ICS', rsp)
-    return reply_data
 
+@adc.command('adcconnect', ADC_COMMAND_SPECS['adcconnect'])
+async def handle_adcconnect(ADC_server, dict_data, adc_action):
+    result = adc_action.connect()
+    await adc.reply(ADC_server, result, process='Done')
 
-async def stop_adcadjust_task(adc_action, reason):
-    global adcadjust_task
 
-    if not adcadjust_task or adcadjust_task.done():
-        return False, None
+@adc.command('adcdisconnect', ADC_COMMAND_SPECS['adcdisconnect'])
+async def handle_adcdisconnect(ADC_server, dict_data, adc_action):
+    task_was_running, stop_result = await stop_adcadjust_task(adc_action, 'ADC disconnect')
 
-    printing(f"Stopping adcadjust task before {reason}...")
-    stop_result = await adc_action.stop(0)
+    result = adc_action.disconnect()
+    message = result.get("message", "Disconnected from devices.")
+    status = result.get("status", "success")
 
-    adcadjust_task.cancel()
-    try:
-        await adcadjust_task
-    except asyncio.CancelledError:
-        printing("adcadjust task stopped.")
-    finally:
-        adcadjust_task = None
+    if task_was_running:
+        message = f"ADC adjust task stopped before disconnect. {message}"
+        if stop_result and stop_result.get("status") == "error":
+            status = "error"
+            message = f"{message} Motor stop failed: {stop_result.get('message')}"
 
-    return True, stop_result
+    await adc.reply(ADC_server, result, message=message, process='Done', status=status)
 
-async def identify_execute(ADC_server, adc_action, cmd):
-    """Identify and execute the requested ADC command.
 
-    Args:
-        ADC_server (AMQclass): The ADC server instance.
-        adc_action (AdcActions): Instance of ADC action handler.
-        cmd (str): JSON string containing the command details.
+@adc.command('adcpoweroff', ADC_COMMAND_SPECS['adcpoweroff'])
+async def handle_adcpoweroff(ADC_server, dict_data, adc_action):
+    task_was_running, stop_result = await stop_adcadjust_task(adc_action, 'ADC power off')
+
+    result = adc_action.power_off()
+    message = result.get("message", "Power off and devices disconnected.")
+    status = result.get("status", "success")
+
+    if task_was_running:
+        message = f"ADC adjust task stopped before power off. {message}"
+        if stop_result and stop_result.get("status") == "error":
+            status = "error"
+            message = f"{message} Motor stop failed: {stop_result.get('message')}"
+
+    await adc.reply(ADC_server, result, message=message, process='Done', status=status)
+
+
+@adc.command('adcstatus', ADC_COMMAND_SPECS['adcstatus'])
+async def handle_adcstatus(ADC_server, dict_data, adc_action):
+    result = adc_action.status()
+    await adc.reply(ADC_server, result, process='Done')
+
+
+@adc.command('adcactivate', ADC_COMMAND_SPECS['adcactivate'])
+async def handle_adcactivate(ADC_server, dict_data, adc_action, zdist):
+    await adc.reply(
+        ADC_server,
+        message='ADC activation starts.',
+        process='ING',
+        status='success',
+        log=False,
+    )
+
+    if adc.running('adjust') is not None:
+        comment="Please cancel first the running task..."
+        printing("Please cancel first the running task...")
+        await adc.reply(ADC_server, message=comment, process='Done', log=False)
+    else:
+        result = await adc_action.activate(zdist)
+        await adc.reply(ADC_server, result, process='Done')
+
+
+# A new adcadjust cancels the running one; adcstop/adcdisconnect/adcpoweroff go through adc.cancel('adjust')
+@adc.command('adcadjust', ADC_COMMAND_SPECS['adcadjust'], policy='cancel_previous', group='adjust')
+async def handle_adcadjust_command(ADC_server, dict_data, adc_action, RA, DEC):
+    await adc.reply(
+        ADC_server,
+        message='ADC adjusting starts.',
+        process='ING',
+        status='success',
+        log=False,
+    )
+    printing("New adcadjust task started.")
+    await handle_adcadjust(ADC_server, adc_action, RA, DEC)
+
+
+@adc.command('adcstop', ADC_COMMAND_SPECS['adcstop'])
+async def handle_adcstop(ADC_server, dict_data, adc_action):
+    task_was_running, stop_result = await stop_adcadjust_task(adc_action, 'ADC stop')
+    result = stop_result if stop_result is not None else await adc_action.stop(0)
+
+    if task_was_running:
+        message = "ADC stopped and ADC adjust task stopped."
+    else:
+        printing("No adcadjust task is currently running.")
+        message = result.get("message", "ADC stopped.")
+
+    await adc.reply(
+        ADC_server,
+        result,
+        message=message,
+        process="Done",
+        status=result.get("status", "success"),
+    )
+
+
+@adc.command('adcrotate1', ADC_COMMAND_SPECS['adcrotate1'])
+@adc.command('adcrotate2', ADC_COMMAND_SPECS['adcrotate2'])
+@adc.command('adcctrotate', ADC_COMMAND_SPECS['adcctrotate'])
+@adc.command('adccorotate', ADC_COMMAND_SPECS['adccorotate'])
+async def handle_adcrotate(ADC_server, dict_data, adc_action, lens, pcount, vel):
+    await adc.reply(
+        ADC_server,
+        process='ING',
+        message='ADC rotation starts.',
+        status='success',
+    )
+
+    result = await adc_action.move(lens, pcount, vel_set=vel)
+    await adc.reply(ADC_server, result, process='Done')
+
+
+@adc.command('adchome', ADC_COMMAND_SPECS['adchome'])
+async def handle_adchome(ADC_server, dict_data, adc_action, vel):
+    await adc.reply(
+        ADC_server,
+        process='ING',
+        message='ADC Homing starts.',
+        status='success',
+        log=False,
+    )
+
+    result = await adc_action.homing(homing_vel=vel)
+    await adc.reply(ADC_server, result, process='Done')
+
+
+@adc.command('adczero', ADC_COMMAND_SPECS['adczero'])
+async def handle_adczero(ADC_server, dict_data, adc_action, vel):
+    await adc.reply(
+        ADC_server,
+        process='ING',
+        message='ADC Zeroing starts.',
+        status='success',
+        log=False,
+    )
+
+    result = await adc_action.zeroing(zeroing_vel=vel)
+    await adc.reply(ADC_server, result, process='Done')
+
+
+@adc.command('adcpark', ADC_COMMAND_SPECS['adcpark'])
+async def handle_adcpark(ADC_server, dict_data, adc_action):
+    await adc.reply(
+        ADC_server,
+        process='ING',
+        message='ADC Parking starts.',
+        status='success',
+        log=False,
+    )
+
+    result = await adc_action.parking()
+    await adc.reply(ADC_server, result, process='Done')
 
-    Raises:
-        ValueError: If the provided command is not recognized.
-    """
-    global adcadjust_task
-    try:
-        dict_data = json.loads(cmd)
-    except json.JSONDecodeError as e:
-        await send_adc_response(
-            ADC_server,
-            message=f"Invalid ADC command JSON: {e}",
-            process='Done',
-            status='error',
-        )
-        return
-
-    if not isinstance(dict_data, dict):
-        await send_adc_response(
-            ADC_server,
-            message='Invalid ADC command: JSON payload should be an object.',
-            process='Done',
-            status='error',
-        )
-        return
-
-    func = dict_data.get('func')
-    if is_missing_parameter(func):
-        await send_adc_response(
-            ADC_server,
-            message="Invalid ADC command: 'func' is required.",
-            process='Done',
-            status='error',
-        )
-        return
-
-    printing(f"{func}")
-
-    parsed_args, parse_error = parse_adc_command(func, dict_data)
-    if parse_error:
-        await send_adc_response(
-            ADC_server,
-            message=parse_error,
-            process='Done',
-            status='error',
-        )
-        return
-
-    if func == 'adcconnect':
-        result = adc_action.connect()
-        await send_adc_response(ADC_server, result, process='Done')
-
-    elif func == 'adcdisconnect':
-        task_was_running, stop_result = await stop_adcadjust_task(adc_action, 'ADC disconnect')
-
-        result = adc_action.disconnect()
-        message = result.get("message", "Disconnected from devices.")
-        status = result.get("status", "success")
-
-        if task_was_running:
-            message = f"ADC adjust task stopped before disconnect. {message}"
-            if stop_result and stop_result.get("status") == "error":
-                status = "error"
-                message = f"{message} Motor stop failed: {stop_result.get('message')}"
-
-        await send_adc_response(ADC_server, result, message=message, process='Done', status=status)
-
-    elif func == 'adcpoweroff':
-        task_was_running, stop_result = await stop_adcadjust_task(adc_action, 'ADC power off')
-
-        result = adc_action.power_off()
-        message = result.get("message", "Power off and devices disconnected.")
-        status = result.get("status", "success")
-
-        if task_was_running:
-            message = f"ADC adjust task stopped before power off. {message}"
-            if stop_result and stop_result.get("status") == "error":
-                status = "error"
-                message = f"{message} Motor stop failed: {stop_result.get('message')}"
-
-        await send_adc_response(ADC_server, result, message=message, process='Done', status=status)
-
-    elif func == 'adcstatus':
-        result = adc_action.status()
-        await send_adc_response(ADC_server, result, process='Done')
-
-    elif func == 'adcactivate':
-        await send_adc_response(
-            ADC_server,
-            message='ADC activation starts.',
-            process='ING',
-            status='success',
-            log=False,
-        )
-
-        if adcadjust_task and not adcadjust_task.done():
-            comment="Please cancel first the running task..."
-            printing("Please cancel first the running task...")
-            await send_adc_response(ADC_server, message=comment, process='Done', log=False)
-        
-        else:
-            zdist = parsed_args['zdist']
-            result = await adc_action.activate(zdist)
-            await send_adc_response(ADC_server, result, process='Done')
-
-    elif func == 'adcadjust':
-        ra = parsed_args['RA']
-        dec = parsed_args['DEC']
-        await send_adc_response(
-            ADC_server,
-            message='ADC adjusting starts.',
-            process='ING',
-            status='success',
-            log=False,
-        )
-
-        # Cancel any running task before starting a new one
-        if adcadjust_task and not adcadjust_task.done():
-            printing("Cancelling the running adcadjust task...")
-            adcadjust_task.cancel()
-            try:
-                await adcadjust_task
-            except asyncio.CancelledError:
-                printing("Previous adcadjust task cancelled.")
-
-        # Start a new adcadjust task
-        adcadjust_task = asyncio.create_task(handle_adcadjust(ADC_server, adc_action, ra, dec))
-        printing("New adcadjust task started.")
-
-    elif func == 'adcstop':
-        task_was_running, stop_result = await stop_adcadjust_task(adc_action, 'ADC stop')
-        result = stop_result if stop_result is not None else await adc_action.stop(0)
-
-        if task_was_running:
-            message = "ADC stopped and ADC adjust task stopped."
-        else:
-            printing("No adcadjust task is currently running.")
-            message = result.get("message", "ADC stopped.")
-
-        await send_adc_response(
-            ADC_server,
-            result,
-            message=message,
-            process="Done",
-            status=result.get("status", "success"),
-        )
-
-    elif func in {'adcrotate1', 'adcrotate2', 'adcctrotate','adccorotate'}:
-        await send_adc_response(
-            ADC_server,
-            process='ING',
-            message='ADC rotation starts.',
-            status='success',
-        )
-
-        count = parsed_args['pcount']
-        lens = parsed_args['lens']
-        velocity = parsed_args['vel']
-        result = await adc_action.move(lens, count, vel_set=velocity)
-        await send_adc_response(ADC_server, result, process='Done')
-
-    elif func == 'adchome':
-        await send_adc_response(
-            ADC_server,
-            process='ING',
-            message='ADC Homing starts.',
-            status='success',
-            log=False,
-        )
-
-        velocity = parsed_args['vel']
-        result = await adc_action.homing(homing_vel=velocity)
-        await send_adc_response(ADC_server, result, process='Done')
-
-    elif func == 'adczero':
-        await send_adc_response(
-            ADC_server,
-            process='ING',
-            message='ADC Zeroing starts.',
-            status='success',
-            log=False,
-        )
-
-        velocity = parsed_args['vel']
-        result = await adc_action.zeroing(zeroing_vel=velocity)
-        await send_adc_response(ADC_server, result, process='Done')
-
-    elif func == 'adcpark':
-        await send_adc_response(
-            ADC_server,
-            process='ING',
-            message='ADC Parking starts.',
-            status='success',
-            log=False,
-        )
-        
-        result = await adc_action.parking()
-        await send_adc_response(ADC_server, result, process='Done')
 
 async def handle_adcadjust(ADC_server, adc_action, ra, dec):
     """Handle continuous ADC adjustment for a specified RA and DEC.
@@ -367,7 +280,7 @@ async def handle_adcadjust(ADC_server, adc_action, ra, dec):
         while True:
             comment=f"ADC is now rotating by {delcount} counts."
             printing(comment)
-            await send_adc_response(
+            await adc.reply(
                 ADC_server,
                 message=comment,
                 process='ING',
@@ -379,7 +292,7 @@ async def handle_adcadjust(ADC_server, adc_action, ra, dec):
             motor_1, motor_2 = result['motor_1'], result['motor_2']
             comment1=result['message']  
             comment=f'{comment1} ADC lens rotated {motor_1}, {motor_2} counts successfully.'
-            await send_adc_response(ADC_server, result, message=comment, process='ING')
+            await adc.reply(ADC_server, result, message=comment, process='ING')
 
             await asyncio.sleep(60)                       # Wait for exposure time
             zdist = calculate_zenith_distance(ra, dec)
@@ -393,7 +306,7 @@ async def handle_adcadjust(ADC_server, adc_action, ra, dec):
     except Exception as e:
         comment=f"Error in handle_adcadjust: {e}"
         printing(comment)
-        await send_adc_response(ADC_server, message=comment, process='Done', log=False)
+        await adc.reply(ADC_server, message=comment, process='Done', log=False)
     else:
         printing("handle_adcadjust completed successfully.")
 
@@ -1,6 +1,7 @@
 import os, sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(os.path.dirname(__file__)))))
 from Lib.AMQ import *
+import Lib.offload as offload
 import asyncio
 import aio_pika
 import json
@@ -21,11 +22,11 @@ async def main():
     async def on_fbp_message(message: aio_pika.IncomingMessage):
         async with message.process():
             try:
-                dict_data = json.loads(message.body)
+                dict_data = decode_message(message.body, message.content_type)
                 message_text = dict_data['message']
                 print('\033[94m' + '[FBP] received: ' + message_text + '\033[0m')
 
-                await identify_execute(FBP_server, message.body)
+                await identify_execute(FBP_server, dict_data)
 
             except Exception as e:
                 print(f"Error in on_gfa_message: {e}", flush=True)
@@ -33,10 +34,14 @@ async def main():
         print('Waiting for message from client......')
 
 
+    offload.install()
     await FBP_server.define_consumer('FBP',on_fbp_message)
     print('Waiting for message from client......')
-    while True:
-        await asyncio.sleep(1)
+    try:
+        while True:
+            await asyncio.sleep(1)
+    finally:
+        offload.shutdown()
 #        msg=await FBP_server.receive_message("FBP")   # Check queue name
 #        dict_data=json.loads(msg)
 #        message=dict_data['message']
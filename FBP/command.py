@@ -5,99 +5,72 @@ import json
 import asyncio
 import numpy as np
 import time
+from Lib.offload import run_blocking
+from Lib.config import get_config
+from Lib.dispatcher import Dispatcher, parse_list
 
 
 def load_config(config_path='./Lib/KSPEC.ini'):
-    if not os.path.exists(config_path):
-        raise FileNotFoundError(f"KSPEC.ini not found at {config_path}")
+    return get_config(config_path)
 
-    try:
-        with open(config_path, 'r', encoding='utf-8') as f:
-            config = json.load(f)
-    except json.JSONDecodeError as e:
-        raise ValueError(f"Error parsing KSPEC.ini: {e}")
-    except OSError as e:
-        raise IOError(f"Error reading KSPEC.ini: {e}")
 
-    return config
+fbp = Dispatcher('FBP', mkmsg.fbpmsg)
+
+FBP_COMMAND_SPECS = {
+    'loadobj': {
+        'args': (('ra', parse_list), ('dec', parse_list), ('xp', parse_list), ('yp', parse_list), ('class', parse_list)),
+    },
+    'loadmotion': {
+        'args': (('arm', str),),
+    },
+}
 
 
 async def identify_execute(FBP_server,cmd):
-    dict_data=json.loads(cmd)
-    func=dict_data['func']
-
-    if func == 'loadobj':
-        ra=dict_data['ra']
-        dec=dict_data['dec']
-        xp=dict_data['xp']
-        yp=dict_data['yp']
-        clss=dict_data['class']
-        status, comment=savedata(ra,dec,xp,yp,clss)  # Save Target information
-
-        reply_data=mkmsg.fbpmsg()
-        reply_data.update(message=comment,process='Done',status=status)
-        rsp=json.dumps(reply_data)
-        print('\033[32m'+'[FBP]', comment+'\033[0m')
-        await FBP_server.send_message('ICS',rsp)
-
-    if func == 'loadmotion':
-        status, comment = savemotion(dict_data)
-        reply_data=mkmsg.fbpmsg()
-        reply_data.update(message=comment,process='Done',status=status)
-        rsp=json.dumps(reply_data)
-        print('\033[32m'+'[FBP]', comment+'\033[0m')
-        await FBP_server.send_message('ICS',rsp)
-
-    if func == 'fbpmove':
-        reply_data=mkmsg.fbpmsg()
-        comment = 'Fiber positioners start to targets.'
-        reply_data.update(message=comment,process='START',status='success')
-        rsp=json.dumps(reply_data)
-        await FBP_server.send_message('ICS',rsp)
-
-        status, comment=fbp_move()     ### Position of fiber postioner movement function
-        reply_data=mkmsg.fbpmsg()
-        reply_data.update(message=comment,process='Done',status=status, pos_state='assign')
-        rsp=json.dumps(reply_data)
-        print('\033[32m'+'[FBP]', comment+'\033[0m')
-        await FBP_server.send_message('ICS',rsp)
-
-    if func == 'fbpoffset':
-        reply_data=mkmsg.fbpmsg()
-        comment = 'Fiber positioners start to offset.'
-        reply_data.update(message=comment,process='START',status='success',pos_state='assign')
-        rsp=json.dumps(reply_data)
-        await FBP_server.send_message('ICS',rsp)
-
-        status, comment = fbp_offset()   ### Position of fiber offset movement function
-        reply_data=mkmsg.fbpmsg()
-        reply_data.update(message=comment,process='Done', status=status, pos_state='assign')
-        rsp=json.dumps(reply_data)
-        print('\033[32m'+'[FBP]', comment+'\033[0m')
-        await FBP_server.send_message('ICS',rsp)
-
-    if func == 'fbpstatus':
-        status,comment = fbp_status()
-        reply_data=mkmsg.fbpmsg()
-        reply_data.update(message=comment,process='Done', status=status)
-        rsp=json.dumps(reply_data)
-        print('\033[32m'+'[FBP]', comment+'\033[0m')
-        await FBP_server.send_message('ICS',rsp)
-
-    if func == 'fbpzero':
-        reply_data=mkmsg.fbpmsg()
-        comment = 'Fiber positioners start to move to zero positions'
-        reply_data.update(message=comment,process='START',status='success')
-        rsp=json.dumps(reply_data)
-        print('\033[32m'+'[FBP]', comment+'\033[0m')
-        await FBP_server.send_message('ICS',rsp)
-
-        status, comment=fbp_zero()     ### Position of fiber postioner movement function
-        reply_data=mkmsg.fbpmsg()
-        reply_data.update(message=comment,process='Done',status=status,pos_state='zero')
-        rsp=json.dumps(reply_data)
-        print('\033[32m'+'[FBP]', comment+'\033[0m')
-        await FBP_server.send_message('ICS',rsp)
+    await fbp.dispatch(FBP_server, cmd)
+
+
+@fbp.command('loadobj', FBP_COMMAND_SPECS['loadobj'])
+async def handle_loadobj(FBP_server, dict_data, **args):
+    status, comment=savedata(args['ra'],args['dec'],args['xp'],args['yp'],args['class'])  # Save Target information
+    await fbp.reply(FBP_server, message=comment, process='Done', status=status)
+
+
+@fbp.command('loadmotion', FBP_COMMAND_SPECS['loadmotion'], policy='exclusive', group='motionfile')
+async def handle_loadmotion(FBP_server, dict_data, arm):
+    status, comment = await run_blocking(savemotion, dict_data)
+    await fbp.reply(FBP_server, message=comment, process='Done', status=status)
+
+
+@fbp.command('fbpmove', policy='exclusive', group='motion')
+async def handle_fbpmove(FBP_server, dict_data):
+    await fbp.reply(FBP_server, message='Fiber positioners start to targets.', process='START', status='success', log=False)
+
+    status, comment=await run_blocking(fbp_move)     ### Position of fiber postioner movement function
+    await fbp.reply(FBP_server, message=comment, process='Done', status=status, pos_state='assign')
+
+
+@fbp.command('fbpoffset', policy='exclusive', group='motion')
+async def handle_fbpoffset(FBP_server, dict_data):
+    await fbp.reply(FBP_server, message='Fiber positioners start to offset.', process='START', status='success',
+                    pos_state='assign', log=False)
+
+    status, comment = await run_blocking(fbp_offset)   ### Position of fiber offset movement function
+    await fbp.reply(FBP_server, message=comment, process='Done', status=status, pos_state='assign')
+
+
+@fbp.command('fbpstatus')
+async def handle_fbpstatus(FBP_server, dict_data):
+    status,comment = await run_blocking(fbp_status)
+    await fbp.reply(FBP_server, message=comment, process='Done', status=status)
+
+
+@fbp.command('fbpzero', policy='exclusive', group='motion')
+async def handle_fbpzero(FBP_server, dict_data):
+    await fbp.reply(FBP_server, message='Fiber positioners start to move to zero positions', process='START', status='success')
+
+    status, comment=await run_blocking(fbp_zero)     ### Position of fiber postioner movement function
+    await fbp.reply(FBP_server, message=comment, process='Done', status=status, pos_state='zero')
 
 # Below functions are for simulation. When connect the Fiber positioner, please annotate
 def fbp_zero():
@@ -171,12 +144,12 @@ def savemotion(dict_data):
         if dict_data['arm'] == 'alpha':
             file_path=(fbpfilepath+'motion_alpha.info')
             with open(file_path,"w") as f:
-                json.dump(dict_data,f)
+                json.dump(dict_data,f,default=json_default)
 
         if dict_data['arm'] == 'beta':
             file_path=(fbpfilepath+'motion_beta.info')
             with open(file_path,"w") as f:
-                json.dump(dict_data,f)
+                json.dump(dict_data,f,default=json_default)
     
     except TypeError:
         return 'fail', "Non-numeric values encountered while formatting output."
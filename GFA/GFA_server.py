@@ -1,6 +1,7 @@
 import os, sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(os.path.dirname(__file__)))))
 from Lib.AMQ import *
+import Lib.offload as offload
 import Lib.mkmessage as mkmsg
 import asyncio
 import aio_pika
@@ -29,12 +30,12 @@ async def main():
         async with message.process():
             func = 'None'
             try:
-                dict_data = json.loads(message.body)
+                dict_data = decode_message(message.body, message.content_type)
                 func = dict_data.get('func', 'None')
                 message_text = dict_data['message']
                 print('\033[94m' + '[GFA] received: ' + message_text + '\033[0m')
 
-                await identify_execute(GFA_server, gfa_actions, message.body)
+                await identify_execute(GFA_server, gfa_actions, dict_data)
 
             except Exception as e:
                 comment = f"GFA command failed: {e}"
@@ -53,10 +54,17 @@ async def main():
 
         print('Waiting for message from client......')
 
+    offload.install()
     await GFA_server.define_consumer('GFA',on_gfa_message)
     print('Waiting for message from client......')
-    while True:
-        await asyncio.sleep(1)
+    try:
+        while True:
+            await asyncio.sleep(1)
+    finally:
+        await gfa_actions.wait_for_writes()
+        gfa_actions.cancel_solves()
+        gfa_actions.stop_prewarm()
+        offload.shutdown()
 #        msg=await GFA_server.receive_message('GFA')
 #        dict_data=json.loads(msg)
 #        message=dict_data['message']
@@ -9,9 +9,18 @@ import math
 import numpy as np
 from pathlib import Path
 from .pointing import *
+from Lib.config import get_config
+from Lib.dispatcher import Dispatcher, parse_bool, parse_list
+from GFA.kspec_gfa_controller.src.kspec_gfa_controller.gfa_metrics import metrics
 
 
-guiding_task = None
+# Defaults of KSPEC.ini GFA.guide_interval / GFA.guide_depth: minimum seconds
+# between the starts of two guiding exposures (the former sleep(70) cadence), and
+# exposures in flight. With depth > 1 the next exposure is taken while the previous
+# one is still being solved; ICS drops corrections of exposures taken before its
+# last tmradec (see exposure_start in the replies).
+GUIDE_INTERVAL = 70.0
+GUIDE_DEPTH = 2
 
 def printing(message):
     """Utility function for consistent printingging.
@@ -37,28 +46,11 @@ def clear_astrometry_outputs(directory):
 
     return deleted
 
-def parse_bool(value):
-    if isinstance(value, bool):
-        return value
-    if value is None:
-        return False
-    if isinstance(value, str):
-        normalized = value.strip().lower()
-        if normalized in ("true", "1", "yes", "y"):
-            return True
-        if normalized in ("false", "0", "no", "n"):
-            return False
-        raise ValueError(f"Invalid boolean value: {value}")
-
-    return bool(value)
-
-def parse_list(value):
-    if isinstance(value, list):
-        return value
-    raise ValueError(f"Expected list, got {type(value).__name__}")
-
-def is_missing_parameter(value):
-    return value is None or value == '' or value == 'None'
+def guide_star_center(ra, dec):
+    """Center (deg) of the guide stars of a tile; RA is averaged on the circle."""
+    ra_rad = np.radians(np.asarray(ra, dtype=float))
+    center_ra = np.degrees(np.arctan2(np.sin(ra_rad).mean(), np.cos(ra_rad).mean())) % 360.0
+    return float(center_ra), float(np.mean(np.asarray(dec, dtype=float)))
 
 GFA_COMMAND_SPECS = {
     'gfastatus': {},
@@ -72,6 +64,7 @@ GFA_COMMAND_SPECS = {
         'optional_args': (
             ('ra', str, None),
             ('dec', str, None),
+            ('background', parse_bool, False),
         ),
         'validators': (
             ('CamNum', lambda value: value >= 0, 'Camera number should be greater than or equal to 0.'),
@@ -109,6 +102,24 @@ GFA_COMMAND_SPECS = {
             ('ExpNum', lambda value: value >= 1, 'Exposure number should be greater than or equal to 1.'),
         ),
     },
+    'gfacalib': {
+        'args': (
+            ('kind', str),
+            ('ExpNum', int),
+        ),
+        'optional_args': (
+            ('ExpTime', float, None),
+            ('CamNum', int, 0),
+            ('Binning', int, 4),
+        ),
+        'validators': (
+            ('kind', lambda value: value in ('bias', 'dark'), "Calibration kind should be 'bias' or 'dark'."),
+            ('ExpNum', lambda value: value >= 1, 'Exposure number should be greater than or equal to 1.'),
+            ('ExpTime', lambda value: value is None or value > 0, 'Exposure time should be greater than 0.'),
+            ('CamNum', lambda value: value >= 0, 'Camera number should be greater than or equal to 0.'),
+            ('Binning', lambda value: value >= 1, 'Binning should be greater than or equal to 1.'),
+        ),
+    },
     'loadguide': {
         'args': (
             ('ra', parse_list),
@@ -120,339 +131,276 @@ GFA_COMMAND_SPECS = {
     },
 }
 
-def parse_gfa_command(func, dict_data):
-    spec = GFA_COMMAND_SPECS.get(func)
-    if spec is None:
-        return None, f"Unknown GFA command: {func}"
+gfa = Dispatcher('GFA', mkmsg.gfamsg)
 
-    parsed = dict(spec.get('fixed', {}))
 
-    for name, value_type in spec.get('args', ()):
-        raw_value = dict_data.get(name)
-        if is_missing_parameter(raw_value):
-            return None, f"'{func}' command needs '{name}' parameter."
-
-        try:
-            parsed[name] = value_type(raw_value)
-        except (TypeError, ValueError):
-            value_type_name = getattr(value_type, '__name__', str(value_type))
-            return (
-                None,
-                f"'{func}' command parameter '{name}' should be {value_type_name}. "
-                f"input value: {raw_value}",
-            )
-
-    for name, value_type, default in spec.get('optional_args', ()):
-        raw_value = dict_data.get(name, default)
-        if is_missing_parameter(raw_value):
-            parsed[name] = default
-            continue
-
-        try:
-            parsed[name] = value_type(raw_value)
-        except (TypeError, ValueError):
-            value_type_name = getattr(value_type, '__name__', str(value_type))
-            return (
-                None,
-                f"'{func}' command parameter '{name}' should be {value_type_name}. "
-                f"input value: {raw_value}",
-            )
-
-    for name, validator, message in spec.get('validators', ()):
-        if not validator(parsed[name]):
-            return None, f"{message} input value: {parsed[name]}"
+async def identify_execute(GFA_server,gfa_actions,cmd):
+    await gfa.dispatch(GFA_server, cmd, gfa_actions)
 
-    return parsed, None
 
 async def send_gfa_response(GFA_server, result=None, *, log=True, **updates):
-    reply_data = mkmsg.gfamsg()
-
-    if result is not None:
-        reply_data.update(result)
-
-    reply_data.update(updates)
-
-    rsp = json.dumps(reply_data)
-    if log and reply_data.get('message'):
-        printing(reply_data['message'])
-
-    await GFA_server.send_message('ICS', rsp)
-    return reply_data
-
-async def identify_execute(GFA_server,gfa_actions,cmd):
-    global guiding_task 
-    try:
-        dict_data=json.loads(cmd)
-    except json.JSONDecodeError as e:
+    with metrics.stage('reply'):
+        return await gfa.reply(GFA_server, result, log=log, **updates)
+
+
+@gfa.command('gfastatus', GFA_COMMAND_SPECS['gfastatus'])
+async def handle_gfastatus(GFA_server, dict_data, gfa_actions):
+    result=gfa_actions.status()
+    await send_gfa_response(GFA_server, result, process='Done')
+
+
+@gfa.command('gfagrab', GFA_COMMAND_SPECS['gfagrab'])
+async def handle_gfagrab(GFA_server, dict_data, gfa_actions, **args):
+    result = await gfa_actions.grab(
+        args['CamNum'],
+        args['ExpTime'],
+        args['ExpNum'],
+        ra=args['ra'],
+        dec=args['dec'],
+        background=args['background'],
+    )
+    await send_gfa_response(GFA_server, result, process='Done')
+
+
+# A new gfaguide cancels the running one; gfaguidestop cancels it through gfa.cancel('guide')
+@gfa.command('gfaguide', GFA_COMMAND_SPECS['gfaguide'], policy='cancel_previous', group='guide')
+async def handle_gfaguide(GFA_server, dict_data, gfa_actions, **args):
+    printing("New guiding task started.")
+    await send_gfa_response(
+        GFA_server,
+        process='START',
+        message='Autoguide starts.',
+        status='success',
+        log=False,
+    )
+    await handle_guiding(
+        GFA_server,
+        gfa_actions,
+        args['ExpTime'],
+        args['ExpNum'],
+        args['save'],
+        ra=args['ra'],
+        dec=args['dec'],
+    )
+
+
+@gfa.command('gfaguidestop', GFA_COMMAND_SPECS['gfaguidestop'])
+async def handle_gfaguidestop(GFA_server, dict_data, gfa_actions):
+    if gfa.running('guide') is None:
+        printing("No Guiding task is currently running.")
         await send_gfa_response(
             GFA_server,
-            message=f"Invalid GFA command JSON: {e}",
             process='Done',
-            status='error',
+            message='No Guiding task is currently running.',
+            status='normal',
         )
         return
 
-    if not isinstance(dict_data, dict):
+    printing("Stopping guiding task...")
+    await gfa.cancel('guide')
+    printing("Guiding task stopped.")
+    await send_gfa_response(
+        GFA_server,
+        process='Done',
+        message='Autoguide Stop',
+        status='success',
+    )
+
+    path_astroimg=get_config()['GFA']['final_astrometry_images']
+    deleted = clear_astrometry_outputs(path_astroimg)
+    printing(f"Deleted {deleted} astrometry output files from {path_astroimg}")
+
+
+@gfa.command('gfacalib', GFA_COMMAND_SPECS['gfacalib'])
+async def handle_gfacalib(GFA_server, dict_data, gfa_actions, **args):
+    # Master bias/dark frames used by guiding and grabs (telescope must be covered)
+    kind = args['kind']
+    if kind == 'dark' and args['ExpTime'] is None:
         await send_gfa_response(
             GFA_server,
-            message='Invalid GFA command: JSON payload should be an object.',
+            message="'gfacalib dark' command needs 'ExpTime' parameter.",
             process='Done',
             status='error',
         )
         return
 
-    func=dict_data.get('func')
-    if is_missing_parameter(func):
-        await send_gfa_response(
-            GFA_server,
-            message="Invalid GFA command: 'func' is required.",
-            process='Done',
-            status='error',
+    await send_gfa_response(
+        GFA_server,
+        process='START',
+        message=f'Taking {kind} frames.',
+        status='success',
+        log=False,
+    )
+    calib_kwargs = {}
+    if args['ExpTime'] is not None:
+        calib_kwargs['ExpTime'] = args['ExpTime']
+    result = await gfa_actions.take_calibration(
+        kind,
+        ExpNum=args['ExpNum'],
+        CamNum=args['CamNum'],
+        Binning=args['Binning'],
+        **calib_kwargs,
+    )
+    await send_gfa_response(GFA_server, result, process='Done')
+
+
+@gfa.command('loadguide', GFA_COMMAND_SPECS['loadguide'])
+async def handle_loadguide(GFA_server, dict_data, gfa_actions, ra, dec, mag, xp, yp):
+    status, comment=savedata(ra,dec,xp,yp,mag)    # It would be removed, because guide stars are not necessary in current guiding system.
+    await send_gfa_response(
+        GFA_server,
+        message=comment,
+        process='Done',
+        status=status,
+    )
+
+    # loadtile: preload the astrometry index files of this tile while the telescope slews
+    if ra and dec:
+        try:
+            gfa_actions.start_prewarm(*guide_star_center(ra, dec))
+        except (TypeError, ValueError) as e:
+            printing(f"Index preload skipped: {e}")
+
+
+#@gfa.command('fdgrab')
+#async def handle_fdgrab(GFA_server, dict_data, gfa_actions):
+#    printing("Finder grab task started.")
+#    reply_data=mkmsg.gfamsg()
+#    reply_data.update(process='START',message='Finder grab starts.',status='success')
+#    rsp=json.dumps(reply_data)
+#    await GFA_server.send_message('ICS',rsp)
+#    result = await finder_actions.grab(dict_data['ExpTime'])
+#    reply_data=mkmsg.gfamsg()
+#    reply_data.update(result)
+#    reply_data.update(process='Done')
+#    rsp=json.dumps(reply_data)
+#    printing(reply_data['message'])
+#    await GFA_server.send_message('ICS',rsp)
+
+
+@gfa.command('pointing', GFA_COMMAND_SPECS['pointing'])
+async def handle_pointing(GFA_server, dict_data, gfa_actions, **args):
+    path_astroimg=get_config()['GFA']['final_astrometry_images']
+    deleted = clear_astrometry_outputs(path_astroimg)
+    printing(f"Deleted {deleted} astrometry output files from {path_astroimg}")
+
+    await send_gfa_response(
+        GFA_server,
+        process='START',
+        message='Start calculating Telescope pointing offset.',
+        status='success',
+        subinst='POINT',
+        log=False,
+    )
+
+    max_try = 3
+    min_required = 5
+
+    for attempt in range (1, max_try+1):
+        result = await gfa_actions.pointing(
+            ra=args['ra'],
+            dec=args['dec'],
+            ExpTime=args['ExpTime'],
+            ExpNum=args['ExpNum'],
+            SaveGrabRaw=args['SaveGrabRaw'],
         )
-        return
 
-    parsed_args, parse_error = parse_gfa_command(func, dict_data)
-    if parse_error:
-        await send_gfa_response(
-            GFA_server,
-            message=parse_error,
-            process='Done',
-            status='error',
-        )
-        return
+        message1 = result.get('message', 'Unknown error')
+        status = result.get('status','error')
 
-    with open('./Lib/KSPEC.ini','r') as f:
-        kspecinfo=json.load(f)
+        if status == 'error':
+            msg =f'{message1}. Increase exposure time or Wait for good weather.'
+            await send_gfa_response(
+                GFA_server,
+                message=msg,
+                process='Done',
+                status='fail',
+                subinst='POINT',
+            )
+            return
 
-    if func == 'gfastatus':
-        result=gfa_actions.status()
-        await send_gfa_response(GFA_server, result, process='Done')
+        img_list=result['images']
+        crval1_list=result['crval1']
+        crval2_list=result['crval2']
 
-    elif func == 'gfagrab':
-        result = await gfa_actions.grab(
-            parsed_args['CamNum'],
-            parsed_args['ExpTime'],
-            parsed_args['ExpNum'],
-            ra=parsed_args['ra'],
-            dec=parsed_args['dec'],
-        )
-        await send_gfa_response(GFA_server, result, process='Done')
 
-    elif func == 'gfaguide':
-        # Cancel any running task before starting a new one
-        if guiding_task and not guiding_task.done():
-            printing("Cancelling the running autoguiding task...")
-            guiding_task.cancel()
+        def is_finite_number(value):
             try:
-                await guiding_task
-            except asyncio.CancelledError:
-                printing("Previous guiding task cancelled.")
-
-        # Start a new adcadjust task
-        printing("New guiding task started.")
-        await send_gfa_response(
-            GFA_server,
-            process='START',
-            message='Autoguide starts.',
-            status='success',
-            log=False,
-        )
-        guiding_task = asyncio.create_task(
-            handle_guiding(
-                GFA_server,
-                gfa_actions,
-                parsed_args['ExpTime'],
-                parsed_args['ExpNum'],
-                parsed_args['save'],
-                ra=parsed_args['ra'],
-                dec=parsed_args['dec'],
+                return value is not None and math.isfinite(float(value))
+            except (TypeError, ValueError):
+                return False
+
+        if len(crval1_list) != len(crval2_list):
+            printing(
+                f"CRVAL list length mismatch: "
+                f"CRVAL1={len(crval1_list)}, CRVAL2={len(crval2_list)}"
             )
-        )
 
-    elif func == 'gfaguidestop':
-        if guiding_task and not guiding_task.done():
-            printing("Stopping guiding task...")
-            guiding_task.cancel()
+        valid_crval_pairs = [
+            (float(crval1), float(crval2))
+            for crval1, crval2 in zip(crval1_list, crval2_list)
+            if is_finite_number(crval1) and is_finite_number(crval2)
+        ]
+
+        valid_crval1 = [crval1 for crval1, _ in valid_crval_pairs]
+        valid_crval2 = [crval2 for _, crval2 in valid_crval_pairs]
+
+        # Success condition
+        if len(valid_crval1) >= min_required:
+            printing(f"Astrometry success with {len(valid_crval1)} valid CRVAL pairs")
+            ra_c, dec_c = get_boresight(valid_crval1, valid_crval2)    # Boresight coordinate
+            ra, dec = radec_str_to_deg(args['ra'], args['dec'])  # covert RA,DEC of Tile center to degree
+            printing(f'Telescope Target: RA = {ra} DEC = {dec}')
+            printing(f'Current Telescope pointing: RA = {ra_c} DEC= {dec_c}')
+
+            sep = get_separation(ra_c,dec_c,ra,dec)
+
+            printing(f'Separtation (arcsec.) : {sep}')
+
+            delra,deldec = offsets_arcsec(ra_c,dec_c,ra,dec)  # calculate offset to move from ra_c, dec_c to ra, dec
+
+            printing(f'Offset in (RA, DEC) : ({delra}, {deldec})')
+
+            ra_deg, dec_deg = apply_offsets(ra,dec,delra,deldec)
+            ra_new = ra_deg_to_hms(ra_deg)
+            dec_new = dec_deg_to_dms(dec_deg)
+
+            msg =f'{message1} Telescope Target: RA = {ra} DEC = {dec}. \
+                Current Telescope pointing: RA = {ra_c} DEC= {dec_c}.'
+
             await send_gfa_response(
                 GFA_server,
+                result,
+                message=msg,
+                sepsec=sep,
+                dra=delra,
+                ddec=deldec,
+                new_ra=ra_new,
+                new_dec=dec_new,
                 process='Done',
-                message='Autoguide Stop',
                 status='success',
+                subinst='POINT',
             )
+            break
 
-            path_astroimg=kspecinfo['GFA']['final_astrometry_images']
-            deleted = clear_astrometry_outputs(path_astroimg)
-            printing(f"Deleted {deleted} astrometry output files from {path_astroimg}")
+        printing(f"Only {len(valid_crval1)} valid CRVAL pairs (try {attempt}/{max_try}) → retrying...")
 
-            try:
-                await guiding_task
-            except asyncio.CancelledError:
-                printing("Guiding task stopped.")
-        else:
-            printing("No Guiding task is currently running.")
+        if attempt == max_try:
+            msg = "Astrometry failed: insufficient valid CRVAL pairs (less than 5). Increase exposure time or Wait for good weather."
             await send_gfa_response(
                 GFA_server,
+                message=msg,
                 process='Done',
-                message='No Guiding task is currently running.',
-                status='normal',
+                status='fail',
+                subinst='POINT',
             )
+            return
 
-    elif func == 'loadguide':
-        ra=parsed_args['ra']
-        dec=parsed_args['dec']
-        mag=parsed_args['mag']
-        xp=parsed_args['xp']
-        yp=parsed_args['yp']
-        status, comment=savedata(ra,dec,xp,yp,mag)    # It would be removed, because guide stars are not necessary in current guiding system. 
-        await send_gfa_response(
-            GFA_server,
-            message=comment,
-            process='Done',
-            status=status,
-        )
-
-
-#    if func == 'fdgrab':
-#        printing("Finder grab task started.")
-#        reply_data=mkmsg.gfamsg()
-#        reply_data.update(process='START',message='Finder grab starts.',status='success')
-#        rsp=json.dumps(reply_data)
-#        await GFA_server.send_message('ICS',rsp)
-#        result = await finder_actions.grab(dict_data['ExpTime'])
-#        reply_data=mkmsg.gfamsg()
-#        reply_data.update(result)
-#        reply_data.update(process='Done')
-#        rsp=json.dumps(reply_data)
-#        printing(reply_data['message'])
-#        await GFA_server.send_message('ICS',rsp)
+        await asyncio.sleep(1)
 
 
-    elif func == 'pointing':
-        path_astroimg=kspecinfo['GFA']['final_astrometry_images']
-        deleted = clear_astrometry_outputs(path_astroimg)
-        printing(f"Deleted {deleted} astrometry output files from {path_astroimg}")
-
-        await send_gfa_response(
-            GFA_server,
-            process='START',
-            message='Start calculating Telescope pointing offset.',
-            status='success',
-            subinst='POINT',
-            log=False,
-        )
-
-        max_try = 3
-        min_required = 5
-
-        for attempt in range (1, max_try+1):
-            result = await gfa_actions.pointing(
-                ra=parsed_args['ra'],
-                dec=parsed_args['dec'],
-                ExpTime=parsed_args['ExpTime'],
-                ExpNum=parsed_args['ExpNum'],
-                SaveGrabRaw=parsed_args['SaveGrabRaw'],
-            )
-
-            message1 = result.get('message', 'Unknown error')
-            status = result.get('status','error')
-
-            if status == 'error':
-                msg =f'{message1}. Increase exposure time or Wait for good weather.'
-                await send_gfa_response(
-                    GFA_server,
-                    message=msg,
-                    process='Done',
-                    status='fail',
-                    subinst='POINT',
-                )
-                return
-
-            img_list=result['images']
-            crval1_list=result['crval1']
-            crval2_list=result['crval2']
-
-
-            def is_finite_number(value):
-                try:
-                    return value is not None and math.isfinite(float(value))
-                except (TypeError, ValueError):
-                    return False
-
-            if len(crval1_list) != len(crval2_list):
-                printing(
-                    f"CRVAL list length mismatch: "
-                    f"CRVAL1={len(crval1_list)}, CRVAL2={len(crval2_list)}"
-                )
-
-            valid_crval_pairs = [
-                (float(crval1), float(crval2))
-                for crval1, crval2 in zip(crval1_list, crval2_list)
-                if is_finite_number(crval1) and is_finite_number(crval2)
-            ]
-
-            valid_crval1 = [crval1 for crval1, _ in valid_crval_pairs]
-            valid_crval2 = [crval2 for _, crval2 in valid_crval_pairs]
-
-            # Success condition
-            if len(valid_crval1) >= min_required:
-                printing(f"Astrometry success with {len(valid_crval1)} valid CRVAL pairs")
-                ra_c, dec_c = get_boresight(valid_crval1, valid_crval2)    # Boresight coordinate
-                ra, dec = radec_str_to_deg(parsed_args['ra'], parsed_args['dec'])  # covert RA,DEC of Tile center to degree
-                printing(f'Telescope Target: RA = {ra} DEC = {dec}')
-                printing(f'Current Telescope pointing: RA = {ra_c} DEC= {dec_c}')
-
-                sep = get_separation(ra_c,dec_c,ra,dec)
-
-                printing(f'Separtation (arcsec.) : {sep}')
-
-                delra,deldec = offsets_arcsec(ra_c,dec_c,ra,dec)  # calculate offset to move from ra_c, dec_c to ra, dec
-
-                printing(f'Offset in (RA, DEC) : ({delra}, {deldec})')
-
-                ra_deg, dec_deg = apply_offsets(ra,dec,delra,deldec)
-                ra_new = ra_deg_to_hms(ra_deg)
-                dec_new = dec_deg_to_dms(dec_deg)
-
-                msg =f'{message1} Telescope Target: RA = {ra} DEC = {dec}. \
-                    Current Telescope pointing: RA = {ra_c} DEC= {dec_c}.'
-
-                await send_gfa_response(
-                    GFA_server,
-                    result,
-                    message=msg,
-                    sepsec=sep,
-                    dra=delra,
-                    ddec=deldec,
-                    new_ra=ra_new,
-                    new_dec=dec_new,
-                    process='Done',
-                    status='success',
-                    subinst='POINT',
-                )
-                break
-
-            printing(f"Only {len(valid_crval1)} valid CRVAL pairs (try {attempt}/{max_try}) → retrying...")
-
-            if attempt == max_try:
-                msg = "Astrometry failed: insufficient valid CRVAL pairs (less than 5). Increase exposure time or Wait for good weather."
-                await send_gfa_response(
-                    GFA_server,
-                    message=msg,
-                    process='Done',
-                    status='fail',
-                    subinst='POINT',
-                )
-                return
-
-            await asyncio.sleep(1)
-
-
-        
 def savedata(ra,dec,xp,yp,mag):
-    with open('./Lib/KSPEC.ini','r') as f:
-        inidata=json.load(f)
-
-    gfafilepath=inidata['GFA']['gfafilepath']        # guide stars info. is saved in GFA/etc directory. It would not be necessary.
+    gfafilepath=get_config()['GFA']['gfafilepath']        # guide stars info. is saved in GFA/etc directory. It would not be necessary.
 
     try:
         with open(gfafilepath+'position.radec','w') as savefile:
@@ -469,13 +417,24 @@ def savedata(ra,dec,xp,yp,mag):
 
 
 async def handle_guiding(GFA_server, gfa_actions, expt, expnum, save, ra: str=None, dec: str=None):
+    # Keep the cameras open for the whole guiding run instead of per cycle
+    session = await gfa_actions.start_session()
+    if session['status'] != 'success':
+        printing(session['message'])
+    gfainfo = get_config()['GFA']
+    pipeline = gfa_actions.guiding_pipeline(
+        expt,
+        expnum,
+        SaveGrabRaw=save,
+        ra=ra,
+        dec=dec,
+        interval=gfainfo.get('guide_interval', GUIDE_INTERVAL),
+        depth=gfainfo.get('guide_depth', GUIDE_DEPTH),
+    )
     try:
-        while True:
-            result = await gfa_actions.guiding(expt, expnum, SaveGrabRaw=save, ra=ra, dec=dec)
+        async for result in pipeline:
             await send_gfa_response(GFA_server, result, process='ING')
 
-            await asyncio.sleep(70)
-
     except asyncio.CancelledError:
         printing("handle_guiding task was cancelled.")
         raise
@@ -491,3 +450,6 @@ async def handle_guiding(GFA_server, gfa_actions, expt, expnum, save, ra: str=No
         )
     else:
         printing("handle_guiding completed successfully.")
+    finally:
+        await pipeline.aclose()
+        await gfa_actions.end_session()
@@ -75,8 +75,11 @@ def gfa_guiding(expt: float = 1.0, expnum: int = 1, save: bool = False, *, ra: s
 
 def gfa_guidestop() : return create_gfa_command('gfaguidestop',message='Stop autoguiding')
 
-def gfa_grab(cam, expt, expnum, *,ra: str=None, dec: str=None):
-    return create_gfa_command('gfagrab',CamNum=cam,ExpTime=expt,ExpNum=expnum,message=f'Expose camera {cam} for {expt} seconds.',ra=ra,dec=dec)
+def gfa_grab(cam, expt, expnum, *,ra: str=None, dec: str=None, background: bool=False):
+    return create_gfa_command('gfagrab',CamNum=cam,ExpTime=expt,ExpNum=expnum,message=f'Expose camera {cam} for {expt} seconds.',ra=ra,dec=dec,background=background)
+
+def gfa_calib(kind, expnum, expt=None, cam=0):
+    return create_gfa_command('gfacalib', kind=kind, ExpNum=expnum, ExpTime=expt, CamNum=cam, message=f'Take master {kind} frames.')
 
 def gfa_caloffset(expt: float=1.0, expnum: int=1, save: bool=True, ra: str=None, dec: str=None):
     return create_gfa_command('pointing', ExpTime=expt, ExpNum=expnum, SaveGrabRaw=save, ra=ra, dec=dec, message=f'Calculate Pointing offset.')      # Using six GFA cameras
@@ -107,17 +110,18 @@ async def handle_gfa(arg, ICS_client):
     }
 
     if cmd == 'gfagrab':
-        if len(params) != 3:
-            print("Error: 'gfagrab' needs three parameters: camera number and exposure time value. ex) gfagrab 1 10 1")
+        if len(params) not in (3, 4):
+            print("Error: 'gfagrab' needs three or four parameters: camera number, exposure time, exposure number, optional background save. ex) gfagrab 1 10 1")
             return
         try:
             camNum, ExpT, ExpNum = int(params[0]), float(params[1]), int(params[2])
+            background = parse_bool(params[3]) if len(params) == 4 else False
         except ValueError:
             print(f"Error: Input parameters of 'gfagrab' should be int and float. input value: {params[0]} {params[1]}")
             return
 #        ra,dec= await getradec()
 #        command_map[cmd] = lambda: gfa_grab(camNum, ExpT, ra=ra, dec=dec)
-        command_map[cmd] = lambda: gfa_grab(camNum, ExpT, ExpNum)
+        command_map[cmd] = lambda: gfa_grab(camNum, ExpT, ExpNum, background=background)
 
     elif cmd == 'gfaguide':
         if len(params) != 5:
@@ -135,6 +139,26 @@ async def handle_gfa(arg, ICS_client):
         dec = params[4]
         command_map[cmd] = lambda: gfa_guiding(ExpT, ExpNum, save, ra=ra, dec=dec)
 
+    elif cmd == 'gfacalib':
+        if len(params) not in (2, 3, 4) or params[0] not in ('bias', 'dark'):
+            print("Error: 'gfacalib' needs bias/dark, exposure number, exposure time (dark only) and optional camera number. ex) gfacalib bias 10, gfacalib dark 10 5 1")
+            return
+        kind = params[0]
+        try:
+            ExpNum = int(params[1])
+            if kind == 'dark':
+                ExpT = float(params[2])
+                camNum = int(params[3]) if len(params) == 4 else 0
+            else:
+                if len(params) == 4:
+                    raise ValueError("bias takes no exposure time")
+                ExpT = None
+                camNum = int(params[2]) if len(params) == 3 else 0
+        except (ValueError, IndexError) as e:
+            print(f"Error: invalid 'gfacalib' parameter: {e}")
+            return
+        command_map[cmd] = lambda: gfa_calib(kind, ExpNum, ExpT, camNum)
+
     elif cmd == 'caloffset':
         if len(params) not in (4, 5):
             print("Error: 'caloffset' needs four or five parameters: exposure time, exposure number, optional save, RA, DEC. ex) caloffset 1 1 true 12:00:00 +30:00:00")
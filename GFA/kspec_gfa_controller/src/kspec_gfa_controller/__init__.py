@@ -1,7 +1,7 @@
 # src/kspec_gfa_controller/__init__.py
 from __future__ import annotations
 
-__all__ = ["GFAActions", "GFAEnvironment", "GFAGuider"]
+__all__ = ["GFAActions", "GFAEnvironment", "GFAFrame", "GFAGuider"]
 
 
 def __getattr__(name: str):
@@ -13,6 +13,10 @@ def __getattr__(name: str):
         from .gfa_environment import GFAEnvironment
 
         return GFAEnvironment
+    if name == "GFAFrame":
+        from .gfa_frame import GFAFrame
+
+        return GFAFrame
     if name == "GFAGuider":
         from .gfa_guider import GFAGuider
 
@@ -4,6 +4,8 @@
 import os
 import asyncio
 import shutil
+import threading
+import time
 from datetime import datetime
 from typing import Union, List, Dict, Any, Optional, Tuple
 from pathlib import Path
@@ -14,12 +16,16 @@ from collections import defaultdict
 
 from .gfa_logger import GFALogger
 from .gfa_environment import create_environment, GFAEnvironment
+from .gfa_metrics import metrics
 
 # NOTE: pointing에서는 get_crvals_from_images를 쓰고 있으니 유지
 from .gfa_getcrval import get_crvals_from_images, get_crval_from_image  # noqa: F401
 
 logger = GFALogger(__file__)
 
+# Exposure time (s) used for bias frames in take_calibration()
+BIAS_EXPTIME = 0.0001
+
 
 def _make_clean_subprocess_env() -> dict:
     """
@@ -52,6 +58,10 @@ class GFAActions:
                 save_root=save_root,
             )
         self.env = env
+        # grab() FITS writes still running in background mode
+        self._pending_writes = set()
+        # index preloads started by start_prewarm(), with their cancel tokens
+        self._prewarm_tasks: Dict["asyncio.Task", threading.Event] = {}
 
     def _generate_response(self, status: str, message: str, **kwargs) -> dict:
         response = {"status": status, "message": message}
@@ -155,6 +165,98 @@ class GFAActions:
 
         return astro_files
 
+    def _calibration(self, cam_id: int, Binning: int, ExpTime: float):
+        """Calibration masters (gfa_calib.CalibrationSet) for a camera, or None."""
+        store = getattr(self.env, "calibration", None)
+        if store is None:
+            return None
+        try:
+            serial = self.env.controller.get_camera_param(cam_id, "SerialNumber")
+            return store.get(serial, Binning, ExpTime)
+        except Exception as e:
+            self.env.logger.warning(f"Calibration lookup for Cam{cam_id} failed: {e}")
+            return None
+
+    async def take_calibration(
+        self,
+        kind: str,
+        ExpTime: float = BIAS_EXPTIME,
+        ExpNum: int = 10,
+        CamNum: Union[int, List[int]] = 0,
+        Binning: int = 4,
+    ) -> Dict[str, Any]:
+        """
+        Grab bias or dark frames (telescope covered) and store master frames.
+
+        kind="bias" exposes for BIAS_EXPTIME. kind="dark" exposes for ExpTime
+        and also updates the bad-pixel mask. Masters are stored per camera
+        serial and binning in env.calibration.
+        """
+        if kind not in ("bias", "dark"):
+            raise ValueError(f"Invalid calibration kind: {kind}")
+        if kind == "bias":
+            ExpTime = BIAS_EXPTIME
+
+        store = self.env.calibration
+        if CamNum == 0:
+            cam_list = list(self.env.camera_ids)
+        elif isinstance(CamNum, int):
+            cam_list = [CamNum]
+        else:
+            cam_list = list(CamNum)
+
+        await self.env.controller.open_all_cameras()
+        written = {}
+        try:
+            for cam_id in cam_list:
+                result = await self.env.controller.grab_stream(
+                    CamNum=cam_id, ExpTime=ExpTime, Binning=Binning, ExpNum=ExpNum
+                )
+                if not result["images"]:
+                    self.env.logger.warning(f"[calib] Cam{cam_id}: no {kind} frames.")
+                    continue
+                frames = {
+                    "bias": {"bias_frames": result["images"]},
+                    "dark": {"dark_frames": result["images"], "dark_exptime": ExpTime},
+                }[kind]
+                written[cam_id] = await asyncio.to_thread(
+                    store.build, result["serial"], Binning, **frames
+                )
+            return self._generate_response(
+                "success",
+                f"Master {kind} stored for cameras {sorted(written)}.",
+                calib_files=written,
+            )
+        except Exception as e:
+            self.env.logger.error(f"Calibration failed: {e}")
+            return self._generate_response("error", f"Calibration failed: {e}")
+        finally:
+            try:
+                await self.env.controller.close_all_cameras()
+            except Exception as e:
+                self.env.logger.warning(f"close_all_cameras failed: {e}")
+
+    async def start_session(self) -> Dict[str, Any]:
+        """
+        Keep the cameras open across grab()/guiding() calls until end_session().
+        """
+        try:
+            await self.env.controller.start_session()
+            return self._generate_response("success", "Camera session started.")
+        except Exception as e:
+            self.env.logger.error(f"Camera session start failed: {e}")
+            return self._generate_response(
+                "error", f"Camera session start failed: {e}"
+            )
+
+    async def end_session(self) -> Dict[str, Any]:
+        try:
+            await self.env.controller.end_session()
+            return self._generate_response("success", "Camera session ended.")
+        except Exception as e:
+            self.env.logger.error(f"Camera session end failed: {e}")
+            return self._generate_response("error", f"Camera session end failed: {e}")
+
     async def grab(
         self,
         CamNum: Union[int, List[int]] = 0,
@@ -168,7 +270,17 @@ class GFAActions:
         ra: str = None,
         dec: str = None,
         path: str = None,
+        background: bool = False,
     ) -> Dict[str, Any]:
+        """
+        Expose the cameras and save one FITS per camera (combined if ExpNum > 1).
+
+        The per-camera saves (hot pixel removal, combine, write) run
+        concurrently in worker threads. By default the response is returned
+        once every file is written and synced to disk. With background=True it
+        is returned as soon as the frames are in memory, listing the paths
+        the files will have; wait_for_writes() awaits them.
+        """
         save_root, dirs = self._get_save_root_and_dirs()
         date_str = datetime.now().strftime("%Y-%m-%d")
 
@@ -202,8 +314,13 @@ class GFAActions:
         images_by_camera = defaultdict(list)
         serial_by_camera = {}
 
+        record = metrics.start_cycle("grab", ExpTime=ExpTime, ExpNum=ExpNum)
         self.env.logger.info("Open all plate cameras...")
-        await self.env.controller.open_all_cameras()
+        try:
+            await self.env.controller.open_all_cameras()
+        except Exception:
+            metrics.end_cycle(record, status="error")
+            raise
 
         try:
 
@@ -218,11 +335,47 @@ class GFAActions:
 
             cam_list = _camera_list_from_camnum(CamNum)
 
-            for exp_idx in range(ExpNum):
+            if ExpNum > 1:
+                # Continuous acquisition: configure once, stream ExpNum frames per camera
                 self.env.logger.info(
-                    f"[grab] exposure {exp_idx + 1}/{ExpNum}, "
+                    f"[grab] streaming {ExpNum} frames per camera, "
                     f"output_dir={grab_save_path}"
                 )
+                # frames are combined as they arrive; only the running
+                # sigma-clip state is kept per camera
+                combiners = {
+                    cam_id: self.env.controller.img_class.frame_combiner(
+                        calib=self._calibration(cam_id, Binning, ExpTime)
+                    )
+                    for cam_id in cam_list
+                }
+                results = await asyncio.gather(
+                    *(
+                        self.env.controller.grab_stream(
+                            CamNum=cam_id,
+                            ExpTime=ExpTime,
+                            Binning=Binning,
+                            ExpNum=ExpNum,
+                            packet_size=packet_size,
+                            ipd=cam_ipd,
+                            ftd_base=cam_ftd_base,
+                            combiner=combiners[cam_id],
+                        )
+                        for cam_id in cam_list
+                    )
+                )
+
+                for result in results:
+                    cam_num = result["cam_num"]
+                    if result["timeout"]:
+                        timeout_cameras.append(cam_num)
+                    if result["nframes"]:
+                        serial_by_camera[cam_num] = result["serial"]
+                        images_by_camera[cam_num] = combiners[cam_num]
+            else:
+                self.env.logger.info(
+                    f"[grab] exposure 1/1, output_dir={grab_save_path}"
+                )
 
                 # Do not save individual pre-combine frames to disk.
                 # Images are kept in memory and only the final FITS is saved below.
@@ -257,10 +410,15 @@ class GFAActions:
                     images_by_camera[cam_num].append(result["image"])
 
             grab_files = []
+            save_jobs = []
             timestamp = datetime.utcnow().strftime("D%Y%m%d_T%H%M%S")
 
             for cam_num, image_list in images_by_camera.items():
-                if len(image_list) == 0:
+                # list of grabone frames, or the FrameCombiner of a stream
+                nframes = (
+                    len(image_list) if isinstance(image_list, list) else image_list.count
+                )
+                if nframes == 0:
                     continue
 
                 serial = serial_by_camera.get(cam_num, f"cam{cam_num}")
@@ -270,17 +428,33 @@ class GFAActions:
                 else:
                     filename = f"{timestamp}_{serial}_exp{int(ExpTime)}s.fits"
 
-                self.env.controller.img_class.save_fits(
-                    image_array=image_list,
-                    filename=filename,
-                    exptime=ExpTime * len(image_list),
-                    output_directory=str(grab_save_path),
-                    ra=ra,
-                    dec=dec,
+                save_jobs.append(
+                    asyncio.to_thread(
+                        self.env.controller.img_class.save_fits,
+                        image_array=image_list,
+                        filename=filename,
+                        exptime=ExpTime * nframes,
+                        output_directory=str(grab_save_path),
+                        ra=ra,
+                        dec=dec,
+                        fsync=not background,
+                        calib=self._calibration(cam_num, Binning, ExpTime),
+                    )
                 )
-
                 grab_files.append(str(grab_save_path / filename))
 
+            failed_files = []
+            if background:
+                for job, filename in zip(save_jobs, grab_files):
+                    self._persist_in_background(job, filename)
+            else:
+                results = await asyncio.gather(*save_jobs, return_exceptions=True)
+                for filename, result in zip(list(grab_files), results):
+                    if isinstance(result, Exception):
+                        self.env.logger.error(f"[grab] Failed to save {filename}: {result}")
+                        grab_files.remove(filename)
+                        failed_files.append(filename)
+
             if CamNum == 0:
                 msg = f"Images grabbed from all cameras. ExpNum={ExpNum}."
             else:
@@ -288,6 +462,10 @@ class GFAActions:
 
             if timeout_cameras:
                 msg += f" Timeout: {timeout_cameras}"
+            if failed_files:
+                msg += f" Save failed: {failed_files}"
+            if background:
+                msg += " Files are being written in the background."
 
             return self._generate_response(
                 "success",
@@ -310,6 +488,80 @@ class GFAActions:
                 await self.env.controller.close_all_cameras()
             except Exception as e:
                 self.env.logger.warning(f"close_all_cameras failed: {e}")
+            metrics.end_cycle(record)
+
+    def _persist_in_background(self, job, filename: str) -> None:
+        def _report(task):
+            self._pending_writes.discard(task)
+            if not task.cancelled() and task.exception() is not None:
+                self.env.logger.error(
+                    f"[grab] Background save of {filename} failed: {task.exception()}"
+                )
+
+        task = asyncio.create_task(job)
+        self._pending_writes.add(task)
+        task.add_done_callback(_report)
+
+    async def wait_for_writes(self) -> None:
+        """Wait until all background grab() writes have finished."""
+        if self._pending_writes:
+            await asyncio.gather(*list(self._pending_writes), return_exceptions=True)
+
+    def cancel_solves(self) -> int:
+        """Kill running and queued solve-field jobs; returns how many there were."""
+        solver = getattr(getattr(self.env, "astrometry", None), "solver", None)
+        if solver is None:
+            return 0
+        return solver.cancel_all()
+
+    async def prewarm_astrometry(
+        self,
+        ra: Union[str, float],
+        dec: Union[str, float],
+        cancel: Optional[threading.Event] = None,
+    ) -> Dict[str, Any]:
+        """
+        Preload the astrometry.net index files covering (ra, dec) into the page
+        cache, so the first solve-field of the tile does not read them from disk.
+        Setting `cancel` aborts the preload.
+        """
+        astrometry = getattr(self.env, "astrometry", None)
+        if astrometry is None or not hasattr(astrometry, "prewarm_indexes"):
+            return self._generate_response("normal", "Index preload not available.")
+        try:
+            result = await asyncio.to_thread(
+                astrometry.prewarm_indexes, ra, dec, cancel=cancel
+            )
+        except Exception as e:
+            self.env.logger.warning(f"Index preload failed: {e}")
+            return self._generate_response("error", f"Index preload failed: {e}")
+        if result is None:
+            return self._generate_response("normal", "Index preload disabled.")
+        return self._generate_response(
+            "success", f"Preloaded {result['files']} index files.", index=result
+        )
+
+    def start_prewarm(
+        self, ra: Union[str, float, None], dec: Union[str, float, None]
+    ) -> Optional["asyncio.Task"]:
+        """Run prewarm_astrometry() in the background (no-op without RA/DEC)."""
+        if ra is None or dec is None:
+            return None
+        # the token exists before the worker thread starts, so stop_prewarm() also
+        # cancels preloads that have not begun reading yet
+        cancel = threading.Event()
+        task = asyncio.create_task(self.prewarm_astrometry(ra, dec, cancel=cancel))
+        self._prewarm_tasks[task] = cancel
+        task.add_done_callback(lambda t: self._prewarm_tasks.pop(t, None))
+        return task
+
+    def stop_prewarm(self) -> None:
+        """Abort index preloads still reading (server shutdown)."""
+        for cancel in self._prewarm_tasks.values():
+            cancel.set()
+        astrometry = getattr(self.env, "astrometry", None)
+        if hasattr(astrometry, "stop_prewarm"):
+            astrometry.stop_prewarm()
 
     async def guiding(
         self,
@@ -459,6 +711,368 @@ class GFAActions:
                 save_path=str(guiding_save_path),
             )
 
+    # -------------------------------------------------------------------------
+    # Pipelined guiding: grab -> save raw -> solve -> centroid, per camera
+    # -------------------------------------------------------------------------
+    async def _grab_camera(
+        self,
+        cam_id: int,
+        ExpTime: float,
+        ExpNum: int,
+        ra: str = None,
+        dec: str = None,
+        Binning: int = 4,
+    ):
+        """
+        Expose one camera and build its in-memory frame (GFAFrame).
+        Returns None on timeout. Runs as its own task (stage timings go to
+        this camera).
+        """
+        metrics.set_camera(f"Cam{cam_id}")
+        controller = self.env.controller
+
+        calib = self._calibration(cam_id, Binning, ExpTime)
+
+        if ExpNum > 1:
+            combiner = controller.img_class.frame_combiner(calib=calib)
+            result = await controller.grab_stream(
+                CamNum=cam_id,
+                ExpTime=ExpTime,
+                Binning=Binning,
+                ExpNum=ExpNum,
+                combiner=combiner,
+            )
+            image, nframes = combiner, result["nframes"]
+        else:
+            result = await controller.grabone(
+                CamNum=cam_id,
+                ExpTime=ExpTime,
+                Binning=Binning,
+                ra=ra,
+                dec=dec,
+                save=False,
+            )
+            image, nframes = result.get("image"), 0 if result["timeout"] else 1
+
+        if not nframes:
+            self.env.logger.warning(f"[pipeline] Cam{cam_id}: no frame (timeout).")
+            return None
+
+        serial = result["serial"]
+        timestamp = datetime.utcnow().strftime("D%Y%m%d_T%H%M%S")
+
+        return await asyncio.to_thread(
+            controller.img_class.make_frame,
+            image,
+            exptime=ExpTime * nframes,
+            ra=ra,
+            dec=dec,
+            name=f"{timestamp}_{serial}_exp{int(ExpTime)}s",
+            calib=calib,
+            cam_num=cam_id,
+            serial=serial,
+        )
+
+    def _write_frame(
+        self,
+        frame,
+        path: Path,
+        sinks: List["asyncio.Task"],
+        with_wcs: bool = True,
+    ) -> str:
+        """
+        Optional FITS sink: write the frame in the background, off the guiding path.
+        """
+        def _report(task):
+            if not task.cancelled() and task.exception() is not None:
+                self.env.logger.error(f"[pipeline] Failed to write {path}: {task.exception()}")
+
+        task = asyncio.create_task(
+            asyncio.to_thread(frame.write, str(path), with_wcs=with_wcs)
+        )
+        task.add_done_callback(_report)
+        sinks.append(task)
+        return str(path)
+
+    async def _process_camera(
+        self,
+        grab_task: "asyncio.Task",
+        cam_index: int,
+        guiding_save_path: Path,
+        SaveGrabRaw: bool,
+        astro_save_path: Optional[Path],
+        sinks: List["asyncio.Task"],
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Solve and centroid one camera frame as soon as its grab has finished.
+        The frame stays in memory; FITS files are only written by the sinks.
+        Returns the measure_frame() result with the camera info, or None.
+        """
+        try:
+            frame = await grab_task
+        except Exception as e:
+            self.env.logger.error(f"[pipeline] Grab failed: {e}")
+            return None
+        if frame is None:
+            return None
+
+        cam_num = frame.provenance["cam_num"]
+        metrics.set_camera(f"Cam{cam_num}")
+        try:
+            if SaveGrabRaw:
+                # raw files never carry the WCS: the solve below runs concurrently
+                # with this write, so including it would depend on thread timing
+                self._write_frame(
+                    frame, guiding_save_path / f"{frame.name}.fits", sinks, with_wcs=False
+                )
+
+            await self.env.astrometry.solve_frame_async(
+                frame, frame.provenance["serial"]
+            )
+
+            astro_file = None
+            if astro_save_path is not None:
+                astro_file = self._write_frame(
+                    frame, astro_save_path / f"astro_{frame.name}.fits", sinks
+                )
+
+            cutouts: List[Any] = []
+            measured = await asyncio.to_thread(
+                self.env.guider.measure_frame, frame, cam_index, cutouts
+            )
+            if measured is None:
+                return None
+
+            dxn, dyn, pindn = measured
+            return dict(
+                cam_num=cam_num,
+                serial=frame.provenance["serial"],
+                astro_file=astro_file,
+                dx=dxn,
+                dy=dyn,
+                pind=pindn,
+                cutouts=cutouts,
+            )
+        except Exception as e:
+            self.env.logger.error(f"[pipeline] Cam{cam_num} failed: {e}")
+            return None
+
+    async def _finish_cycle(
+        self,
+        cycle: int,
+        camera_tasks: List["asyncio.Task"],
+        guiding_save_path: Path,
+        record: Optional[Dict[str, Any]] = None,
+        exposure_start: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """
+        Combine the camera results of one exposure into a guiding response.
+        `record` is the metrics cycle record; its stage totals are returned
+        as "timing". `exposure_start` (Unix time) is returned as is.
+        """
+        import math
+
+        results = [r for r in await asyncio.gather(*camera_tasks) if r is not None]
+
+        cutouts = [c for r in results for c in r["cutouts"]]
+        fdx, fdy, fwhm = await asyncio.to_thread(
+            self.env.guider.combine_offsets,
+            [r["dx"] for r in results],
+            [r["dy"] for r in results],
+            [r["pind"] for r in results],
+            cutouts,
+        )
+
+        astrometry_files = [
+            os.path.basename(r["astro_file"]) for r in results if r["astro_file"]
+        ]
+        info = dict(
+            cycle=cycle,
+            exposure_start=exposure_start,
+            cameras=[r["cam_num"] for r in results],
+            save_path=str(guiding_save_path),
+            astrometry_files=astrometry_files,
+        )
+        if record is not None:
+            metrics.end_cycle(record, cameras=info["cameras"])
+            info["timing"] = {
+                name: round(seconds, 3)
+                for name, seconds in dict(record["stages"], total=record["total"]).items()
+            }
+
+        if any(isinstance(v, float) and math.isnan(v) for v in (fdx, fdy, fwhm)):
+            return self._generate_response(
+                "warning",
+                "Guiding completed with WARNING: no reliable guide stars detected.",
+                fdx=fdx,
+                fdy=fdy,
+                fwhm=fwhm,
+                **info,
+            )
+
+        try:
+            fwhm_val = float(fwhm)
+        except Exception:
+            fwhm_val = 0.0
+
+        return self._generate_response(
+            "success",
+            f"Offsets: fdx={fdx}, fdy={fdy}, FWHM={fwhm_val} arcsec",
+            fdx=fdx,
+            fdy=fdy,
+            fwhm=fwhm_val,
+            **info,
+        )
+
+    async def guiding_pipeline(
+        self,
+        ExpTime: float = 1.0,
+        ExpNum: int = 1,
+        SaveGrabRaw: bool = True,
+        ra: str = None,
+        dec: str = None,
+        *,
+        Binning: int = 4,
+        SaveAstro: bool = False,
+        interval: float = 0.0,
+        depth: int = 2,
+        max_cycles: Optional[int] = None,
+    ):
+        """
+        Continuous guiding as a staged pipeline (async generator of guiding responses).
+
+        Exposure N+1 is taken while exposure N is being solved and centroided. Every
+        camera's frame goes grab -> solve_frame -> measure_frame on its own, so the
+        correction of an exposure is ready when its slowest camera is done.
+        Responses are yielded in exposure order. Each carries "cycle" and
+        "exposure_start" (Unix time the exposure began), so the receiver can drop
+        corrections of exposures taken before it last moved the telescope.
+
+        Frames are handed between the stages in memory (GFAFrame). Raw (SaveGrabRaw,
+        without WCS) and solved (SaveAstro, with WCS) FITS files are written in the
+        background and are not read back.
+
+        Args:
+            Binning: Camera binning; also selects the calibration masters.
+            interval: Minimum seconds between the starts of two exposures.
+            depth: Maximum number of exposures in flight (acquired but not reported).
+            max_cycles: Stop after this many exposures (None: until cancelled).
+        """
+        save_root, dirs = self._get_save_root_and_dirs()
+        date_str = datetime.now().strftime("%Y-%m-%d")
+
+        guiding_save_path = (
+            save_root / dirs.get("guiding_save", "guiding_save") / date_str
+        )
+        guiding_save_path.mkdir(parents=True, exist_ok=True)
+
+        astro_save_path = None
+        if SaveAstro:
+            astro_save_path = save_root / dirs.get(
+                "final_astrometry_images", "astrometry"
+            )
+            astro_save_path.mkdir(parents=True, exist_ok=True)
+
+        self.env.logger.info(
+            f"[pipeline] guiding_save_path={guiding_save_path}, "
+            f"astro_save_path={astro_save_path}, interval={interval}, depth={depth}"
+        )
+
+        self._apply_clean_env_to_astrometry()
+        # usually already warm from loadtile; otherwise overlaps the first exposure
+        self.start_prewarm(ra, dec)
+
+        loop = asyncio.get_running_loop()
+        slots = asyncio.Semaphore(max(1, depth))
+        cycles: asyncio.Queue = asyncio.Queue()
+        in_flight: List["asyncio.Task"] = []
+        sinks: List["asyncio.Task"] = []
+
+        async def acquire():
+            cycle = 0
+            while max_cycles is None or cycle < max_cycles:
+                await slots.acquire()
+                cycle += 1
+                started = loop.time()
+                exposure_start = time.time()
+                # tasks created below report their stage timings to this record
+                record = metrics.start_cycle("guide", cycle=cycle)
+
+                grab_tasks = [
+                    asyncio.create_task(
+                        self._grab_camera(
+                            cam_id, ExpTime, ExpNum, ra=ra, dec=dec, Binning=Binning
+                        )
+                    )
+                    for cam_id in self.env.camera_ids
+                ]
+                camera_tasks = [
+                    asyncio.create_task(
+                        self._process_camera(
+                            grab_task,
+                            index,
+                            guiding_save_path,
+                            SaveGrabRaw,
+                            astro_save_path,
+                            sinks,
+                        )
+                    )
+                    for index, grab_task in enumerate(grab_tasks, start=1)
+                ]
+                finish = asyncio.create_task(
+                    self._finish_cycle(
+                        cycle, camera_tasks, guiding_save_path, record, exposure_start
+                    )
+                )
+                in_flight.extend(grab_tasks + camera_tasks + [finish])
+                await cycles.put(finish)
+
+                # The next exposure starts once every camera has read out this one
+                await asyncio.gather(*grab_tasks, return_exceptions=True)
+                in_flight[:] = [t for t in in_flight if not t.done()]
+                sinks[:] = [t for t in sinks if not t.done()]
+
+                remaining = interval - (loop.time() - started)
+                if remaining > 0:
+                    await asyncio.sleep(remaining)
+
+            await cycles.put(None)
+
+        await self.env.controller.open_all_cameras()
+        producer = asyncio.create_task(acquire())
+        try:
+            while True:
+                if producer.done() and cycles.empty():
+                    producer.result()  # re-raise what stopped the acquisition
+                    break
+
+                getter = asyncio.ensure_future(cycles.get())
+                await asyncio.wait(
+                    {getter, producer}, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not getter.done():
+                    getter.cancel()
+                    continue
+
+                finish = getter.result()
+                if finish is None:
+                    break
+                try:
+                    yield await finish
+                finally:
+                    slots.release()
+        finally:
+            producer.cancel()
+            for task in in_flight:
+                task.cancel()
+            await asyncio.gather(producer, *in_flight, return_exceptions=True)
+            # Let the FITS sinks finish: those files are the record of the run
+            await asyncio.gather(*sinks, return_exceptions=True)
+            try:
+                await self.env.controller.close_all_cameras()
+            except Exception as e:
+                self.env.logger.warning(f"close_all_cameras failed: {e}")
+
     async def pointing(
         self,
         ra: str,
@@ -571,7 +1185,7 @@ class GFAActions:
             self.env.logger.info(
                 "Ensuring astrometry outputs are ready (no procimg dependency)..."
             )
-            astro_files = self._ensure_astrometry_outputs_ready()
+            astro_files = await asyncio.to_thread(self._ensure_astrometry_outputs_ready)
             astro_files = list(astro_files) if astro_files else []
 
             self.env.logger.info(f"Astrometry inputs ready: {len(astro_files)} files.")
@@ -617,6 +1231,9 @@ class GFAActions:
     def status(self) -> Dict[str, Any]:
         try:
             status_info = self.env.controller.status()
+            timing = metrics.summary()
+            if timing["stages"]:
+                status_info["timing"] = timing
             return self._generate_response("success", status_info)
         except Exception as e:
             return self._generate_response("error", f"Status query failed: {e}")
@@ -13,21 +13,31 @@
 import os
 import sys
 import time
+import asyncio
 import json
 import glob
 import shutil
-import subprocess
 import logging
-from typing import Optional, List, Union, Tuple
+import threading
+from typing import Optional, List, Union, Tuple, Dict
 from pathlib import Path
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import numpy as np
+from scipy import ndimage
+from scipy.spatial import cKDTree
 from astropy.io import fits
+from astropy.wcs import WCS
 from astropy.table import Table, vstack
 from astropy.coordinates import SkyCoord
 import astropy.units as u
 
+from .gfa_frame import GFAFrame
+from .gfa_index import IndexWarmer, index_dirs_from_config
+from .gfa_metrics import metrics
+from .gfa_solution_cache import CachedSolution, SolutionCache
+from .gfa_solver import SolverPool
+
 DEFAULT_SOLVE_FIELD = "/home/yyoon/astrometry/bin/solve-field"
 
 
@@ -57,6 +67,56 @@ def _get_default_config_path() -> str:
     return default_path
 
 
+def _detect_sources(
+    data: np.ndarray, nsigma: float = 5.0, max_sources: int = 40
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Bright point sources of an image: (x, y, flux), 0-based pixels, brightest first.
+
+    Local maxima above median + nsigma * (MAD sigma), centroided over 5x5 pixels.
+    """
+    data = np.asarray(data, dtype=np.float32)
+    sample = data[::4, ::4]
+    bkg = float(np.median(sample))
+    sigma = 1.4826 * float(np.median(np.abs(sample - bkg)))
+    threshold = bkg + nsigma * max(sigma, 1e-6)
+
+    above = data > threshold
+    above[:2, :] = above[-2:, :] = False
+    above[:, :2] = above[:, -2:] = False
+    ys, xs = np.nonzero(above)
+
+    # local maxima: only the pixels above threshold need their 5x5 window
+    off = np.arange(-2, 3)
+    if ys.size > 100_000:
+        peak = data[ys, xs] == ndimage.maximum_filter(data, size=5)[ys, xs]
+    else:
+        win = data[ys[:, None, None] + off[None, :, None], xs[:, None, None] + off[None, None, :]]
+        peak = data[ys, xs] == win.max(axis=(1, 2))
+    ys, xs = ys[peak], xs[peak]
+    if ys.size == 0:
+        empty = np.empty(0)
+        return empty, empty, empty
+
+    order = np.argsort(data[ys, xs])[::-1][:max_sources]
+    ys, xs = ys[order], xs[order]
+
+    win = data[ys[:, None, None] + off[None, :, None], xs[:, None, None] + off[None, None, :]]
+    win = np.clip(win - bkg, 0.0, None)
+    flux = win.sum(axis=(1, 2))
+    x = xs + (win.sum(axis=1) * off).sum(axis=1) / flux
+    y = ys + (win.sum(axis=2) * off).sum(axis=1) / flux
+    order = np.argsort(flux)[::-1]
+    return x[order], y[order], flux[order]
+
+
+def _remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
 def _get_default_logger() -> logging.Logger:
     logger = logging.getLogger("gfa_astrometry_default")
     # ✅ 중복 핸들러 방지 + propagate 끄기(상위 로거 중복 출력 방지)
@@ -128,6 +188,16 @@ class GFAAstrometry:
 
         self._subprocess_env: Optional[dict] = None
 
+        # ✅ solve-field 프로세스 풀: 동시 실행 수 / job 당 hard timeout
+        #    (timeout 또는 호출측 cancel 시 프로세스 그룹을 kill)
+        cpu = self.inpar["settings"]["cpu"]
+        cpu_limit = int(cpu["limit"])
+        self.solver = SolverPool(
+            max_workers=int(cpu.get("workers") or min(cpu_limit, os.cpu_count() or 1)),
+            timeout=float(cpu.get("timeout") or cpu_limit + 30),
+            logger=self.logger,
+        )
+
         # ✅ solve-field path 캐시(바뀔 때만 로그)
         self._solve_field_path: Optional[str] = None
         self._solve_field_key: Optional[str] = None
@@ -136,6 +206,32 @@ class GFAAstrometry:
         # ✅ 세션 검증 tolerance(arcsec). 필요하면 config로 빼도 됨.
         self._session_radec_tol_arcsec = 30.0
 
+        # ✅ 카메라별 파이프라인(solve_frame)용: 카메라 토큰 -> 최신 corr / 최신 WCS, catalog 재생성 직렬화
+        self._camera_corr: Dict[str, str] = {}
+        self._camera_wcs: Dict[str, Tuple[Optional[Tuple[str, str]], fits.Header]] = {}
+        self._catalog_lock = threading.Lock()
+        # corr path -> (mtime, ra, dec) of its index stars, for refine_wcs()
+        self._corr_stars: Dict[str, Tuple[float, np.ndarray, np.ndarray]] = {}
+
+        # ✅ 디스크 solution cache: astroimg/tempfiles 삭제와 무관하게 run/재시작 간 재사용
+        cache_opt = self._cache_params()
+        self.solution_cache: Optional[SolutionCache] = None
+        if cache_opt["enabled"]:
+            self.solution_cache = SolutionCache(
+                self.save_root / dirs.get("solution_cache", "solution_cache"),
+                max_entries=int(cache_opt["max_entries"]),
+                max_bytes=int(float(cache_opt["max_mb"]) * 1024 * 1024),
+                tile_radius_arcsec=float(cache_opt["tile_radius_arcsec"]),
+                logger=self.logger,
+            )
+            self.logger.info(
+                f"  solution_cache    = {self.solution_cache.root} "
+                f"({len(self.solution_cache)} entries)"
+            )
+
+        # ✅ tile 주변 index 파일 preload (loadtile / guide 시작 시, 첫 사용 때 생성)
+        self._index_warmer: Optional[IndexWarmer] = None
+
     def set_subprocess_env(self, env: dict) -> None:
         self._subprocess_env = env
         # env가 바뀌었을 수 있으니 solve-field도 갱신(바뀌면만 로그)
@@ -307,7 +403,10 @@ class GFAAstrometry:
             )
 
         combined = vstack(tables, metadata_conflicts="silent")
-        combined.write(out_path, overwrite=True)
+        # 다른 카메라의 guider가 읽는 중일 수 있으므로 임시파일에 쓰고 교체
+        tmp_path = out_path + ".tmp"
+        combined.write(tmp_path, format="fits", overwrite=True)
+        os.replace(tmp_path, out_path)
 
         nrows = len(combined)
         if nrows < int(min_rows):
@@ -330,33 +429,24 @@ class GFAAstrometry:
     # ✅ solve-field 실행 (파일별 독립 작업폴더)
     # + astro FITS 헤더에 RA/DEC 기록(세션 검증용)
     # -------------------------------
-    def astrometry_raw(self, raw_fits_path: str) -> Tuple[float, float, str, str]:
-        env = self._get_subprocess_env()
+    def _solve_field_cmd(
+        self,
+        input_path: str,
+        work_dir: str,
+        outbase: str,
+        corr_path: str,
+        ra_in: str,
+        dec_in: str,
+    ) -> List[str]:
         solve_field_path = self._resolve_solve_field_path(log=False)
 
         scale_low, scale_high = self.inpar["astrometry"]["scale_range"]
         radius = self.inpar["astrometry"]["radius"]
         cpu_limit = self.inpar["settings"]["cpu"]["limit"]
 
-        raw_fits_path = os.path.abspath(raw_fits_path)
-        if not os.path.exists(raw_fits_path):
-            raise FileNotFoundError(f"Raw FITS not found: {raw_fits_path}")
-
-        ra_in, dec_in = self._read_radec_from_header(raw_fits_path)
-
-        base = os.path.basename(raw_fits_path)
-        stem = Path(base).stem
-
-        work_dir = os.path.join(self.temp_dir, stem)
-        os.makedirs(work_dir, exist_ok=True)
-
-        outbase = stem
-        corr_path = os.path.join(work_dir, f"{outbase}.corr")
-        new_path = os.path.join(work_dir, f"{outbase}.new")
-
         cmd = [
             solve_field_path,
-            raw_fits_path,
+            input_path,
             "-D",
             work_dir,
             "-o",
@@ -394,12 +484,235 @@ class GFAAstrometry:
             "--cpulimit",
             str(cpu_limit),
         ]
+        return cmd
+
+    # -------------------------------
+    # ✅ xylist 입력: 별 검출은 in-process, solve-field에는 X/Y/FLUX 표만 전달
+    #   (solve-field의 이미지 읽기 + image2xy 생략). 별이 부족하면 이미지 입력 유지.
+    # -------------------------------
+    def _xylist_params(self) -> dict:
+        params = {
+            "enabled": True,
+            "detect_sigma": 5.0,
+            "max_sources": 150,
+            "min_sources": 10,
+        }
+        params.update(self.inpar.get("astrometry", {}).get("xylist", {}))
+        return params
+
+    def write_xylist(self, data: np.ndarray, path: str) -> Optional[List[str]]:
+        """
+        Detect sources in `data` and write them as a solve-field xylist (X, Y, FLUX).
+
+        Returns the extra solve-field arguments for that input (--width/--height),
+        or None when xylist input is disabled or too few sources were found.
+        """
+        opt = self._xylist_params()
+        if not opt["enabled"]:
+            return None
+        x, y, flux = _detect_sources(
+            data, float(opt["detect_sigma"]), int(opt["max_sources"])
+        )
+        if len(x) < int(opt["min_sources"]):
+            return None
+
+        ny, nx = np.shape(data)
+        hdu = fits.BinTableHDU.from_columns(
+            [
+                # xylist pixel coordinates are 1-based (FITS convention)
+                fits.Column(name="X", format="D", array=x + 1.0),
+                fits.Column(name="Y", format="D", array=y + 1.0),
+                fits.Column(name="FLUX", format="D", array=flux),
+            ]
+        )
+        hdu.header["IMAGEW"] = nx
+        hdu.header["IMAGEH"] = ny
+        hdu.writeto(path, overwrite=True)
+        return ["--width", str(nx), "--height", str(ny)]
+
+    # -------------------------------
+    # ✅ astrometry.net index preload
+    #   - tile RA/DEC의 solve-field 탐색 반경을 덮는 index 파일만 page cache로 읽어둠
+    #   - 카메라별 solve-field 프로세스들이 같은 page를 공유 → cycle마다 disk read 없음
+    # -------------------------------
+    def _index_params(self) -> dict:
+        params = {"enabled": True, "dirs": [], "method": "read", "rewarm_s": 600.0}
+        params.update(self.inpar.get("astrometry", {}).get("index", {}))
+        return params
+
+    def _get_index_warmer(self) -> Optional[IndexWarmer]:
+        opt = self._index_params()
+        if not opt["enabled"]:
+            return None
+        if self._index_warmer is None:
+            dirs = list(opt["dirs"])
+            if not dirs:
+                # <prefix>/bin/solve-field -> <prefix>/etc/astrometry.cfg
+                prefix = os.path.dirname(os.path.dirname(self._resolve_solve_field_path()))
+                dirs = index_dirs_from_config(os.path.join(prefix, "etc", "astrometry.cfg"))
+            self._index_warmer = IndexWarmer(
+                dirs,
+                rewarm_s=float(opt["rewarm_s"]),
+                method=str(opt["method"]),
+                logger=self.logger,
+            )
+        return self._index_warmer
+
+    def prewarm_indexes(
+        self,
+        ra: Union[str, float],
+        dec: Union[str, float],
+        cancel: Optional[threading.Event] = None,
+    ) -> Optional[Dict[str, float]]:
+        """
+        Read the index files solve-field will search around (ra, dec) into the page
+        cache; setting `cancel` aborts the preload. Returns the IndexWarmer.warm()
+        summary, or None when disabled.
+        """
+        warmer = self._get_index_warmer()
+        if warmer is None:
+            return None
+        ra_deg, dec_deg = self._parse_radec_to_deg(ra, dec)
+        with metrics.stage("index_preload"):
+            return warmer.warm(
+                ra_deg, dec_deg, float(self.inpar["astrometry"]["radius"]), cancel=cancel
+            )
+
+    def stop_prewarm(self) -> None:
+        if self._index_warmer is not None:
+            self._index_warmer.stop()
+
+    # -------------------------------
+    # ✅ solution cache (카메라 serial, binning(=image shape), pointing, image hash)
+    #   - 같은 이미지: 저장된 WCS 그대로
+    #   - 같은 카메라/같은 tile: 저장된 WCS + .corr로 refine_wcs()
+    # -------------------------------
+    def _cache_params(self) -> dict:
+        params = {
+            "enabled": True,
+            "max_entries": 500,
+            "max_mb": 200,
+            "tile_radius_arcsec": 120.0,
+        }
+        params.update(self.inpar.get("astrometry", {}).get("cache", {}))
+        return params
+
+    @staticmethod
+    def _serial_from_name(stem: str) -> Optional[str]:
+        # {timestamp}_{serial}_exp{N}s / {timestamp}_{serial}_combined
+        parts = stem.split("_")
+        if len(parts) >= 4 and (parts[-1].startswith("exp") or parts[-1] == "combined"):
+            return "_".join(parts[2:-1])
+        return None
+
+    def _cache_lookup(
+        self, frame: GFAFrame, serial: Optional[str]
+    ) -> Tuple[Optional[fits.Header], Optional[str], Optional[str]]:
+        """
+        WCS for `frame` from the solution cache.
+
+        Returns (wcs_header, corr_path, source) with source "cache" (same image) or
+        "refine" (same camera and tile, refined to this frame), or Nones on a miss.
+        Sets frame.provenance["image_hash"] for the _cache_put() that follows a miss.
+        """
+        if self.solution_cache is None:
+            return None, None, None
+        try:
+            image_hash = SolutionCache.image_hash(frame.data)
+            frame.provenance["image_hash"] = image_hash
+            radec = self._parse_radec_to_deg(*frame.radec) if frame.radec else None
+            hit: Optional[CachedSolution] = self.solution_cache.lookup(
+                serial, frame.data.shape, radec, image_hash
+            )
+        except Exception as e:
+            self.logger.warning(f"[{frame.name}] Solution cache lookup failed: {e}")
+            return None, None, None
+        if hit is None:
+            return None, None, None
+
+        if hit.exact:
+            self.logger.info(f"[{frame.name}] WCS from solution cache (same image).")
+            return hit.wcs_header, hit.corr_path, "cache"
+
+        if not (self._refine_params()["enabled"] and hit.corr_path):
+            return None, None, None
+        try:
+            with metrics.stage("refine"):
+                refined = self.refine_wcs(frame, hit.wcs_header, hit.radec, hit.corr_path)
+        except Exception as e:
+            self.logger.warning(f"[{frame.name}] WCS refine from solution cache failed: {e}")
+            refined = None
+        if refined is None:
+            return None, None, None
+        self.logger.info(f"[{frame.name}] WCS from solution cache (same tile, refined).")
+        return refined, hit.corr_path, "refine"
+
+    def _cache_put(
+        self,
+        frame: GFAFrame,
+        serial: Optional[str],
+        wcs_header: fits.Header,
+        corr_path: Optional[str],
+    ) -> None:
+        if self.solution_cache is None:
+            return
+        try:
+            image_hash = frame.provenance.get("image_hash") or SolutionCache.image_hash(
+                frame.data
+            )
+            radec = self._parse_radec_to_deg(*frame.radec) if frame.radec else None
+            self.solution_cache.put(
+                serial, frame.data.shape, radec, image_hash, wcs_header, corr_path
+            )
+        except Exception as e:
+            self.logger.warning(f"[{frame.name}] Solution cache store failed: {e}")
+
+    def _solve_raw(
+        self,
+        raw_fits_path: str,
+        raw_data: np.ndarray,
+        raw_hdr: fits.Header,
+        stem: str,
+        work_dir: str,
+        corr_path: str,
+        ra_in: str,
+        dec_in: str,
+        env: dict,
+    ) -> None:
+        """solve-field for astrometry_raw(); leaves <stem>.new in work_dir or raises."""
+        outbase = stem
+        new_path = os.path.join(work_dir, f"{outbase}.new")
+        wcs_path = os.path.join(work_dir, f"{outbase}.wcs")
+        xyls_path = os.path.join(work_dir, f"{outbase}.xyls")
+
+        xy_args = self.write_xylist(raw_data, xyls_path)
+        if xy_args is not None:
+            cmd = self._solve_field_cmd(
+                xyls_path, work_dir, outbase, corr_path, ra_in, dec_in
+            ) + xy_args + ["--new-fits", "none"]
+        else:
+            cmd = self._solve_field_cmd(
+                raw_fits_path, work_dir, outbase, corr_path, ra_in, dec_in
+            )
 
         self.logger.info(f"[{stem}] Running command: {' '.join(cmd)}")
 
-        p = subprocess.run(cmd, capture_output=True, text=True, env=env)
+        p = self.solver.run_sync(cmd, env=env, label=stem)
+
+        if xy_args is not None:
+            _remove_quietly(xyls_path)
+            # xylist 입력이면 .new가 없으므로 raw data + .wcs 헤더로 직접 만든다
+            if os.path.exists(wcs_path):
+                hdr = raw_hdr.copy()
+                hdr.update(fits.getheader(wcs_path, ext=0))
+                fits.PrimaryHDU(data=raw_data, header=hdr).writeto(
+                    new_path, overwrite=True
+                )
 
-        self.logger.info(f"[{stem}] solve-field returncode={p.returncode}")
+        self.logger.info(
+            f"[{stem}] solve-field returncode={p.returncode} "
+            f"(queued {p.wait:.2f}s, ran {p.elapsed:.2f}s)"
+        )
         if p.stdout:
             self.logger.debug(f"[{stem}] solve-field stdout:\n{p.stdout}")
         if p.stderr:
@@ -426,6 +739,55 @@ class GFAAstrometry:
                 f"Continuing. returncode={p.returncode}"
             )
 
+    def astrometry_raw(self, raw_fits_path: str) -> Tuple[float, float, str, str]:
+        env = self._get_subprocess_env()
+
+        raw_fits_path = os.path.abspath(raw_fits_path)
+        if not os.path.exists(raw_fits_path):
+            raise FileNotFoundError(f"Raw FITS not found: {raw_fits_path}")
+
+        ra_in, dec_in = self._read_radec_from_header(raw_fits_path)
+
+        base = os.path.basename(raw_fits_path)
+        stem = Path(base).stem
+
+        work_dir = os.path.join(self.temp_dir, stem)
+        os.makedirs(work_dir, exist_ok=True)
+
+        outbase = stem
+        corr_path = os.path.join(work_dir, f"{outbase}.corr")
+        new_path = os.path.join(work_dir, f"{outbase}.new")
+
+        wcs_path = os.path.join(work_dir, f"{outbase}.wcs")
+
+        # ✅ solution cache hit이면 solve-field 없이 raw data + cache WCS로 .new 생성
+        raw_data, raw_hdr = fits.getdata(raw_fits_path, ext=0, header=True)
+        raw_frame = GFAFrame(data=raw_data, header=raw_hdr, provenance={"name": stem})
+        serial = self._serial_from_name(stem)
+
+        cached_hdr, cached_corr, _ = self._cache_lookup(raw_frame, serial)
+        if cached_hdr is not None:
+            hdr = raw_hdr.copy()
+            hdr.update(cached_hdr)
+            fits.PrimaryHDU(data=raw_data, header=hdr).writeto(new_path, overwrite=True)
+            corr_path = cached_corr or corr_path
+        else:
+            self._solve_raw(
+                raw_fits_path,
+                raw_data,
+                raw_hdr,
+                stem,
+                work_dir,
+                corr_path,
+                ra_in,
+                dec_in,
+                env,
+            )
+            if os.path.exists(wcs_path):
+                self._cache_put(
+                    raw_frame, serial, fits.getheader(wcs_path, ext=0), corr_path
+                )
+
         try:
             listing = sorted(os.listdir(work_dir))
         except Exception:
@@ -477,6 +839,387 @@ class GFAAstrometry:
         self.logger.info(f"[{stem}] Astrometry done. CRVAL1={crval1}, CRVAL2={crval2}")
         return crval1, crval2, out_fits_path, corr_path
 
+    # -------------------------------
+    # ✅ 카메라 1대 단위 astrometry (guiding pipeline용)
+    #   - 같은 카메라의 이전 solve가 있고 세션 RA/DEC가 맞으면 재사용
+    #   - 아니면 그 카메라 frame만 solve-field 후 combined_star.fits 갱신
+    #   - frame은 메모리로 전달(gfa_frame.GFAFrame), astro_*.fits는 만들지 않음
+    # -------------------------------
+    def _same_session(self, radec_a, radec_b) -> bool:
+        # RA/DEC를 모르면 기존 로직처럼 보수적으로 재사용
+        if radec_a is None or radec_b is None:
+            return True
+        try:
+            sep_arcsec = self._angular_sep_arcsec(
+                radec_a[0], radec_a[1], radec_b[0], radec_b[1]
+            )
+        except Exception:
+            return True
+        if sep_arcsec > float(self._session_radec_tol_arcsec):
+            self.logger.info(
+                f"session RA/DEC mismatch (sep={sep_arcsec:.2f} arcsec) → re-running astrometry."
+            )
+            return False
+        return True
+
+    def _update_star_catalog(self, cam_token: str, corr_path: Optional[str]) -> None:
+        with self._catalog_lock:
+            if corr_path and os.path.exists(corr_path):
+                self._camera_corr[str(cam_token)] = corr_path
+            try:
+                self.build_combined_star_from_corr(
+                    corr_files=sorted(self._camera_corr.values())
+                )
+            except Exception as e:
+                self.logger.warning(f"Star catalog build skipped/failed: {e}")
+
+    def _frame_solve_job(self, frame: GFAFrame) -> dict:
+        radec = frame.radec
+        if radec is None:
+            raise KeyError(f"RA/DEC header missing in frame: {frame.name}")
+        ra_in, dec_in = radec
+
+        stem = frame.name
+        work_dir = os.path.join(self.temp_dir, stem)
+        os.makedirs(work_dir, exist_ok=True)
+
+        job = dict(
+            stem=stem,
+            work_dir=work_dir,
+            input_path=os.path.join(work_dir, f"{stem}.xyls"),
+            corr_path=os.path.join(work_dir, f"{stem}.corr"),
+            wcs_path=os.path.join(work_dir, f"{stem}.wcs"),
+        )
+        extra = self.write_xylist(frame.data, job["input_path"])
+        if extra is None:
+            job["input_path"] = os.path.join(work_dir, f"{stem}.fits")
+            frame.write(job["input_path"], with_wcs=False)
+            extra = []
+        job["cmd"] = self._solve_field_cmd(
+            job["input_path"], work_dir, stem, job["corr_path"], ra_in, dec_in
+        ) + extra + ["--new-fits", "none"]
+
+        self.logger.info(f"[{stem}] Running command: {' '.join(job['cmd'])}")
+        return job
+
+    def _frame_solve_result(self, job: dict, p) -> Tuple[fits.Header, str]:
+        stem = job["stem"]
+        self.logger.info(
+            f"[{stem}] solve-field returncode={p.returncode} "
+            f"(queued {p.wait:.2f}s, ran {p.elapsed:.2f}s)"
+        )
+        if p.stderr:
+            self.logger.debug(f"[{stem}] solve-field stderr:\n{p.stderr}")
+
+        if not os.path.exists(job["wcs_path"]):
+            raise RuntimeError(
+                f"[{stem}] solve-field FAILED: .wcs file not created.\n"
+                f"  work_dir={job['work_dir']}\n"
+                f"  returncode={p.returncode}\n"
+                f"  stderr(tail)=\n{(p.stderr or '')[-2000:]}"
+            )
+
+        wcs_header = fits.getheader(job["wcs_path"], ext=0)
+        self.logger.info(
+            f"[{stem}] Astrometry done. CRVAL1={wcs_header.get('CRVAL1')}, "
+            f"CRVAL2={wcs_header.get('CRVAL2')}"
+        )
+        return wcs_header, job["corr_path"]
+
+    def astrometry_frame(self, frame: GFAFrame) -> Tuple[fits.Header, str]:
+        """
+        solve-field on an in-memory frame. Returns (wcs_header, corr_path).
+
+        Only the solve-field input is written (and removed afterwards): an xylist of
+        the sources detected here, or the image when too few were found. The
+        solution is read from the small .wcs file, so no .new / astro_*.fits is
+        produced.
+        """
+        job = self._frame_solve_job(frame)
+        try:
+            p = self.solver.run_sync(
+                job["cmd"], env=self._get_subprocess_env(), label=job["stem"]
+            )
+        finally:
+            _remove_quietly(job["input_path"])
+        return self._frame_solve_result(job, p)
+
+    async def astrometry_frame_async(self, frame: GFAFrame) -> Tuple[fits.Header, str]:
+        """astrometry_frame() for the event loop; cancelling it kills solve-field."""
+        job = await asyncio.to_thread(self._frame_solve_job, frame)
+        try:
+            p = await self.solver.run(
+                job["cmd"], env=self._get_subprocess_env(), label=job["stem"]
+            )
+        finally:
+            _remove_quietly(job["input_path"])
+        return await asyncio.to_thread(self._frame_solve_result, job, p)
+
+    # -------------------------------
+    # ✅ 증분 WCS refine (solve-field 없이)
+    #   - 이전 WCS를 pointing 변화만큼 옮긴 뒤, 검출한 별을 그 카메라의 .corr
+    #     index 별과 KD-tree로 매칭해서 affine 보정(CD, CRVAL)을 fit
+    #   - residual이 크거나 매칭이 부족하면 None → solve-field로 fallback
+    # -------------------------------
+    def _refine_params(self) -> dict:
+        params = {
+            "enabled": True,
+            "detect_sigma": 5.0,
+            "max_sources": 40,
+            "search_radius_pix": 80.0,
+            "match_radius_pix": 3.0,
+            "min_matches": 6,
+            "max_rms_arcsec": 1.0,
+        }
+        params.update(self.inpar.get("astrometry", {}).get("refine", {}))
+        return params
+
+    def _load_corr_stars(self, corr_path: str) -> Tuple[np.ndarray, np.ndarray]:
+        mtime = os.path.getmtime(corr_path)
+        cached = self._corr_stars.get(corr_path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1], cached[2]
+
+        fields = self.inpar.get("catalog_matching", {}).get("fields", {})
+        with fits.open(corr_path, memmap=False) as hdul:
+            data = hdul[1].data
+            ra = np.array(data[fields.get("ra_column", "index_ra")], dtype=float)
+            dec = np.array(data[fields.get("dec_column", "index_dec")], dtype=float)
+        self._corr_stars[corr_path] = (mtime, ra, dec)
+        return ra, dec
+
+    @staticmethod
+    def _fit_affine(src: np.ndarray, dst: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Least squares dst ~ src @ A.T + t with one 3-sigma rejection pass."""
+        keep = np.ones(len(src), dtype=bool)
+        for _ in range(2):
+            design = np.column_stack([src[keep], np.ones(int(keep.sum()))])
+            coef, *_ = np.linalg.lstsq(design, dst[keep], rcond=None)
+            resid = np.hypot(*(np.column_stack([src, np.ones(len(src))]) @ coef - dst).T)
+            rms = np.sqrt(np.mean(resid[keep] ** 2))
+            new_keep = resid <= max(3.0 * rms, 0.5)
+            if new_keep.sum() < 3 or np.array_equal(new_keep, keep):
+                break
+            keep = new_keep
+        return coef[:2].T, coef[2]
+
+    def refine_wcs(
+        self,
+        frame: GFAFrame,
+        wcs_header: fits.Header,
+        ref_radec: Optional[Tuple[str, str]],
+        corr_path: str,
+    ) -> Optional[fits.Header]:
+        """
+        Update a previous solution of the same camera to `frame` without solve-field.
+
+        wcs_header was solved at pointing `ref_radec`; corr_path is that solve's
+        .corr file. Returns the refined WCS header, or None when too few stars match
+        or the fit residual exceeds astrometry.refine.max_rms_arcsec.
+        """
+        opt = self._refine_params()
+        stem = frame.name
+
+        header = wcs_header.copy()
+        if frame.radec is not None and ref_radec is not None:
+            ra_new, dec_new = self._parse_radec_to_deg(*frame.radec)
+            ra_ref, dec_ref = self._parse_radec_to_deg(*ref_radec)
+            header["CRVAL1"] = float(header["CRVAL1"]) + (ra_new - ra_ref)
+            header["CRVAL2"] = float(header["CRVAL2"]) + (dec_new - dec_ref)
+
+        cat_ra, cat_dec = self._load_corr_stars(corr_path)
+        src_x, src_y, _ = _detect_sources(
+            frame.data, float(opt["detect_sigma"]), int(opt["max_sources"])
+        )
+        min_matches = int(opt["min_matches"])
+        if len(src_x) < min_matches or len(cat_ra) < min_matches:
+            self.logger.info(
+                f"[{stem}] WCS refine skipped: {len(src_x)} sources, {len(cat_ra)} catalog stars."
+            )
+            return None
+        src = np.column_stack([src_x, src_y])
+        ny, nx = frame.data.shape
+
+        search = float(opt["search_radius_pix"])
+        radius = float(opt["match_radius_pix"])
+        for iteration in range(2):
+            wcs = WCS(header)
+            cat = np.column_stack(wcs.all_world2pix(cat_ra, cat_dec, 0))
+            inside = (
+                (cat[:, 0] > -search) & (cat[:, 0] < nx + search)
+                & (cat[:, 1] > -search) & (cat[:, 1] < ny + search)
+            )
+            cat = cat[inside]
+            if len(cat) < min_matches:
+                self.logger.info(f"[{stem}] WCS refine: catalog does not overlap frame.")
+                return None
+
+            # offset vote over all source-catalog pairs (first pass only)
+            shift = np.zeros(2)
+            if iteration == 0:
+                diff = (cat[None, :, :] - src[:, None, :]).reshape(-1, 2)
+                diff = diff[np.all(np.abs(diff) < search, axis=1)]
+                if len(diff) == 0:
+                    return None
+                bins = np.arange(-search, search + radius, radius)
+                hist, xe, ye = np.histogram2d(diff[:, 0], diff[:, 1], bins=(bins, bins))
+                ix, iy = np.unravel_index(np.argmax(hist), hist.shape)
+                near = diff[
+                    (np.abs(diff[:, 0] - (xe[ix] + xe[ix + 1]) / 2) <= radius)
+                    & (np.abs(diff[:, 1] - (ye[iy] + ye[iy + 1]) / 2) <= radius)
+                ]
+                shift = near.mean(axis=0)
+
+            dist, idx = cKDTree(cat).query(src + shift, distance_upper_bound=radius)
+            matched = np.isfinite(dist)
+            if matched.sum() < min_matches:
+                self.logger.info(
+                    f"[{stem}] WCS refine: only {int(matched.sum())} matches (< {min_matches})."
+                )
+                return None
+
+            # pixel p of this frame sits where the current WCS puts A @ p + t
+            A, t = self._fit_affine(src[matched], cat[idx[matched]])
+            crpix = np.array([header["CRPIX1"], header["CRPIX2"]], dtype=float) - 1.0
+            crval = wcs.all_pix2world([A @ crpix + t], 0)[0]
+            cd = wcs.pixel_scale_matrix @ A
+            for key in ("CDELT1", "CDELT2", "PC1_1", "PC1_2", "PC2_1", "PC2_2"):
+                header.remove(key, ignore_missing=True)
+            header["CRVAL1"], header["CRVAL2"] = float(crval[0]), float(crval[1])
+            for i in range(2):
+                for j in range(2):
+                    header[f"CD{i + 1}_{j + 1}"] = float(cd[i, j])
+            src_m = src[matched]
+            ra_m = cat_ra[inside][idx[matched]]
+            dec_m = cat_dec[inside][idx[matched]]
+
+        # robust rms of the matched stars under the refined WCS
+        wcs = WCS(header)
+        pred = np.column_stack(wcs.all_world2pix(ra_m, dec_m, 0))
+        resid = np.hypot(*(pred - src_m).T)
+        scale = 3600.0 * np.sqrt(abs(np.linalg.det(wcs.pixel_scale_matrix)))
+        rms = float(np.sqrt(np.median(resid**2))) * scale
+        if rms > float(opt["max_rms_arcsec"]):
+            self.logger.info(
+                f"[{stem}] WCS refine rejected: rms={rms:.2f} arcsec "
+                f"> {opt['max_rms_arcsec']} ({len(src_m)} matches)."
+            )
+            return None
+
+        self.logger.info(
+            f"[{stem}] WCS refined: {len(src_m)} stars, rms={rms:.2f} arcsec, "
+            f"CRVAL1={header['CRVAL1']}, CRVAL2={header['CRVAL2']}"
+        )
+        return header
+
+    def _solve_from_cache(
+        self, frame: GFAFrame, cam_token: str, build_star_catalog: bool
+    ) -> bool:
+        """
+        Set the frame WCS from the camera's cached solution (reuse/refine) if possible.
+
+        Without a usable in-memory solution (first frame after a restart, or the star
+        catalog was wiped) the on-disk solution cache is consulted.
+        """
+        cached = self._camera_wcs.get(cam_token)
+        if cached is None or (
+            build_star_catalog and not os.path.exists(self.combined_star_path)
+        ):
+            return self._solve_from_store(frame, cam_token, build_star_catalog)
+
+        cached_radec, wcs_header = cached
+        if self._same_session(frame.radec, cached_radec):
+            frame.set_wcs(wcs_header, source="reuse")
+            return True
+
+        corr_path = self._camera_corr.get(cam_token)
+        if self._refine_params()["enabled"] and corr_path and os.path.exists(corr_path):
+            try:
+                with metrics.stage("refine"):
+                    refined = self.refine_wcs(frame, wcs_header, cached_radec, corr_path)
+            except Exception as e:
+                self.logger.warning(f"[{frame.name}] WCS refine failed: {e}")
+                refined = None
+            if refined is not None:
+                self._camera_wcs[cam_token] = (frame.radec, refined)
+                frame.set_wcs(refined, source="refine")
+                return True
+        return False
+
+    def _solve_from_store(
+        self, frame: GFAFrame, cam_token: str, build_star_catalog: bool
+    ) -> bool:
+        wcs_header, corr_path, source = self._cache_lookup(frame, cam_token)
+        if wcs_header is None:
+            return False
+        self._camera_wcs[cam_token] = (frame.radec, wcs_header)
+        frame.set_wcs(wcs_header, source=source)
+        if build_star_catalog:
+            self._update_star_catalog(cam_token, corr_path)
+        elif corr_path:
+            self._camera_corr[cam_token] = corr_path
+        return True
+
+    def _store_solution(
+        self,
+        frame: GFAFrame,
+        cam_token: str,
+        wcs_header: fits.Header,
+        corr_path: Optional[str],
+        build_star_catalog: bool,
+    ) -> None:
+        self._camera_wcs[cam_token] = (frame.radec, wcs_header)
+        frame.set_wcs(wcs_header, source="solve")
+        self._cache_put(frame, cam_token, wcs_header, corr_path)
+        if build_star_catalog:
+            self._update_star_catalog(cam_token, corr_path)
+
+    def solve_frame(
+        self, frame: GFAFrame, cam_token: str, build_star_catalog: bool = True
+    ) -> GFAFrame:
+        """
+        Attach a WCS to one camera's in-memory frame.
+
+        The last solution of each camera is kept in memory and reused while the
+        pointing stays within the session tolerance, so a guide cycle normally
+        does no astrometry disk I/O at all. When the pointing moved, the cached
+        solution is first refined against the camera's .corr stars (refine_wcs);
+        solve-field runs only if that fails. Solutions are also kept in the on-disk
+        solution cache, so a restart or a repeated run on the same tile starts from
+        there instead of solve-field.
+        """
+        cam_token = str(cam_token)
+        if self._solve_from_cache(frame, cam_token, build_star_catalog):
+            return frame
+
+        wcs_header, corr_path = self.astrometry_frame(frame)
+        self._store_solution(frame, cam_token, wcs_header, corr_path, build_star_catalog)
+        return frame
+
+    async def solve_frame_async(
+        self, frame: GFAFrame, cam_token: str, build_star_catalog: bool = True
+    ) -> GFAFrame:
+        """
+        solve_frame() for the guiding pipeline: solve-field runs in the solver
+        pool, so cancelling the guide task kills it instead of leaving it running.
+        """
+        cam_token = str(cam_token)
+        if await asyncio.to_thread(
+            self._solve_from_cache, frame, cam_token, build_star_catalog
+        ):
+            return frame
+
+        wcs_header, corr_path = await self.astrometry_frame_async(frame)
+        await asyncio.to_thread(
+            self._store_solution,
+            frame,
+            cam_token,
+            wcs_header,
+            corr_path,
+            build_star_catalog,
+        )
+        return frame
+
     def rm_tempfiles(self):
         self.logger.info("Removing temporary files.")
         try:
@@ -684,8 +1427,8 @@ class GFAAstrometry:
                     )
                     return [], []
 
-        cpu_limit = int(self.inpar["settings"]["cpu"]["limit"])
-        max_workers = max(1, min(cpu_limit, len(to_run)))
+        # solve-field concurrency is bounded by the solver pool
+        max_workers = max(1, min(self.solver.max_workers, len(to_run)))
 
         failed: List[str] = []
         results: List[Tuple[float, float, str, str]] = []
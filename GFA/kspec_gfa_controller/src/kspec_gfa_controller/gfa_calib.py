@@ -0,0 +1,269 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Filename: gfa_calib.py
+
+"""
+Per-camera calibration store (master bias, dark and bad-pixel mask).
+
+Masters are kept as .npy files, one directory per camera serial and binning:
+
+    <root>/<serial>/bin<b>/bias.npy          float32
+    <root>/<serial>/bin<b>/dark_<t>s.npy     float32, bias subtracted, exposure t
+    <root>/<serial>/bin<b>/badpix.npy        bool
+
+and are opened memory-mapped, so a lookup costs nothing until pixels are used.
+When a camera has masters, GFAImage applies them (CalibrationSet.apply) instead
+of the statistical hot pixel search.
+"""
+
+import logging
+import os
+import re
+import warnings
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+__all__ = ["CalibrationSet", "GFACalibration"]
+
+_DARK_RE = re.compile(r"^dark_(?P<exptime>[0-9.]+)s\.npy$")
+
+
+@dataclass
+class CalibrationSet:
+    """
+    Calibration frames of one camera/binning, scaled to one exposure time.
+
+    Attributes
+    ----------
+    bias : np.ndarray, optional
+        Master bias (ADU).
+    dark : np.ndarray, optional
+        Bias-subtracted master dark taken with `dark_exptime`.
+    badpix : np.ndarray, optional
+        True for pixels to replace by the median of their good neighbours.
+    """
+
+    bias: Optional[np.ndarray] = None
+    dark: Optional[np.ndarray] = None
+    dark_exptime: float = 0.0
+    exptime: float = 0.0
+    badpix: Optional[np.ndarray] = None
+    _repair: Optional[Tuple[np.ndarray, np.ndarray]] = field(
+        default=None, init=False, repr=False
+    )
+
+    @property
+    def label(self) -> str:
+        parts = [
+            name
+            for name, arr in (
+                ("bias", self.bias),
+                ("dark", self.dark),
+                ("badpix", self.badpix),
+            )
+            if arr is not None
+        ]
+        return "+".join(parts) or "none"
+
+    @property
+    def dark_scale(self) -> float:
+        if self.dark is None or self.dark_exptime <= 0:
+            return 0.0
+        return float(self.exptime) / float(self.dark_exptime)
+
+    def _repair_index(self, shape) -> Tuple[np.ndarray, np.ndarray]:
+        """Flat indices of bad pixels and of their 8 neighbours (-1: none/bad)."""
+        if self._repair is None:
+            ny, nx = shape
+            ys, xs = np.nonzero(self.badpix)
+            nb = np.full((ys.size, 8), -1, dtype=np.intp)
+            offsets = [(dy, dx) for dy in (-1, 0, 1) for dx in (-1, 0, 1) if dy or dx]
+            for j, (dy, dx) in enumerate(offsets):
+                y, x = ys + dy, xs + dx
+                ok = (y >= 0) & (y < ny) & (x >= 0) & (x < nx)
+                ok[ok] &= ~self.badpix[y[ok], x[ok]]
+                nb[ok, j] = y[ok] * nx + x[ok]
+            self._repair = (ys * nx + xs, nb)
+        return self._repair
+
+    def apply(self, frames: np.ndarray) -> np.ndarray:
+        """
+        Calibrate a 2D frame or (N, H, W) batch in one vectorized pass.
+
+        frame - bias - dark * (exptime / dark_exptime), then each bad pixel is
+        set to the median of its good neighbours. Returns float32.
+        """
+        out = np.array(frames, dtype=np.float32, copy=True)
+        if self.bias is not None:
+            out -= self.bias
+        if self.dark is not None:
+            out -= np.float32(self.dark_scale) * self.dark
+
+        if self.badpix is not None and self.badpix.any():
+            bad, nb = self._repair_index(out.shape[-2:])
+            flat = out.reshape(out.shape[:-2] + (-1,))
+            values = np.where(nb >= 0, flat[..., np.maximum(nb, 0)], np.nan)
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN rows
+                fill = np.nanmedian(values, axis=-1)
+            # a pixel with no good neighbour keeps its (bias/dark corrected) value
+            flat[..., bad] = np.where(np.isnan(fill), flat[..., bad], fill)
+        return out
+
+
+class GFACalibration:
+    """
+    Calibration library keyed by camera serial, binning and exposure time.
+
+    Parameters
+    ----------
+    root : str
+        Directory holding the <serial>/bin<b>/ master files.
+    logger : logging.Logger, optional
+    """
+
+    def __init__(self, root: str, logger: Optional[logging.Logger] = None) -> None:
+        self.root = str(root)
+        self.logger = logger or logging.getLogger(__name__)
+        # (serial, binning) -> {"bias", "badpix", "darks": {t: path}, "sets": {t: set}}
+        self._masters: Dict[Tuple[str, int], dict] = {}
+
+    def _dir(self, serial, binning: int) -> str:
+        return os.path.join(self.root, str(serial), f"bin{int(binning)}")
+
+    def _load(self, serial, binning: int) -> Optional[dict]:
+        key = (str(serial), int(binning))
+        if key in self._masters:
+            return self._masters[key]
+
+        directory = self._dir(serial, binning)
+        masters = None
+        if os.path.isdir(directory):
+            masters = {"bias": None, "badpix": None, "darks": {}, "sets": {}}
+            for name in os.listdir(directory):
+                path = os.path.join(directory, name)
+                if name == "bias.npy":
+                    masters["bias"] = np.load(path, mmap_mode="r")
+                elif name == "badpix.npy":
+                    masters["badpix"] = np.load(path, mmap_mode="r").astype(bool)
+                else:
+                    m = _DARK_RE.match(name)
+                    if m:
+                        masters["darks"][float(m.group("exptime"))] = path
+            self.logger.info(
+                f"Calibration for {key[0]} bin{key[1]}: "
+                f"bias={masters['bias'] is not None}, "
+                f"darks={sorted(masters['darks'])}, "
+                f"badpix={masters['badpix'] is not None}"
+            )
+        self._masters[key] = masters
+        return masters
+
+    def get(self, serial, binning: int, exptime: float) -> Optional[CalibrationSet]:
+        """
+        Calibration for one exposure, or None if the camera has no masters.
+
+        The dark with the closest exposure time is used and scaled linearly.
+        """
+        if serial is None:
+            return None
+        masters = self._load(serial, binning)
+        if masters is None:
+            return None
+        if float(exptime) in masters["sets"]:
+            return masters["sets"][float(exptime)]
+
+        dark, dark_exptime = None, 0.0
+        if masters["darks"]:
+            dark_exptime = min(masters["darks"], key=lambda t: abs(t - float(exptime)))
+            dark = np.load(masters["darks"][dark_exptime], mmap_mode="r")
+
+        calib = None
+        if any(a is not None for a in (masters["bias"], dark, masters["badpix"])):
+            calib = CalibrationSet(
+                bias=masters["bias"],
+                dark=dark,
+                dark_exptime=dark_exptime,
+                exptime=float(exptime),
+                badpix=masters["badpix"],
+            )
+        masters["sets"][float(exptime)] = calib
+        return calib
+
+    def invalidate(self, serial=None, binning: Optional[int] = None) -> None:
+        """Forget cached masters (all, or one serial / binning)."""
+        for key in list(self._masters):
+            if serial is not None and key[0] != str(serial):
+                continue
+            if binning is not None and key[1] != int(binning):
+                continue
+            del self._masters[key]
+
+    def _save(self, serial, binning: int, name: str, arr: np.ndarray) -> str:
+        directory = self._dir(serial, binning)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, name)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, arr)
+        os.replace(tmp, path)
+        return path
+
+    def build(
+        self,
+        serial,
+        binning: int,
+        bias_frames: Optional[Sequence[np.ndarray]] = None,
+        dark_frames: Optional[Sequence[np.ndarray]] = None,
+        dark_exptime: Optional[float] = None,
+        hot_sigma: float = 5.0,
+    ) -> Dict[str, str]:
+        """
+        Make and store master frames from raw bias and/or dark exposures.
+
+        Masters are per-pixel medians. The dark is stored bias subtracted (the
+        stored bias is used if no bias frames are given). Pixels whose dark
+        deviates by more than `hot_sigma` robust sigmas from the frame median
+        are written to the bad-pixel mask.
+
+        Returns
+        -------
+        dict
+            {"bias"|"dark"|"badpix": written path}
+        """
+        written = {}
+        bias = None
+        if bias_frames:
+            bias = np.median(np.asarray(bias_frames, dtype=np.float32), axis=0)
+            bias = bias.astype(np.float32)
+            written["bias"] = self._save(serial, binning, "bias.npy", bias)
+        else:
+            masters = self._load(serial, binning)
+            if masters is not None and masters["bias"] is not None:
+                bias = np.asarray(masters["bias"], dtype=np.float32)
+
+        if dark_frames:
+            if not dark_exptime or dark_exptime <= 0:
+                raise ValueError("dark_exptime must be > 0 for dark frames")
+            dark = np.median(np.asarray(dark_frames, dtype=np.float32), axis=0)
+            if bias is not None:
+                dark = dark - bias
+            dark = dark.astype(np.float32)
+            written["dark"] = self._save(
+                serial, binning, f"dark_{float(dark_exptime):g}s.npy", dark
+            )
+
+            med = np.median(dark)
+            sigma = 1.4826 * np.median(np.abs(dark - med))
+            badpix = np.abs(dark - med) > hot_sigma * max(float(sigma), 1e-6)
+            written["badpix"] = self._save(serial, binning, "badpix.npy", badpix)
+            self.logger.info(
+                f"Calibration for {serial} bin{binning}: "
+                f"{int(badpix.sum())} bad pixels ({hot_sigma} sigma)."
+            )
+
+        self.invalidate(serial, binning)
+        return written
@@ -6,12 +6,15 @@
 # @Filename: gfa_controller.py
 
 import asyncio
+import contextvars
 import json
 import os
+import threading
 import time
 import logging
 import sys
 import yaml
+import numpy as np
 import pypylon.pylon as py
 from pypylon import genicam
 from datetime import datetime, timezone
@@ -21,6 +24,7 @@ from pathlib import Path
 
 
 from .gfa_img import GFAImage
+from .gfa_metrics import metrics
 
 __all__ = ["GFAController"]
 
@@ -67,6 +71,42 @@ def from_config(config_path: str) -> dict:
     return data
 
 
+###############################################################################
+# Streaming frame ring
+###############################################################################
+class FrameRing:
+    """
+    Fixed ring of preallocated frame buffers for continuous acquisition.
+
+    Buffers are allocated on the first frame (shape/dtype depend on binning and
+    pixel format) and reused afterwards. A frame returned by `store()` stays
+    valid until `size` further frames have been stored.
+    """
+
+    def __init__(self, size: int):
+        if size < 1:
+            raise ValueError("FrameRing size must be >= 1")
+        self.size = size
+        self.buffers = None
+        self.count = 0
+
+    def store(self, frame) -> np.ndarray:
+        frame = np.asarray(frame)
+        if (
+            self.buffers is None
+            or self.buffers[0].shape != frame.shape
+            or self.buffers[0].dtype != frame.dtype
+        ):
+            self.buffers = [np.empty_like(frame) for _ in range(self.size)]
+        slot = self.buffers[self.count % self.size]
+        np.copyto(slot, frame)
+        self.count += 1
+        return slot
+
+
+_STREAM_END = object()
+
+
 ###############################################################################
 # Main Controller Class
 ###############################################################################
@@ -103,18 +143,104 @@ class GFAController:
         self.img_class = GFAImage(logger)
         self.open_cameras = {}
 
+        # Session mode keeps camera handles open across grabs (see start_session()).
+        self.session_active = False
+        self.health_check_interval = 10.0  # seconds between device reads per camera
+        self._last_health_check = {}
+
+        # Node values last written per camera handle: {id(cam): {node: value}}
+        self._applied_params = {}
+
+        # Continuous acquisition: ring size and per-camera counters
+        self.stream_ring_size = 8
+        self.stream_stats = {}
+
         # Async safety for shared dict updates
         self._open_cameras_lock = asyncio.Lock()
 
         self.logger.info("GFAController initialization complete.")
 
+    def _camera_healthy(self, cam_key: str, cam) -> bool:
+        """
+        Check an open camera handle. IsOpen()/IsCameraDeviceRemoved() are local;
+        a device node read (GigE round trip) is done at most every
+        `health_check_interval` seconds per camera.
+        """
+        try:
+            if not cam.IsOpen():
+                return False
+            is_removed = getattr(cam, "IsCameraDeviceRemoved", None)
+            if is_removed is not None and is_removed():
+                return False
+
+            now = time.monotonic()
+            if now - self._last_health_check.get(cam_key, 0.0) >= self.health_check_interval:
+                cam.DeviceSerialNumber.GetValue()
+                self._last_health_check[cam_key] = now
+            return True
+        except Exception as e:
+            self.logger.warning(f"{cam_key} health check failed: {e}")
+            return False
+
+    async def start_session(self):
+        """
+        Enter session mode: open all cameras and keep them open across grabs.
+
+        While the session is active, open_all_cameras() only re-opens cameras that
+        are missing or fail the health check, and close_all_cameras() keeps the
+        handles open. end_session() closes them.
+        """
+        self.session_active = True
+        self.logger.info("Camera session started.")
+        await self.open_all_cameras()
+
+    async def end_session(self):
+        """Leave session mode and close all cameras."""
+        self.session_active = False
+        self.logger.info("Camera session ended.")
+        await self.close_all_cameras(force=True)
+
+    async def _drop_camera(self, cam_key: str):
+        """Close and forget a camera handle so that the next open re-creates it."""
+        async with self._open_cameras_lock:
+            cam = self.open_cameras.pop(cam_key, None)
+        self._last_health_check.pop(cam_key, None)
+        if cam is None:
+            return
+        self.invalidate_params(cam)
+
+        def _blocking_close():
+            if cam.IsOpen():
+                cam.Close()
+
+        try:
+            await asyncio.to_thread(_blocking_close)
+        except Exception as e:
+            self.logger.warning(f"Failed to close stale handle of {cam_key}: {e}")
+
     async def open_all_cameras(self):
-        """Open all cameras once at startup (concurrently via asyncio)."""
+        """
+        Open all cameras (concurrently via asyncio).
+
+        Cameras that are already open are kept. In session mode they are health
+        checked first and re-opened if the check fails.
+        """
         self.logger.info("Opening all cameras...")
 
         async def _open_one(cam_key: str, cam_info: dict):
             ip = cam_info["IpAddress"]
 
+            cam = self.open_cameras.get(cam_key)
+            if cam is not None:
+                if not self.session_active:
+                    if cam.IsOpen():
+                        return
+                elif await asyncio.to_thread(self._camera_healthy, cam_key, cam):
+                    return
+                else:
+                    self.logger.warning(f"{cam_key} is not healthy. Re-opening...")
+                    await self._drop_camera(cam_key)
+
             def _blocking_open():
                 dev_info = py.DeviceInfo()
                 dev_info.SetIpAddress(ip)
@@ -122,7 +248,8 @@ class GFAController:
                 cam.Open()
                 return cam
 
-            cam = await asyncio.to_thread(_blocking_open)
+            with metrics.stage("open", camera=cam_key):
+                cam = await asyncio.to_thread(_blocking_open)
 
             async with self._open_cameras_lock:
                 self.open_cameras[cam_key] = cam
@@ -150,8 +277,16 @@ class GFAController:
 
         self.logger.info("All cameras opened successfully.")
 
-    async def close_all_cameras(self):
-        """Close all opened cameras (concurrently via asyncio)."""
+    async def close_all_cameras(self, force: bool = False):
+        """
+        Close all opened cameras (concurrently via asyncio).
+
+        While a session is active the cameras are kept open unless `force` is True.
+        """
+        if self.session_active and not force:
+            self.logger.debug("Camera session active; keeping cameras open.")
+            return
+
         self.logger.info("Closing all cameras...")
 
         async with self._open_cameras_lock:
@@ -175,6 +310,8 @@ class GFAController:
 
         async with self._open_cameras_lock:
             self.open_cameras.clear()
+        self._last_health_check.clear()
+        self.invalidate_params()
 
         self.logger.info("All cameras closed.")
 
@@ -201,6 +338,10 @@ class GFAController:
                 self.logger.info(f"{cam_key} is online and standby.")
             else:
                 self.logger.warning(f"{cam_key} is not open.")
+        if self.stream_stats:
+            status["stream"] = {
+                cam_key: dict(stats) for cam_key, stats in self.stream_stats.items()
+            }
         return status
 
     def cam_params(self, CamNum: int):
@@ -270,6 +411,50 @@ class GFAController:
 
         return params
 
+    async def apply_params(self, cam, params: List[tuple]):
+        """
+        Write GenICam node values that differ from the values last written to
+        this camera handle. All changed nodes are written in one executor call,
+        in the given order.
+
+        Parameters
+        ----------
+        cam : InstantCamera
+            Open camera handle.
+        params : list of (node_name, value)
+
+        Returns
+        -------
+        list
+            Names of the nodes that were written.
+        """
+        applied = self._applied_params.setdefault(id(cam), {})
+        changes = [(name, value) for name, value in params if applied.get(name) != value]
+        if not changes:
+            return []
+
+        def _blocking_write():
+            for name, value in changes:
+                getattr(cam, name).SetValue(value)
+
+        try:
+            with metrics.stage("params"):
+                await asyncio.get_running_loop().run_in_executor(None, _blocking_write)
+        except Exception:
+            # Device state is unknown after a partial write: write everything next time
+            self._applied_params.pop(id(cam), None)
+            raise
+
+        applied.update(changes)
+        return [name for name, _ in changes]
+
+    def invalidate_params(self, cam=None):
+        """Forget cached node values of one camera handle (or all), forcing a full write."""
+        if cam is None:
+            self._applied_params.clear()
+        else:
+            self._applied_params.pop(id(cam), None)
+
     async def configure_and_grab(
         self,
         cam,
@@ -289,27 +474,33 @@ class GFAController:
         """Configure camera and grab an image."""
         loop = asyncio.get_running_loop()
 
-        await loop.run_in_executor(
-            None, cam.GevSCPSPacketSize.SetValue, int(packet_size)
-        )
-        await loop.run_in_executor(None, cam.GevSCPD.SetValue, int(ipd))
-
         ftd_value = (
             int(ftd)
             if ftd is not None
             else int(ftd_base + cam_index * (packet_size + 18))
         )
-        await loop.run_in_executor(None, cam.GevSCFTD.SetValue, ftd_value)
-
         microsec = int(ExpTime * 1_000_000)
-        await loop.run_in_executor(None, cam.ExposureTime.SetValue, microsec)
-        await loop.run_in_executor(None, cam.PixelFormat.SetValue, "Mono12")
-        await loop.run_in_executor(None, cam.BinningHorizontal.SetValue, int(Binning))
-        await loop.run_in_executor(None, cam.BinningVertical.SetValue, int(Binning))
+
+        await self.apply_params(
+            cam,
+            [
+                ("GevSCPSPacketSize", int(packet_size)),
+                ("GevSCPD", int(ipd)),
+                ("GevSCFTD", ftd_value),
+                ("ExposureTime", microsec),
+                ("PixelFormat", "Mono12"),
+                ("BinningHorizontal", int(Binning)),
+                ("BinningVertical", int(Binning)),
+            ],
+        )
 
         try:
-            result = await loop.run_in_executor(None, cam.GrabOne, self.grab_timeout)
-            img = result.GetArray()
+            with metrics.stage("grab"):
+                result = await loop.run_in_executor(
+                    None, cam.GrabOne, self.grab_timeout
+                )
+            with metrics.stage("get_array"):
+                img = result.GetArray()
 
             now = datetime.now(timezone.utc)
             date_str = now.strftime("%Y%m%d")
@@ -338,6 +529,227 @@ class GFAController:
             )
             return None
 
+    async def stream_frames(
+        self,
+        cam,
+        ExpTime: float,
+        Binning: int,
+        num_frames: int,
+        packet_size: int,
+        ipd: int,
+        ftd_base: int,
+        cam_index: int = 0,
+        ftd: int = None,
+        cam_key: str = None,
+        ring_size: int = None,
+    ):
+        """
+        Continuous acquisition of `num_frames` frames as an async iterator.
+
+        The camera is configured once, then pylon `StartGrabbingMax` delivers
+        frames without a per-frame trigger. Frames are copied into a FrameRing
+        and yielded as views of its buffers: a frame must be used or copied
+        before `ring_size` further frames are read. If the consumer falls
+        that far behind, new frames are dropped and counted.
+
+        Counters in `stream_stats[cam_key]`:
+        frames, dropped (consumer too slow), skipped (reported by pylon),
+        failed (unsuccessful grab results), underruns (stream grabber ran out
+        of buffers), timeouts.
+
+        Raises
+        ------
+        genicam.TimeoutException
+            If no frame arrives within `grab_timeout`.
+        """
+        ring_size = ring_size or self.stream_ring_size
+        cam_key = cam_key or f"cam{cam_index}"
+        stats = self.stream_stats.setdefault(
+            cam_key,
+            {
+                "frames": 0,
+                "dropped": 0,
+                "skipped": 0,
+                "failed": 0,
+                "underruns": 0,
+                "timeouts": 0,
+            },
+        )
+
+        ftd_value = (
+            int(ftd)
+            if ftd is not None
+            else int(ftd_base + cam_index * (packet_size + 18))
+        )
+        with metrics.camera(cam_key):
+            await self.apply_params(
+                cam,
+                [
+                    ("GevSCPSPacketSize", int(packet_size)),
+                    ("GevSCPD", int(ipd)),
+                    ("GevSCFTD", ftd_value),
+                    ("ExposureTime", int(ExpTime * 1_000_000)),
+                    ("PixelFormat", "Mono12"),
+                    ("BinningHorizontal", int(Binning)),
+                    ("BinningVertical", int(Binning)),
+                    ("MaxNumBuffer", int(ring_size)),
+                ],
+            )
+
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        ring = FrameRing(ring_size)
+        stop = threading.Event()
+        in_use_lock = threading.Lock()
+        in_use = [0]  # frames handed to the consumer and not yet released
+
+        def _underrun_count():
+            try:
+                return int(cam.StreamGrabber.Statistic_Buffer_Underrun_Count.GetValue())
+            except Exception:
+                return 0
+
+        def _reader():
+            underruns_before = _underrun_count()
+            error = None
+            cam.StartGrabbingMax(int(num_frames), py.GrabStrategy_OneByOne)
+            try:
+                while cam.IsGrabbing() and not stop.is_set():
+                    with metrics.stage("grab", camera=cam_key):
+                        result = cam.RetrieveResult(
+                            self.grab_timeout, py.TimeoutHandling_ThrowException
+                        )
+                    try:
+                        if not result.GrabSucceeded():
+                            stats["failed"] += 1
+                            continue
+                        stats["skipped"] += int(result.GetNumberOfSkippedImages())
+                        with in_use_lock:
+                            if in_use[0] >= ring_size:
+                                stats["dropped"] += 1
+                                continue
+                            in_use[0] += 1
+                        with metrics.stage("get_array", camera=cam_key):
+                            frame = ring.store(result.GetArray())
+                        stats["frames"] += 1
+                        loop.call_soon_threadsafe(queue.put_nowait, frame)
+                    finally:
+                        result.Release()
+            except genicam.TimeoutException as e:
+                stats["timeouts"] += 1
+                error = e
+            except Exception as e:
+                error = e
+            finally:
+                cam.StopGrabbing()
+                stats["underruns"] += max(0, _underrun_count() - underruns_before)
+                loop.call_soon_threadsafe(queue.put_nowait, (_STREAM_END, error))
+
+        # the reader thread reports its timings to the caller's cycle
+        reader = loop.run_in_executor(None, contextvars.copy_context().run, _reader)
+        try:
+            while True:
+                item = await queue.get()
+                if isinstance(item, tuple) and item[0] is _STREAM_END:
+                    if item[1] is not None:
+                        raise item[1]
+                    break
+                yield item
+                with in_use_lock:
+                    in_use[0] -= 1
+        finally:
+            stop.set()
+            await reader
+
+    async def grab_stream(
+        self,
+        CamNum: int,
+        ExpTime: float,
+        Binning: int,
+        ExpNum: int,
+        packet_size: int = None,
+        ipd: int = None,
+        ftd_base: int = 39000,
+        ftd: int = None,
+        combiner=None,
+    ) -> dict:
+        """
+        Grab `ExpNum` frames from a single camera with continuous acquisition.
+
+        If `combiner` (a gfa_img.FrameCombiner) is given, each frame is added to
+        it while the next exposures are still being read, and "images" stays
+        empty; otherwise the frames are copied into "images".
+
+        Returns
+        -------
+        dict
+            {
+                "cam_num": CamNum,
+                "serial": serial number or None,
+                "images": list of numpy image arrays,
+                "nframes": number of frames delivered,
+                "timeout": bool,
+            }
+        """
+        key = f"Cam{CamNum}"
+        cam = self.open_cameras.get(key)
+        if cam is None:
+            self.logger.error(f"Camera {key} not opened.")
+            return {
+                "cam_num": CamNum,
+                "serial": None,
+                "images": [],
+                "nframes": 0,
+                "timeout": True,
+            }
+
+        if packet_size is None:
+            packet_size = self.get_camera_param(CamNum, "PacketSize")
+        if ipd is None:
+            ipd = self.get_camera_param(CamNum, "InterPacketDelay")
+
+        serial = None
+        images = []
+        nframes = 0
+        try:
+            serial = cam.DeviceSerialNumber.GetValue()
+            async for frame in self.stream_frames(
+                cam,
+                ExpTime,
+                Binning,
+                ExpNum,
+                packet_size=packet_size,
+                ipd=ipd,
+                ftd_base=ftd_base,
+                cam_index=(CamNum - 1),
+                ftd=ftd,
+                cam_key=key,
+            ):
+                if combiner is not None:
+                    await asyncio.to_thread(combiner.add, frame)
+                else:
+                    images.append(frame.copy())
+                nframes += 1
+        except genicam.TimeoutException:
+            self.logger.error(f"TimeoutException during streaming camera {CamNum}.")
+        except Exception as e:
+            self.logger.error(f"Error during streaming camera {CamNum}: {e}")
+            if self.session_active:
+                await self._drop_camera(key)
+
+        if nframes < ExpNum:
+            self.logger.warning(
+                f"{key} delivered {nframes}/{ExpNum} frames "
+                f"(stream stats: {self.stream_stats.get(key)})."
+            )
+        return {
+            "cam_num": CamNum,
+            "serial": serial,
+            "images": images,
+            "nframes": nframes,
+            "timeout": nframes < ExpNum,
+        }
+
     async def grabone(
         self,
         CamNum: int,
@@ -387,21 +799,22 @@ class GFAController:
         try:
             serial = cam.DeviceSerialNumber.GetValue()
 
-            img = await self.configure_and_grab(
-                cam,
-                ExpTime,
-                Binning,
-                packet_size=packet_size,
-                ipd=ipd,
-                ftd_base=ftd_base,
-                cam_index=(CamNum - 1),
-                output_dir=output_dir,
-                serial_hint=serial,
-                ftd=ftd,
-                ra=ra,
-                dec=dec,
-                save=save,
-            )
+            with metrics.camera(key):
+                img = await self.configure_and_grab(
+                    cam,
+                    ExpTime,
+                    Binning,
+                    packet_size=packet_size,
+                    ipd=ipd,
+                    ftd_base=ftd_base,
+                    cam_index=(CamNum - 1),
+                    output_dir=output_dir,
+                    serial_hint=serial,
+                    ftd=ftd,
+                    ra=ra,
+                    dec=dec,
+                    save=save,
+                )
 
             if img is None:
                 self.logger.error(f"Timeout detected after grabbing camera {CamNum}.")
@@ -423,6 +836,9 @@ class GFAController:
             self.logger.error(f"TimeoutException during grabbing camera {CamNum}.")
         except Exception as e:
             self.logger.error(f"Error during grabbing camera {CamNum}: {e}")
+            if self.session_active:
+                # Re-open the camera on the next open_all_cameras()
+                await self._drop_camera(key)
 
         return {
             "cam_num": CamNum,
@@ -563,3 +979,26 @@ class GFAController:
         except Exception as e:
             self.logger.error(f"Failed to open {key}: {e}")
             raise
+
+    def close_camera(self, CamNum: int):
+        """
+        Close a single camera by its number (e.g., 1–7).
+
+        Parameters
+        ----------
+        CamNum : int
+            The camera number to close (e.g., 1–7).
+        """
+        key = f"Cam{CamNum}"
+        cam = self.open_cameras.pop(key, None)
+        self._last_health_check.pop(key, None)
+        if cam is None:
+            return
+        self.invalidate_params(cam)
+
+        try:
+            if cam.IsOpen():
+                cam.Close()
+            self.logger.info(f"{key} closed.")
+        except Exception as e:
+            self.logger.error(f"Failed to close {key}: {e}")
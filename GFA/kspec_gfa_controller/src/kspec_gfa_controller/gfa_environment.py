@@ -10,7 +10,9 @@ import json
 from typing import List, Optional, Literal
 from pathlib import Path
 
+from .gfa_calib import GFACalibration
 from .gfa_controller import GFAController
+from .gfa_metrics import metrics
 from .gfa_logger import GFALogger
 from .gfa_astrometry import GFAAstrometry
 from .gfa_guider import GFAGuider
@@ -79,6 +81,10 @@ class GFAEnvironment:
         self.save_root.mkdir(parents=True, exist_ok=True)
 
         self.camera_ids = get_camera_ids(self.gfa_config_path, role)
+        # master bias/dark/bad-pixel frames per camera serial (see gfa_calib)
+        self.calibration = GFACalibration(self.save_root / "calib", self.logger)
+        # per-cycle stage timings, one JSON line per cycle (see gfa_metrics)
+        metrics.configure(self.save_root / "metrics" / "gfa_metrics.jsonl")
         self.logger.info(
             f"Initialized GFAEnvironment with role '{role}' and cameras {self.camera_ids}"
         )
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Filename: gfa_frame.py
+
+"""
+In-memory GFA frame passed between grab, astrometry and guider.
+
+A frame carries the (hot-pixel cleaned / combined) image, its FITS header, the
+astrometric solution once one is known, and where it came from. Writing it to
+FITS is optional (see GFAFrame.write); the guiding pipeline only needs disk for
+the solve-field input.
+"""
+
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+import numpy as np
+from astropy.io import fits
+from astropy.wcs import WCS
+
+from .gfa_metrics import metrics
+
+__all__ = ["GFAFrame"]
+
+
+@dataclass
+class GFAFrame:
+    """
+    Attributes
+    ----------
+    data : np.ndarray
+        2D float32 image.
+    header : fits.Header
+        Instrument header (RA/DEC, EXPTIME, NCOMB ...), as written by GFAImage.
+    provenance : dict
+        name (file stem), cam_num, serial and the stages the frame went through.
+    wcs_header : fits.Header, optional
+        Astrometric solution (CRVAL/CRPIX/CD/SIP) from solve-field, or a reused,
+        cached or refined earlier solve.
+    """
+
+    data: np.ndarray
+    header: fits.Header
+    provenance: Dict[str, Any] = field(default_factory=dict)
+    wcs_header: Optional[fits.Header] = None
+    wcs: Optional[WCS] = field(default=None, repr=False)
+
+    @property
+    def name(self) -> str:
+        return self.provenance.get("name", "frame")
+
+    @property
+    def radec(self) -> Optional[tuple]:
+        """Pointing (RA, DEC) from the header, or None if unknown."""
+        ra = self.header.get("RA")
+        dec = self.header.get("DEC")
+        if ra in (None, "UNKNOWN") or dec in (None, "UNKNOWN"):
+            return None
+        return str(ra), str(dec)
+
+    def set_wcs(self, wcs_header: fits.Header, source: str = "solve") -> None:
+        self.wcs_header = wcs_header
+        self.wcs = WCS(wcs_header)
+        self.provenance["wcs"] = source
+
+    def to_hdu(self, with_wcs: bool = True) -> fits.PrimaryHDU:
+        header = self.header.copy()
+        if with_wcs and self.wcs_header is not None:
+            header.update(self.wcs_header)
+        return fits.PrimaryHDU(data=self.data, header=header)
+
+    def write(self, path: str, with_wcs: bool = True, fsync: bool = False) -> str:
+        """
+        Write the frame as a FITS file (overwriting) and return the path.
+
+        With fsync=True the file is flushed to disk before returning.
+        """
+        directory = os.path.dirname(path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory, exist_ok=True)
+        hdu = self.to_hdu(with_wcs=with_wcs)
+        with metrics.stage("fits_write"):
+            if fsync:
+                with open(path, "wb") as f:
+                    hdu.writeto(f)
+                    f.flush()
+                    os.fsync(f.fileno())
+            else:
+                hdu.writeto(path, overwrite=True)
+        self.provenance.setdefault("files", []).append(path)
+        return path
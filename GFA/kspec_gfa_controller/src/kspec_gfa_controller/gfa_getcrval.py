@@ -13,6 +13,7 @@ from __future__ import annotations
 import os
 import json
 import glob
+import shlex
 import shutil
 import tempfile
 import subprocess
@@ -30,6 +31,7 @@ from astropy.io import fits
 # -----------------------------------------------------------------------------
 from .gfa_logger import GFALogger
 from .gfa_astrometry import _get_default_config_path  # config only (no logger)
+from .gfa_solver import SolverPool
 
 # GFALogger wrapper + the real logging.Logger underneath
 _gfa_logger = GFALogger(__file__)
@@ -190,25 +192,33 @@ def _run_solve_field(
     lg: logging.Logger,
     timeout: Optional[int] = None,
     env: Optional[dict] = None,
+    solver: Optional[SolverPool] = None,
 ) -> None:
     """
     Run solve-field with rich logging and good error reporting.
 
+    With a SolverPool the job runs in the pool (bounded concurrency, killed on
+    timeout or cancel_all()); otherwise as a plain shell subprocess.
+
     NOTE: stdout/stderr are logged at INFO so they also go to the GFALogger file.
     """
     lg.debug("Executing solve-field command:\n%s", cmd)
 
     t0 = time.perf_counter()
     try:
-        proc = subprocess.run(
-            cmd,
-            shell=True,
-            capture_output=True,
-            text=True,
-            check=False,
-            timeout=timeout,
-            env=env,
-        )
+        if solver is not None:
+            proc = solver.run_sync(shlex.split(cmd), env=env, timeout=timeout)
+            lg.info("solve-field queued %.3fs in solver pool", proc.wait)
+        else:
+            proc = subprocess.run(
+                cmd,
+                shell=True,
+                capture_output=True,
+                text=True,
+                check=False,
+                timeout=timeout,
+                env=env,
+            )
     except subprocess.TimeoutExpired as e:
         dt = time.perf_counter() - t0
         lg.error("solve-field TIMEOUT after %.3fs", dt)
@@ -283,6 +293,7 @@ def get_crval_from_image(
     keep_work_dir: bool = False,
     solve_field: Optional[Union[str, Path]] = None,
     subprocess_env: Optional[dict] = None,
+    solver: Optional[SolverPool] = None,
 ) -> Tuple[float, float]:
     """
     Given a FITS image (with RA/DEC in header), run solve-field and return (CRVAL1, CRVAL2).
@@ -382,7 +393,7 @@ def get_crval_from_image(
         lg.info("Running solve-field")
         lg.debug("Running command: %s", cmd)
 
-        _run_solve_field(cmd, lg, env=env)
+        _run_solve_field(cmd, lg, env=env, solver=solver)
 
         solved_path = _find_solved_new_file(image_path, work_dir, lg)
 
@@ -430,10 +441,12 @@ def get_crvals_from_images(
     keep_work_dir: bool = False,
     solve_field: Optional[Union[str, Path]] = None,
     subprocess_env: Optional[dict] = None,
+    solver: Optional[SolverPool] = None,
 ) -> Tuple[List[float], List[float]]:
     """
     여러 FITS 이미지에 대해 (CRVAL1, CRVAL2) 리스트를 반환.
     - 병렬 실행(ThreadPoolExecutor)
+    - solver(SolverPool)를 주면 solve-field 동시 실행 수/timeout/kill은 풀이 관리
     - 입력 순서 유지
     - 실패한 항목은 NaN으로 채움
     """
@@ -467,6 +480,7 @@ def get_crvals_from_images(
             keep_work_dir=keep_work_dir,
             solve_field=solve_field,
             subprocess_env=subprocess_env,
+            solver=solver,
         )
         img_lg.info("Done image %s/%s: CRVAL1=%s CRVAL2=%s", i + 1, n, c1, c2)
         return i, c1, c2
@@ -35,6 +35,8 @@ from astropy.utils.exceptions import AstropyWarning
 
 import photutils.detection as pd
 
+from .gfa_metrics import metrics
+
 
 ###############################################################################
 # Helper Functions
@@ -836,6 +838,158 @@ class GFAGuider:
             self.logger.error(f"Gaussian fitting failed: {exc}")
             return float("nan")
 
+    def measure_pair(
+        self,
+        astro_file: str,
+        raw_file: str,
+        file_counter: int,
+        cutoutn_stack: List[np.ndarray],
+    ) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        Guide star offsets of one camera frame stored as FITS files.
+
+        WCS comes from astro_file, centroids from raw_file. See measure_image().
+        """
+        self.logger.info(f"\n-- Processing pair #{file_counter}:")
+        self.logger.info(f"  astro(WCS): {astro_file}")
+        self.logger.info(f"  raw(img) : {raw_file}")
+
+        # 1) WCS는 astro_file에서
+        _, header, wcs_obj = self.load_image_and_wcs(astro_file)
+
+        # 2) centroid는 raw에서
+        raw_data_p = self.load_only_image(raw_file)
+
+        with metrics.stage("centroid"):
+            return self.measure_image(
+                raw_data_p,
+                wcs_obj,
+                header["CRVAL1"],
+                header["CRVAL2"],
+                os.path.basename(astro_file),
+                file_counter,
+                cutoutn_stack,
+            )
+
+    def measure_frame(
+        self, frame, file_counter: int, cutoutn_stack: List[np.ndarray]
+    ) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        Guide star offsets of an in-memory GFAFrame that already carries its WCS.
+        """
+        if frame.wcs is None:
+            raise ValueError(f"Frame {frame.name} has no WCS (solve it first).")
+
+        self.logger.info(f"\n-- Processing frame #{file_counter}: {frame.name}")
+        with metrics.stage("centroid"):
+            return self.measure_image(
+                frame.data,
+                frame.wcs,
+                frame.wcs_header["CRVAL1"],
+                frame.wcs_header["CRVAL2"],
+                frame.name,
+                file_counter,
+                cutoutn_stack,
+            )
+
+    def measure_image(
+        self,
+        raw_data_p: np.ndarray,
+        wcs_obj: WCS,
+        crval1: float,
+        crval2: float,
+        label: str,
+        file_counter: int,
+        cutoutn_stack: List[np.ndarray],
+    ) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        Guide star offsets of one raw image with its WCS (crval1/crval2: field centre, deg).
+
+        Returns (dxn, dyn, pindn), or None when the frame has no usable guide stars.
+        Cutouts of the brightest star are appended to cutoutn_stack (for cal_seeing).
+        """
+        self.logger.debug(f"  CRVAL1: {crval1:.6f}, CRVAL2: {crval2:.6f}")
+
+        # background 포함
+        image_data, stddev = self.background(raw_data_p)
+        self.logger.debug(f"  Raw background stddev: {stddev:.4f}")
+
+        # 3) catalog 로드 + 필드 주변 별 선택
+        ra1_rad, dec1_rad, ra2_rad, dec2_rad, ra_p, dec_p, flux = (
+            self.load_star_catalog(crval1, crval2)
+        )
+
+        ra_sel, dec_sel, flux_sel = self.select_stars(
+            ra1_rad, dec1_rad, ra2_rad, dec2_rad, ra_p, dec_p, flux
+        )
+
+        if len(ra_sel) == 0:
+            self.logger.warning("No catalog stars selected for this field (after cuts).")
+            return None
+
+        # 4) catalog RA/DEC -> pixel 예상 위치 (astro WCS로 투영)
+        dra, ddec, dra_f, ddec_f = self.radec_to_xy_stars(ra_sel, dec_sel, wcs_obj)
+
+        # 5) raw 이미지에서 peak/centroid 찾고 arcsec offset 계산
+        dx_vals, dy_vals, peak_vals, _ = self.cal_centroid_offset(
+            dra,
+            ddec,
+            dra_f,
+            ddec_f,
+            stddev,
+            wcs_obj,
+            flux_sel,
+            file_counter,
+            cutoutn_stack,
+            image_data,  # raw background-subtracted image
+        )
+
+        # 6) peak 조건으로 별 필터링
+        #    ✅ peak_select에서 예외 발생해도 해당 파일만 skip
+        try:
+            dxn, dyn, pindn = self.peak_select(dx_vals, dy_vals, peak_vals)
+        except Exception as e:
+            self.logger.warning(f"[skip] peak_select failed for {label}: {e}")
+            return None
+
+        # (혹시 soft-fail 형태로 빈 배열 리턴하는 구현이 섞여 있어도 안전)
+        if pindn is None or len(pindn) == 0:
+            self.logger.warning(
+                f"[skip] peak_select returned no valid peaks for {label}"
+            )
+            return None
+
+        return dxn, dyn, pindn
+
+    def combine_offsets(
+        self,
+        dxpp: List[np.ndarray],
+        dypp: List[np.ndarray],
+        pindpp: List[np.ndarray],
+        cutoutn_stack: List[np.ndarray],
+    ) -> Tuple[float, float, float]:
+        """
+        Final (fdx, fdy, fwhm) from the per-frame results of measure_pair().
+        Returns (nan, nan, nan) when no frame produced guide stars.
+        """
+        if not dxpp or not dypp or not pindpp:
+            self.logger.error("No valid guide star data collected. Calibration failed.")
+            return math.nan, math.nan, math.nan
+
+        dxp = np.concatenate(dxpp) if len(dxpp) else np.array([])
+        dyp = np.concatenate(dypp) if len(dypp) else np.array([])
+        pindp = np.concatenate(pindpp) if len(pindpp) else np.array([])
+
+        self.logger.info(f"Total valid guide star offsets: {len(dxp)}")
+
+        fdx, fdy = self.cal_final_offset(dxp, dyp, pindp)
+        self.logger.info(f"Computed final offset: ΔX = {fdx} arcsec, ΔY = {fdy} arcsec")
+
+        fwhm = self.cal_seeing(cutoutn_stack)
+        self.logger.info(f"Estimated FWHM from cutouts: {fwhm} arcsec")
+
+        return fdx, fdy, fwhm
+
     # gfa_guider.py (GFAGuider.exe_cal) - 수정본
     def exe_cal(self) -> Tuple[float, float, float]:
         """
@@ -891,79 +1045,14 @@ class GFAGuider:
                     continue
 
                 try:
-                    self.logger.info(f"\n-- Processing pair #{file_counter}:")
-                    self.logger.info(f"  astro(WCS): {astro_file}")
-                    self.logger.info(f"  raw(img) : {raw_file}")
-
-                    # 1) WCS는 astro_file에서
-                    _, header, wcs_obj = self.load_image_and_wcs(astro_file)
-                    crval1, crval2 = header["CRVAL1"], header["CRVAL2"]
-                    self.logger.debug(f"  CRVAL1: {crval1:.6f}, CRVAL2: {crval2:.6f}")
-
-                    # 2) centroid는 raw에서 (background 포함)
-                    raw_data_p = self.load_only_image(raw_file)
-                    image_data, stddev = self.background(raw_data_p)
-                    self.logger.debug(f"  Raw background stddev: {stddev:.4f}")
-
-                    # 3) catalog 로드 + 필드 주변 별 선택
-                    ra1_rad, dec1_rad, ra2_rad, dec2_rad, ra_p, dec_p, flux = (
-                        self.load_star_catalog(crval1, crval2)
-                    )
-
-                    ra_sel, dec_sel, flux_sel = self.select_stars(
-                        ra1_rad, dec1_rad, ra2_rad, dec2_rad, ra_p, dec_p, flux
+                    measured = self.measure_pair(
+                        astro_file, raw_file, file_counter, cutoutn_stack
                     )
-
-                    if len(ra_sel) == 0:
-                        self.logger.warning(
-                            "No catalog stars selected for this field (after cuts)."
-                        )
-                        file_counter += 1
-                        continue
-
-                    # 4) catalog RA/DEC -> pixel 예상 위치 (astro WCS로 투영)
-                    dra, ddec, dra_f, ddec_f = self.radec_to_xy_stars(
-                        ra_sel, dec_sel, wcs_obj
-                    )
-
-                    # 5) raw 이미지에서 peak/centroid 찾고 arcsec offset 계산
-                    dx_vals, dy_vals, peak_vals, cutoutn_stack = (
-                        self.cal_centroid_offset(
-                            dra,
-                            ddec,
-                            dra_f,
-                            ddec_f,
-                            stddev,
-                            wcs_obj,
-                            flux_sel,
-                            file_counter,
-                            cutoutn_stack,
-                            image_data,  # raw background-subtracted image
-                        )
-                    )
-
-                    # 6) peak 조건으로 별 필터링
-                    #    ✅ peak_select에서 예외 발생해도 해당 파일만 skip
-                    try:
-                        dxn, dyn, pindn = self.peak_select(dx_vals, dy_vals, peak_vals)
-                    except Exception as e:
-                        self.logger.warning(
-                            f"[skip] peak_select failed for {os.path.basename(astro_file)}: {e}"
-                        )
-                        file_counter += 1
-                        continue
-
-                    # (혹시 soft-fail 형태로 빈 배열 리턴하는 구현이 섞여 있어도 안전)
-                    if pindn is None or len(pindn) == 0:
-                        self.logger.warning(
-                            f"[skip] peak_select returned no valid peaks for {os.path.basename(astro_file)}"
-                        )
-                        file_counter += 1
-                        continue
-
-                    dxpp.append(dxn)
-                    dypp.append(dyn)
-                    pindpp.append(pindn)
+                    if measured is not None:
+                        dxn, dyn, pindn = measured
+                        dxpp.append(dxn)
+                        dypp.append(dyn)
+                        pindpp.append(pindn)
 
                     file_counter += 1
 
@@ -993,19 +1082,7 @@ class GFAGuider:
                 )
                 return math.nan, math.nan, math.nan
 
-            dxp = np.concatenate(dxpp) if len(dxpp) else np.array([])
-            dyp = np.concatenate(dypp) if len(dypp) else np.array([])
-            pindp = np.concatenate(pindpp) if len(pindpp) else np.array([])
-
-            self.logger.info(f"Total valid guide star offsets: {len(dxp)}")
-
-            fdx, fdy = self.cal_final_offset(dxp, dyp, pindp)
-            self.logger.info(
-                f"Computed final offset: ΔX = {fdx} arcsec, ΔY = {fdy} arcsec"
-            )
-
-            fwhm = self.cal_seeing(cutoutn_stack)
-            self.logger.info(f"Estimated FWHM from cutouts: {fwhm} arcsec")
+            fdx, fdy, fwhm = self.combine_offsets(dxpp, dypp, pindpp, cutoutn_stack)
 
             self.logger.info(
                 "========== Guide star calibration completed successfully =========="
@@ -18,9 +18,236 @@ from PIL import Image
 from scipy.ndimage import maximum_filter, median_filter
 
 from collections import defaultdict
-from astropy.stats import sigma_clip
 
-__all__ = ["GFAImage"]
+from .gfa_frame import GFAFrame
+from .gfa_metrics import metrics
+
+__all__ = ["FrameCombiner", "GFAImage"]
+
+# scipy.ndimage boundary mode -> np.pad mode
+_PAD_MODES = {
+    "mirror": "reflect",
+    "reflect": "symmetric",
+    "nearest": "edge",
+    "wrap": "wrap",
+    "constant": "constant",
+}
+
+# Compare-exchange pairs of the 19-comparator sorting network for 8 inputs,
+# pruned to the 17 that decide wire 4. Wire 4 is the 5th smallest value, which is
+# what median_filter returns for the 8-pixel ring (rank = size // 2).
+# fmt: off
+_RING_MEDIAN_NETWORK = (
+    (0, 2), (1, 3), (4, 6), (5, 7),
+    (0, 4), (1, 5), (2, 6), (3, 7),
+    (0, 1), (2, 3), (4, 5), (6, 7),
+    (2, 4), (3, 5), (1, 4), (3, 6),
+    (3, 4),
+)
+# fmt: on
+
+
+def _ring_median(work: np.ndarray, mode: str = "mirror") -> np.ndarray:
+    """
+    Median of the 8 neighbours of every pixel (centre excluded).
+
+    Same result as median_filter(work, footprint=ring, mode=mode), computed with
+    a fixed sorting network over the 8 shifted views of the padded image, so the
+    cost is a few whole-array min/max operations. work may be a single frame
+    (H, W) or a batch of frames (N, H, W); neighbours are taken per frame.
+    """
+    pad_mode = _PAD_MODES.get(mode)
+    if pad_mode is None:
+        footprint = np.array([[1, 1, 1], [1, 0, 1], [1, 1, 1]], dtype=np.uint8)
+        footprint = footprint.reshape((1,) * (work.ndim - 2) + footprint.shape)
+        return median_filter(work, footprint=footprint, mode=mode)
+
+    pad = [(0, 0)] * (work.ndim - 2) + [(1, 1), (1, 1)]
+    padded = np.pad(work, pad, mode=pad_mode)
+    ny, nx = work.shape[-2:]
+    v = [
+        padded[..., dy : dy + ny, dx : dx + nx]
+        for dy in range(3)
+        for dx in range(3)
+        if (dy, dx) != (1, 1)
+    ]
+
+    for a, b in _RING_MEDIAN_NETWORK:
+        lo = np.minimum(v[a], v[b])
+        v[b] = np.maximum(v[a], v[b])
+        v[a] = lo
+
+    return v[4]
+
+
+class FrameCombiner:
+    """
+    Incremental sigma-clipped mean of a sequence of frames.
+
+    Frames are copied into a preallocated chunk of `chunk_size` float32 buffers.
+    When the chunk is full it is sigma-clipped along the frame axis (median
+    centre, std spread, like astropy sigma_clip) and reduced into a running
+    per-pixel sum and count, so memory does not grow with the number of frames.
+
+    With at most `chunk_size` frames the result equals
+    ``np.ma.mean(sigma_clip(stack, sigma, maxiters, axis=0), axis=0)``; beyond
+    that, outliers are rejected within each chunk.
+
+    Parameters
+    ----------
+    sigma : float
+        Clipping threshold in standard deviations.
+    maxiters : int
+        Maximum clipping iterations per chunk.
+    chunk_size : int
+        Number of frames held in memory at once. Keep it above 10: with fewer
+        samples a single outlier can never deviate by more than 3 sigma.
+    preprocess : callable, optional
+        Applied in place to each (n, H, W) chunk before clipping
+        (e.g. batch hot pixel removal).
+    """
+
+    def __init__(
+        self,
+        sigma: float = 3.0,
+        maxiters: int = 5,
+        chunk_size: int = 16,
+        preprocess=None,
+    ) -> None:
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be >= 1")
+        self.sigma = float(sigma)
+        self.maxiters = int(maxiters)
+        self.chunk_size = int(chunk_size)
+        self.preprocess = preprocess
+        self.cleaning = "NONE" if preprocess is None else "CUSTOM"
+        self.count = 0
+        self._chunk = None
+        self._filled = 0
+        self._sum = None
+        self._npix = None
+
+    @property
+    def shape(self) -> Optional[tuple]:
+        return None if self._chunk is None else self._chunk.shape[1:]
+
+    def add(self, frame) -> None:
+        """Copy one 2D frame into the current chunk (clipping it when full)."""
+        frame = np.asarray(frame)
+        if frame.ndim != 2:
+            raise ValueError(f"frame must be 2D. Got shape={frame.shape}")
+        if self._chunk is None:
+            self._chunk = np.empty((self.chunk_size,) + frame.shape, dtype=np.float32)
+            self._sum = np.zeros(frame.shape, dtype=np.float64)
+            self._npix = np.zeros(frame.shape, dtype=np.int32)
+        elif frame.shape != self.shape:
+            raise ValueError(f"Image size mismatch: {[self.shape, frame.shape]}")
+
+        np.copyto(self._chunk[self._filled], frame, casting="unsafe")
+        self._filled += 1
+        self.count += 1
+        if self._filled == self.chunk_size:
+            self._flush()
+
+    def extend(self, frames) -> None:
+        for frame in frames:
+            self.add(frame)
+
+    def _flush(self) -> None:
+        if self._filled == 0:
+            return
+        chunk = self._chunk[: self._filled]
+        if self.preprocess is not None:
+            with metrics.stage("hot_pixel"):
+                chunk[...] = self.preprocess(chunk)
+        with metrics.stage("combine"):
+            total, kept = self._clip(chunk)
+            self._sum += total
+            self._npix += kept
+        self._filled = 0
+
+    def _clip(self, chunk: np.ndarray):
+        """
+        Sigma-clip chunk along axis 0; return per-pixel (sum, count) of kept values.
+
+        Rejected values are always the lowest or highest ones, so after a single
+        sort the kept values of a pixel are chunk[start:end] and an iteration
+        only moves those bounds. A pixel whose bounds did not move has
+        converged, so later iterations only revisit the pixels that changed.
+        """
+        n = chunk.shape[0]
+        flat = chunk.reshape(n, -1)
+        flat.sort(axis=0)
+        total = flat.sum(axis=0, dtype=np.float64)
+        start = np.zeros(flat.shape[1], dtype=np.intp)
+        end = np.full(flat.shape[1], n, dtype=np.intp)
+        if n < 2:
+            return total.reshape(chunk.shape[1:]), end.astype(np.int32).reshape(
+                chunk.shape[1:]
+            )
+
+        k = np.arange(n)[:, None]
+        active = None  # all pixels
+        for _ in range(max(1, self.maxiters)):
+            if active is None:
+                sub, st, en = flat, start, end
+            else:
+                sub, st, en = flat[:, active], start[active], end[active]
+
+            if active is None:
+                # nothing rejected yet: plain statistics on the sorted chunk
+                mean = total / n
+                dev = sub - mean
+                std = np.sqrt(np.einsum("ij,ij->j", dev, dev) / n)
+                center = 0.5 * (
+                    sub[(n - 1) // 2].astype(np.float64) + sub[n // 2]
+                )
+            else:
+                keep = (k >= st) & (k < en)
+                count = en - st
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    mean = np.where(keep, sub, 0.0).sum(axis=0) / count
+                    dev = np.where(keep, sub - mean, 0.0)
+                    std = np.sqrt(np.einsum("ij,ij->j", dev, dev) / count)
+                lo = st + np.maximum(count - 1, 0) // 2
+                hi = st + count // 2
+                center = 0.5 * (
+                    np.take_along_axis(sub, lo[None], axis=0)[0].astype(np.float64)
+                    + np.take_along_axis(sub, hi[None], axis=0)[0]
+                )
+            del dev
+
+            # new bounds: first value >= lower limit, one past last value <= upper
+            new_st = np.count_nonzero(sub < center - self.sigma * std, axis=0)
+            new_en = n - np.count_nonzero(sub > center + self.sigma * std, axis=0)
+            new_st = np.maximum(new_st, st)
+            new_en = np.maximum(np.minimum(new_en, en), new_st)
+
+            changed = (new_st != st) | (new_en != en)
+            idx = np.arange(flat.shape[1]) if active is None else active
+            active = idx[changed]
+            if active.size == 0:
+                break
+            start[active] = new_st[changed]
+            end[active] = new_en[changed]
+
+        clipped = np.flatnonzero((start > 0) | (end < n))
+        if clipped.size:
+            keep = (k >= start[clipped]) & (k < end[clipped])
+            total[clipped] = np.where(keep, flat[:, clipped], 0.0).sum(axis=0)
+
+        shape = chunk.shape[1:]
+        return total.reshape(shape), (end - start).astype(np.int32).reshape(shape)
+
+    def result(self) -> np.ndarray:
+        """Flush pending frames and return the float32 combined image (NaN where
+        every value was rejected)."""
+        if self.count == 0:
+            raise ValueError("No frames to combine")
+        self._flush()
+        with np.errstate(invalid="ignore", divide="ignore"):
+            combined = self._sum / self._npix
+        return combined.astype(np.float32)
 
 
 class GFAImage:
@@ -44,10 +271,55 @@ class GFAImage:
         """
         self.logger = logger
 
-    def save_fits(
+    def clean(self, frames: np.ndarray, calib=None) -> np.ndarray:
+        """
+        Instrument signature removal for a 2D frame or (N, H, W) batch.
+
+        With a CalibrationSet (gfa_calib) the masters are applied in one pass;
+        the statistical hot pixel search is only used when there is no
+        bad-pixel mask.
+        """
+        if calib is not None:
+            frames = calib.apply(frames)
+            if calib.badpix is not None:
+                return frames
+        return self.hot_pixel_removal_median_ratio(frames, factor=1.5, n_iter=2)
+
+    @staticmethod
+    def _cleaning_label(calib=None) -> str:
+        if calib is None:
+            return "HOTPIX"
+        return calib.label if calib.badpix is not None else f"{calib.label}+HOTPIX"
+
+    def frame_combiner(
+        self,
+        sigma: float = 3.0,
+        chunk_size: int = 16,
+        clean: bool = True,
+        calib=None,
+    ) -> FrameCombiner:
+        """
+        Incremental sigma-clipped mean combiner for frames of one camera.
+
+        With clean=True each chunk is cleaned (see clean(): calibration masters
+        if `calib` is given, else hot pixel removal) before clipping. Pass the
+        filled combiner to make_frame/save_fits.
+        """
+        preprocess = None
+        if clean:
+
+            def preprocess(chunk):
+                return self.clean(chunk, calib)
+
+        combiner = FrameCombiner(
+            sigma=sigma, chunk_size=chunk_size, preprocess=preprocess
+        )
+        combiner.cleaning = self._cleaning_label(calib) if clean else "NONE"
+        return combiner
+
+    def make_frame(
         self,
         image_array,
-        filename: str,
         exptime: float,
         telescope: str = "KMTNET",
         instrument: str = "KSPEC-GFA",
@@ -57,37 +329,24 @@ class GFAImage:
         time_obs: Optional[str] = None,
         ra: Optional[str] = None,
         dec: Optional[str] = None,
-        output_directory: Optional[str] = None,
-    ) -> None:
+        name: Optional[str] = None,
+        calib=None,
+        **provenance,
+    ) -> GFAFrame:
         """
-        Save image data to a FITS file.
+        Build an in-memory frame (no disk I/O).
 
         If image_array is 2D:
-            hot pixel removal -> save FITS.
-
-        If image_array is list of 2D arrays or 3D array:
-            hot pixel removal per frame -> sigma-clipped mean combine -> save FITS.
-        """
-
-        if output_directory is None:
-            output_directory = os.getcwd()
+            hot pixel removal (or `calib` masters, see clean()).
 
-        if not os.path.exists(output_directory):
-            try:
-                os.makedirs(output_directory)
-            except OSError as e:
-                self.logger.error(
-                    f"Error creating directory {output_directory}: {e}. "
-                    "Check permissions or path validity."
-                )
-                raise
-
-        if not filename.lower().endswith(".fits"):
-            filename += ".fits"
+        If image_array is list of 2D arrays:
+            hot pixel removal per frame -> sigma-clipped mean combine.
 
-        filename = filename.replace(":", "-")
-        filepath = os.path.join(output_directory, filename)
+        If image_array is a FrameCombiner (see frame_combiner()):
+            its combined image is used as is.
 
+        Extra keyword arguments (cam_num, serial, ...) are kept in frame.provenance.
+        """
         now = datetime.now()
         if date_obs is None:
             date_obs = now.strftime("%Y-%m-%d")
@@ -97,16 +356,26 @@ class GFAImage:
             self.logger.warning("No time_obs provided. Using current time.")
 
         # -------------------------------------------------
-        # 1. Normalize input
+        # 1. Hot pixel removal (+ sigma-clipped mean combine)
         # -------------------------------------------------
-        ncomb = 1
-
-        if isinstance(image_array, list):
+        if isinstance(image_array, FrameCombiner):
+            # frames were already fed (and cleaned) while they were acquired
+            combiner = image_array
+            if combiner.count == 0:
+                raise ValueError("image_array combiner is empty")
+            ncomb = combiner.count
+            final_image = combiner.result()
+            cleaning = combiner.cleaning
+
+        elif isinstance(image_array, list):
             if len(image_array) == 0:
                 raise ValueError("image_array list is empty")
 
-            frames = [np.asarray(img) for img in image_array]
-            ncomb = len(frames)
+            combiner = self.frame_combiner(calib=calib)
+            combiner.extend(image_array)
+            ncomb = combiner.count
+            final_image = combiner.result()
+            cleaning = combiner.cleaning
 
         else:
             arr = np.asarray(image_array)
@@ -117,38 +386,11 @@ class GFAImage:
                     f"Got shape={arr.shape}"
                 )
 
-            frames = [arr]
-
-        # -------------------------------------------------
-        # 2. Hot pixel removal per frame
-        # -------------------------------------------------
-        cleaned_frames = [
-            self.hot_pixel_removal_median_ratio(
-                img,
-                factor=1.5,
-                n_iter=2,
-            )
-            for img in frames
-        ]
-
-        # -------------------------------------------------
-        # 3. Combine if multiple frames
-        # -------------------------------------------------
-        if len(cleaned_frames) == 1:
-            final_image = cleaned_frames[0].astype(np.float32)
+            ncomb = 1
+            with metrics.stage("hot_pixel"):
+                final_image = self.clean(arr, calib).astype(np.float32)
+            cleaning = self._cleaning_label(calib)
 
-        else:
-            shapes = [img.shape for img in cleaned_frames]
-            if len(set(shapes)) != 1:
-                raise ValueError(f"Image size mismatch: {shapes}")
-
-            stack = np.stack(cleaned_frames, axis=0)
-
-            clipped = sigma_clip(stack, sigma=3, axis=0)
-            final_image = np.ma.mean(clipped, axis=0).filled(np.nan)
-            final_image = final_image.astype(np.float32)
-
-        self.logger.debug(f"FITS file will be saved to: {filepath}")
         self.logger.debug(f"Final image shape: {final_image.shape}")
 
         # -------------------------------------------------
@@ -174,22 +416,90 @@ class GFAImage:
         header["EXPTIME"] = exptime
         header["NCOMB"] = ncomb
         header["COMBINE"] = "SIGMA_MEAN" if ncomb > 1 else "NONE"
+        header["CALIB"] = cleaning
         header["COMMENT"] = (
             "FITS file created with custom header fields and hot pixel removed"
         )
 
+        provenance["name"] = name or f"frame_{now.strftime('%Y%m%d_%H%M%S')}"
+        return GFAFrame(data=final_image, header=header, provenance=provenance)
+
+    def save_fits(
+        self,
+        image_array,
+        filename: str,
+        exptime: float,
+        telescope: str = "KMTNET",
+        instrument: str = "KSPEC-GFA",
+        observer: str = "Mingyeong",
+        object_name: str = "Unknown",
+        date_obs: Optional[str] = None,
+        time_obs: Optional[str] = None,
+        ra: Optional[str] = None,
+        dec: Optional[str] = None,
+        output_directory: Optional[str] = None,
+        fsync: bool = False,
+        calib=None,
+    ) -> str:
+        """
+        Save image data to a FITS file and return its path.
+
+        If image_array is 2D:
+            hot pixel removal -> save FITS.
+
+        If image_array is list of 2D arrays or a FrameCombiner:
+            hot pixel removal per frame -> sigma-clipped mean combine -> save FITS.
+
+        With fsync=True the file is on disk when this returns. `calib` is a
+        gfa_calib.CalibrationSet for the camera, if masters exist.
+        """
+
+        if output_directory is None:
+            output_directory = os.getcwd()
+
+        if not os.path.exists(output_directory):
+            try:
+                os.makedirs(output_directory)
+            except OSError as e:
+                self.logger.error(
+                    f"Error creating directory {output_directory}: {e}. "
+                    "Check permissions or path validity."
+                )
+                raise
+
+        if not filename.lower().endswith(".fits"):
+            filename += ".fits"
+
+        filename = filename.replace(":", "-")
+        filepath = os.path.join(output_directory, filename)
+
+        frame = self.make_frame(
+            image_array,
+            exptime=exptime,
+            telescope=telescope,
+            instrument=instrument,
+            observer=observer,
+            object_name=object_name,
+            date_obs=date_obs,
+            time_obs=time_obs,
+            ra=ra,
+            dec=dec,
+            name=os.path.splitext(filename)[0],
+            calib=calib,
+        )
+
+        self.logger.debug(f"FITS file will be saved to: {filepath}")
+
         # -------------------------------------------------
         # 5. Save FITS
         # -------------------------------------------------
-        hdu = fits.PrimaryHDU(data=final_image, header=header)
-        hdul = fits.HDUList([hdu])
-
         try:
-            hdul.writeto(filepath, overwrite=True)
+            frame.write(filepath, fsync=fsync)
             self.logger.info(f"FITS file successfully saved to {filepath}")
         except OSError as e:
             self.logger.error(f"Error writing FITS file {filepath}: {e}")
             raise
+        return filepath
 
     def save_png(
         self,
@@ -303,15 +613,17 @@ class GFAImage:
 
         abs_threshold를 같이 쓰면 (P - median) 절대 차이도 커야 제거되므로
         어두운 배경에서 과잉 검출되는 것을 줄일 수 있습니다.
+
+        img는 2D frame 또는 (N, H, W) frame batch (frame별로 독립 처리).
+        median은 _ring_median()의 sorting network로 계산.
         """
         img = np.asarray(img)
+        if img.ndim not in (2, 3):
+            raise ValueError(f"img must be 2D or (N, H, W). Got shape={img.shape}")
         work = img.astype(np.float32, copy=True)
 
-        # 중앙 제외한 8-neighbor footprint
-        footprint = np.array([[1, 1, 1], [1, 0, 1], [1, 1, 1]], dtype=np.uint8)
-
         for _ in range(max(1, int(n_iter))):
-            med_nb = median_filter(work, footprint=footprint, mode=mode)
+            med_nb = _ring_median(work, mode=mode)
 
             # ratio 조건: P > median * factor
             denom = np.maximum(np.abs(med_nb), eps)  # median이 0일 때 폭주 방지
@@ -326,7 +638,7 @@ class GFAImage:
                 mask &= work != float(saturated_value)
 
             # 치환
-            work[mask] = med_nb[mask]
+            np.copyto(work, med_nb, where=mask)
 
         # dtype 복구
         if keep_dtype:
@@ -380,25 +692,17 @@ class GFAImage:
 
             self.logger.info(f"Processing camera {cam_id}: {len(files)} files")
 
-            data_list = []
-            headers = []
+            combiner = FrameCombiner(sigma=sigma)
+            header = None
 
             for f in files:
                 with fits.open(f) as hdul:
-                    data_list.append(hdul[0].data.astype(float))
-                    headers.append(hdul[0].header)
-
-            shapes = [d.shape for d in data_list]
-            if len(set(shapes)) != 1:
-                raise ValueError(f"{cam_id}: image size mismatch {shapes}")
-
-            stack = np.stack(data_list, axis=0)
+                    if header is None:
+                        header = hdul[0].header.copy()
+                    combiner.add(hdul[0].data)
 
-            clipped = sigma_clip(stack, sigma=sigma, axis=0)
-            combined = np.ma.mean(clipped, axis=0).filled(np.nan)
-            combined = combined.astype(np.float32)
+            combined = combiner.result()
 
-            header = headers[0].copy()
             header["NCOMB"] = len(files)
             header["COMBINE"] = "SIGMA_MEAN"
             header["SIGMA"] = sigma
@@ -0,0 +1,294 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Filename: gfa_index.py
+
+"""
+Preloading of the astrometry.net index files that cover a tile.
+
+Every solve-field process maps the index files it needs; when they are not in
+the page cache, each guide cycle pays for reading them from disk again. The
+IndexWarmer selects the files whose healpix (HEALPIX/HPNSIDE header keys, or
+ALLSKY) overlaps the solve-field search circle around a pointing and reads them
+once into the page cache, so all solve-field processes of the GFA cameras share
+the same resident pages. It is run in the background at loadtile (loadguide)
+time, while the telescope is still slewing, and again when guiding starts.
+"""
+
+import glob
+import logging
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Set
+
+from astropy.io import fits
+
+__all__ = ["IndexFile", "IndexWarmer", "index_dirs_from_config", "radec_to_healpix"]
+
+_CHUNK = 8 * 1024 * 1024
+
+
+def radec_to_healpix(ra_deg: float, dec_deg: float, nside: int) -> int:
+    """
+    Healpix number of a position in astrometry.net's numbering
+    ((base_healpix * nside + x) * nside + y, as in index-52xx-NN.fits).
+    """
+    ra, dec = math.radians(ra_deg), math.radians(dec_deg)
+    vx, vy, vz = math.cos(dec) * math.cos(ra), math.cos(dec) * math.sin(ra), math.sin(dec)
+    halfpi = math.pi / 2
+    twothirds = 2.0 / 3.0
+
+    phi = math.atan2(vy, vx)
+    if phi < 0:
+        phi += 2 * math.pi
+    phi_t = math.fmod(phi, halfpi)
+    offset = int(round((phi - phi_t) / halfpi)) % 4
+
+    if vz >= twothirds or vz <= -twothirds:
+        north = vz >= twothirds
+        zfactor = 1.0 if north else -1.0
+        root = (1.0 - vz * zfactor) * 3.0 * (nside * (2.0 * phi_t - math.pi) / math.pi) ** 2
+        kx = math.sqrt(root) if root > 0 else 0.0
+        root = (1.0 - vz * zfactor) * 3.0 * (nside * 2.0 * phi_t / math.pi) ** 2
+        ky = math.sqrt(root) if root > 0 else 0.0
+        xx, yy = (nside - kx, nside - ky) if north else (ky, kx)
+        base = offset if north else 8 + offset
+    else:
+        zunits = (vz + twothirds) / (4.0 / 3.0)
+        phiunits = phi_t / halfpi
+        xx = (zunits + phiunits) * nside
+        yy = (zunits - phiunits + 1.0) * nside
+        if xx >= nside:
+            xx -= nside
+            if yy >= nside:
+                yy -= nside
+                base = offset
+            else:
+                base = (offset + 1) % 4 + 4
+        else:
+            if yy >= nside:
+                yy -= nside
+                base = offset + 4
+            else:
+                base = 8 + offset
+
+    x = max(0, min(nside - 1, int(math.floor(xx))))
+    y = max(0, min(nside - 1, int(math.floor(yy))))
+    return (base * nside + x) * nside + y
+
+
+def index_dirs_from_config(cfg_path: str) -> List[str]:
+    """add_path directories of an astrometry.cfg (relative to the cfg file)."""
+    dirs = []
+    if not os.path.isfile(cfg_path):
+        return dirs
+    with open(cfg_path, "r") as f:
+        for line in f:
+            parts = line.split("#", 1)[0].split()
+            if len(parts) >= 2 and parts[0] == "add_path":
+                p = os.path.expanduser(parts[1])
+                if not os.path.isabs(p):
+                    p = os.path.join(os.path.dirname(os.path.abspath(cfg_path)), p)
+                dirs.append(os.path.normpath(p))
+    return dirs
+
+
+@dataclass
+class IndexFile:
+    """
+    Attributes
+    ----------
+    healpix : int, optional
+        Healpix covered (astrometry.net numbering); None for all-sky indexes.
+    """
+
+    path: str
+    size: int
+    healpix: Optional[int] = None
+    nside: Optional[int] = None
+
+
+class IndexWarmer:
+    """
+    Parameters
+    ----------
+    dirs : list of str
+        Directories holding index-*.fits.
+    rewarm_s : float
+        The same file set is not read again within this many seconds.
+    method : str
+        "read" reads the files (resident when warm() returns); "fadvise" only asks
+        the kernel to read them ahead (POSIX_FADV_WILLNEED) and returns at once.
+    logger : logging.Logger, optional
+    """
+
+    def __init__(
+        self,
+        dirs: Sequence[str],
+        rewarm_s: float = 600.0,
+        method: str = "read",
+        logger: Optional[logging.Logger] = None,
+    ) -> None:
+        self.dirs = [str(d) for d in dirs]
+        self.rewarm_s = float(rewarm_s)
+        self.method = method
+        self.logger = logger or logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._files: Optional[List[IndexFile]] = None
+        self._warmed: Dict[str, float] = {}
+        # files being read by some warm() right now, and the cancel tokens of those calls
+        self._reading: Set[str] = set()
+        self._active: Set[threading.Event] = set()
+
+    # ------------------------------------------------------------------
+    # Index files
+    # ------------------------------------------------------------------
+    def _read_index(self, path: str) -> IndexFile:
+        size = os.path.getsize(path)
+        try:
+            hdr = fits.getheader(path, ext=0)
+        except Exception as e:
+            self.logger.warning(f"Index header unreadable, treating as all-sky: {path}: {e}")
+            return IndexFile(path, size)
+        healpix, nside = hdr.get("HEALPIX"), hdr.get("HPNSIDE")
+        if hdr.get("ALLSKY") or healpix is None or nside is None or int(healpix) < 0:
+            return IndexFile(path, size)
+        return IndexFile(path, size, int(healpix), int(nside))
+
+    def files(self) -> List[IndexFile]:
+        """All index files of the configured directories (scanned once)."""
+        with self._lock:
+            if self._files is None:
+                paths = sorted(
+                    {
+                        p
+                        for d in self.dirs
+                        for p in glob.glob(os.path.join(os.path.expanduser(d), "index-*.fits"))
+                    }
+                )
+                self._files = [self._read_index(p) for p in paths]
+                self.logger.info(
+                    f"Found {len(self._files)} astrometry index files in {self.dirs}"
+                )
+            return self._files
+
+    def select(self, ra_deg: float, dec_deg: float, radius_deg: float) -> List[IndexFile]:
+        """Index files overlapping the circle of radius_deg around (ra, dec)."""
+        files = self.files()
+        covered: Dict[int, Set[int]] = {}
+        for nside in {f.nside for f in files if f.nside}:
+            covered[nside] = {
+                radec_to_healpix(ra, dec, nside)
+                for ra, dec in self._sample_circle(ra_deg, dec_deg, radius_deg)
+            }
+        return [f for f in files if f.nside is None or f.healpix in covered[f.nside]]
+
+    @staticmethod
+    def _sample_circle(ra_deg: float, dec_deg: float, radius_deg: float, n: int = 24):
+        """Center plus two rings of points out to radius_deg."""
+        yield ra_deg, dec_deg
+        ra0, dec0 = math.radians(ra_deg), math.radians(dec_deg)
+        for frac in (0.5, 1.0):
+            r = math.radians(radius_deg * frac)
+            for k in range(n):
+                pa = 2 * math.pi * k / n
+                dec = math.asin(
+                    math.sin(dec0) * math.cos(r) + math.cos(dec0) * math.sin(r) * math.cos(pa)
+                )
+                ra = ra0 + math.atan2(
+                    math.sin(pa) * math.sin(r) * math.cos(dec0),
+                    math.cos(r) - math.sin(dec0) * math.sin(dec),
+                )
+                yield math.degrees(ra) % 360.0, math.degrees(dec)
+
+    # ------------------------------------------------------------------
+    # Warming
+    # ------------------------------------------------------------------
+    def _warm_file(self, path: str, cancel: threading.Event) -> None:
+        fadvise = getattr(os, "posix_fadvise", None)
+        with open(path, "rb", buffering=0) as f:
+            if self.method == "fadvise" and fadvise is not None:
+                fadvise(f.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+                return
+            buf = bytearray(_CHUNK)
+            while not cancel.is_set() and f.readinto(buf):
+                pass
+
+    def _claim(self, path: str) -> bool:
+        """Mark a file as being read, unless it is still warm or another warm() reads it."""
+        with self._lock:
+            if path in self._reading:
+                return False
+            if time.time() - self._warmed.get(path, -math.inf) < self.rewarm_s:
+                return False
+            self._reading.add(path)
+            return True
+
+    def warm(
+        self,
+        ra_deg: float,
+        dec_deg: float,
+        radius_deg: float,
+        cancel: Optional[threading.Event] = None,
+    ) -> Dict[str, float]:
+        """
+        Load the index files covering a pointing into the page cache.
+
+        Setting `cancel` (or calling stop()) aborts the call between 8 MB reads.
+        Returns {"files", "bytes", "skipped", "seconds"}: files selected, bytes read
+        and files skipped because they were warmed less than rewarm_s ago or are
+        being read by another warm() call.
+        """
+        t0 = time.perf_counter()
+        cancel = cancel or threading.Event()
+        with self._lock:
+            self._active.add(cancel)
+        done, nbytes, skipped = 0, 0, 0
+        try:
+            selected = self.select(ra_deg, dec_deg, radius_deg)
+            for f in selected:
+                if cancel.is_set():
+                    break
+                if not self._claim(f.path):
+                    skipped += 1
+                    continue
+                ok = False
+                try:
+                    self._warm_file(f.path, cancel)
+                    ok = not cancel.is_set()
+                except OSError as e:
+                    self.logger.warning(f"Index preload failed for {f.path}: {e}")
+                finally:
+                    with self._lock:
+                        self._reading.discard(f.path)
+                        if ok:
+                            self._warmed[f.path] = time.time()
+                if ok:
+                    done += 1
+                    nbytes += f.size
+        finally:
+            with self._lock:
+                self._active.discard(cancel)
+
+        result = {
+            "files": len(selected),
+            "bytes": nbytes,
+            "skipped": skipped,
+            "seconds": round(time.perf_counter() - t0, 3),
+        }
+        self.logger.info(
+            f"Index preload RA={ra_deg:.4f} DEC={dec_deg:.4f} r={radius_deg}: "
+            f"{done} of {len(selected)} files ({nbytes / 1e6:.1f} MB, {skipped} skipped) "
+            f"in {result['seconds']:.2f}s"
+        )
+        return result
+
+    def stop(self) -> None:
+        """Abort all running warm() calls (between 8 MB reads)."""
+        with self._lock:
+            for cancel in self._active:
+                cancel.set()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Filename: gfa_metrics.py
+
+"""
+Stage timers for the GFA acquisition / guiding path.
+
+Code on the guide path wraps its stages in ``metrics.stage(name)``:
+
+    open, params, grab, get_array, hot_pixel, combine, fits_write,
+    solve, centroid, reply
+
+Each duration is kept in a rolling window per stage and as the last value per
+camera. Stages run while a cycle is open (start_cycle/end_cycle) are also summed
+into that cycle's record, which end_cycle appends as one JSON line to the
+metrics file (rotated by size). The current camera and cycle are context
+variables, so asyncio tasks and asyncio.to_thread workers created inside a
+cycle report to it even while the next cycle is already running.
+"""
+
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+from typing import Any, Dict, Optional
+
+__all__ = ["StageMetrics", "metrics"]
+
+_current_camera = contextvars.ContextVar("gfa_metrics_camera", default=None)
+_current_cycle = contextvars.ContextVar("gfa_metrics_cycle", default=None)
+
+
+class StageMetrics:
+    """
+    Rolling per-stage timing statistics and per-cycle records.
+
+    Parameters
+    ----------
+    window : int
+        Number of recent durations kept per stage (and recent cycles kept).
+    """
+
+    def __init__(self, window: int = 200) -> None:
+        self.window = window
+        self._lock = threading.Lock()
+        self._stages: Dict[str, deque] = {}
+        self._cameras: Dict[str, Dict[str, float]] = {}
+        self._cycles: deque = deque(maxlen=window)
+        self._file_logger: Optional[logging.Logger] = None
+        self.path: Optional[str] = None
+
+    def configure(
+        self, path: Optional[str], max_bytes: int = 5_000_000, backup_count: int = 3
+    ) -> None:
+        """Write cycle records to `path` (JSON lines, rotated); None disables it."""
+        if self._file_logger is not None:
+            for handler in list(self._file_logger.handlers):
+                self._file_logger.removeHandler(handler)
+                handler.close()
+            self._file_logger = None
+        self.path = None
+        if path is None:
+            return
+
+        path = str(path)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        file_logger = logging.getLogger(f"gfa_metrics.{id(self)}")
+        file_logger.setLevel(logging.INFO)
+        file_logger.propagate = False
+        handler = RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backup_count
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        file_logger.addHandler(handler)
+        self._file_logger = file_logger
+        self.path = path
+
+    # ------------------------------------------------------------------
+    # Recording
+    # ------------------------------------------------------------------
+    def record(self, name: str, seconds: float, camera: Optional[str] = None) -> None:
+        camera = camera if camera is not None else _current_camera.get()
+        cycle = _current_cycle.get()
+        with self._lock:
+            self._stages.setdefault(name, deque(maxlen=self.window)).append(seconds)
+            if camera is not None:
+                self._cameras.setdefault(str(camera), {})[name] = seconds
+            if cycle is not None:
+                stages = cycle["stages"]
+                stages[name] = stages.get(name, 0.0) + seconds
+                if camera is not None:
+                    cam_stages = cycle["cameras"].setdefault(str(camera), {})
+                    cam_stages[name] = cam_stages.get(name, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, name: str, camera: Optional[str] = None):
+        """Time the enclosed block as stage `name`."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - t0, camera)
+
+    @contextmanager
+    def camera(self, camera: Optional[str]):
+        """Attribute stages recorded in this context to `camera`."""
+        token = _current_camera.set(None if camera is None else str(camera))
+        try:
+            yield
+        finally:
+            _current_camera.reset(token)
+
+    def set_camera(self, camera: Optional[str]) -> None:
+        """Attribute stages to `camera` for the rest of the current task."""
+        _current_camera.set(None if camera is None else str(camera))
+
+    # ------------------------------------------------------------------
+    # Cycles
+    # ------------------------------------------------------------------
+    def start_cycle(self, kind: str, **info) -> Dict[str, Any]:
+        """
+        Open a cycle record and make it current in this context.
+
+        Tasks and threads started afterwards from this context keep reporting
+        to it; pass the record to end_cycle() when the cycle is complete.
+        """
+        record = {
+            "kind": kind,
+            "start": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "stages": {},
+            "cameras": {},
+            **info,
+            "_t0": time.perf_counter(),
+        }
+        _current_cycle.set(record)
+        return record
+
+    def end_cycle(self, record: Dict[str, Any], **info) -> Dict[str, Any]:
+        """Close a cycle record, keep it in the recent window and write it out."""
+        with self._lock:
+            record.update(info)
+            record["total"] = time.perf_counter() - record.pop("_t0", time.perf_counter())
+            self._cycles.append(record)
+            line = json.dumps(record, default=str)
+        if _current_cycle.get() is record:
+            _current_cycle.set(None)
+        if self._file_logger is not None:
+            self._file_logger.info(line)
+        return record
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+    def summary(self) -> Dict[str, Any]:
+        """
+        Stage statistics (seconds) for status replies:
+        {"stages": {name: {n, last, mean, max}}, "cameras": {cam: {stage: last}},
+        "last_cycle": record or None}
+        """
+        with self._lock:
+            stages = {}
+            for name, values in self._stages.items():
+                if not values:
+                    continue
+                stages[name] = {
+                    "n": len(values),
+                    "last": round(values[-1], 4),
+                    "mean": round(sum(values) / len(values), 4),
+                    "max": round(max(values), 4),
+                }
+            cameras = {
+                cam: {name: round(v, 4) for name, v in cam_stages.items()}
+                for cam, cam_stages in self._cameras.items()
+            }
+            last_cycle = dict(self._cycles[-1]) if self._cycles else None
+        return {"stages": stages, "cameras": cameras, "last_cycle": last_cycle}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stages.clear()
+            self._cameras.clear()
+            self._cycles.clear()
+
+
+# Process-wide instance shared by controller, image, astrometry and guider code
+metrics = StageMetrics()
@@ -0,0 +1,324 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Filename: gfa_solution_cache.py
+
+"""
+Persistent cache of astrometric solutions.
+
+Each solve-field result is stored as its WCS header and .corr table under
+
+    <root>/index.json           entries, least recently used first to go
+    <root>/<key>.wcs            WCS header (fits.Header.tofile)
+    <root>/<key>.corr           copy of the solve's .corr table
+
+keyed by camera serial, image shape (i.e. binning), pointing and image content
+hash; storing the same (serial, shape, hash) again replaces that entry. lookup()
+returns the exact solution for an identical image, or otherwise the nearest
+solution of the same camera on the same tile, which GFAAstrometry refines to the
+new frame instead of re-solving. The directory is independent of the
+astroimg/tempfiles directories that are wiped between runs.
+
+index.json is written on put() and eviction only. Hits just update last_used in
+memory, which is saved with the next write, by flush(), or at interpreter exit.
+"""
+
+import atexit
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+from astropy.io import fits
+
+__all__ = ["CachedSolution", "SolutionCache"]
+
+
+@dataclass
+class CachedSolution:
+    """
+    Attributes
+    ----------
+    exact : bool
+        True if the image content hash matched (the WCS applies as is); False for a
+        solution of the same camera and tile that still has to be refined.
+    radec : tuple
+        Pointing (RA, DEC in degrees) the solution was made at.
+    """
+
+    key: str
+    wcs_header: fits.Header
+    corr_path: Optional[str]
+    radec: Optional[Tuple[float, float]]
+    exact: bool
+
+
+class SolutionCache:
+    """
+    Parameters
+    ----------
+    root : str
+        Cache directory.
+    max_entries : int
+        Maximum number of solutions kept.
+    max_bytes : int
+        Maximum total size of the stored .wcs/.corr files.
+    tile_radius_arcsec : float
+        A solution of the same camera within this distance counts as the same tile.
+    logger : logging.Logger, optional
+    """
+
+    def __init__(
+        self,
+        root: str,
+        max_entries: int = 500,
+        max_bytes: int = 200_000_000,
+        tile_radius_arcsec: float = 120.0,
+        logger: Optional[logging.Logger] = None,
+    ) -> None:
+        self.root = str(root)
+        self.max_entries = int(max_entries)
+        self.max_bytes = int(max_bytes)
+        self.tile_radius_arcsec = float(tile_radius_arcsec)
+        self.logger = logger or logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._index_path = os.path.join(self.root, "index.json")
+        os.makedirs(self.root, exist_ok=True)
+        self._entries: Dict[str, dict] = self._load_index()
+        self._dirty = False
+        atexit.register(self.flush)
+
+    # ------------------------------------------------------------------
+    # Index
+    # ------------------------------------------------------------------
+    def _load_index(self) -> Dict[str, dict]:
+        if not os.path.exists(self._index_path):
+            return {}
+        try:
+            with open(self._index_path, "r") as f:
+                entries = json.load(f).get("entries", {})
+        except Exception as e:
+            self.logger.warning(f"Solution cache index unreadable, starting empty: {e}")
+            return {}
+        # drop entries whose files were removed behind our back
+        return {
+            key: entry
+            for key, entry in entries.items()
+            if os.path.exists(self._path(key, ".wcs"))
+        }
+
+    def _save_index(self) -> None:
+        tmp = f"{self._index_path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"version": 1, "entries": self._entries}, f)
+        os.replace(tmp, self._index_path)
+        self._dirty = False
+
+    def flush(self) -> None:
+        """Write index.json if hits changed last_used since the last write."""
+        with self._lock:
+            if self._dirty:
+                try:
+                    self._save_index()
+                except OSError as e:
+                    self.logger.warning(f"Solution cache index not saved: {e}")
+
+    def _path(self, key: str, ext: str) -> str:
+        return os.path.join(self.root, f"{key}{ext}")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(int(e.get("bytes", 0)) for e in self._entries.values())
+
+    # ------------------------------------------------------------------
+    # Keys
+    # ------------------------------------------------------------------
+    @staticmethod
+    def image_hash(data: np.ndarray) -> str:
+        """Content hash of an image (pixel values, dtype and shape)."""
+        arr = np.ascontiguousarray(data)
+        h = hashlib.blake2b(digest_size=16)
+        h.update(f"{arr.dtype.str}{arr.shape}".encode())
+        h.update(arr.data)
+        return h.hexdigest()
+
+    @staticmethod
+    def _sep_arcsec(ra1, dec1, ra2, dec2) -> np.ndarray:
+        ra1, dec1, ra2, dec2 = map(np.radians, (ra1, dec1, ra2, dec2))
+        a = (
+            np.sin((dec2 - dec1) / 2) ** 2
+            + np.cos(dec1) * np.cos(dec2) * np.sin((ra2 - ra1) / 2) ** 2
+        )
+        return np.degrees(2 * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))) * 3600.0
+
+    # ------------------------------------------------------------------
+    # Lookup / store
+    # ------------------------------------------------------------------
+    def lookup(
+        self,
+        serial: Optional[str],
+        shape: Sequence[int],
+        radec: Optional[Tuple[float, float]],
+        image_hash: Optional[str] = None,
+    ) -> Optional[CachedSolution]:
+        """
+        Cached solution for an image: exact content match first, else the most
+        recent solution of the same camera and shape within tile_radius_arcsec.
+        """
+        shape = [int(n) for n in shape]
+        with self._lock:
+            candidates = [
+                (key, e)
+                for key, e in self._entries.items()
+                if e["shape"] == shape and e["serial"] == (None if serial is None else str(serial))
+            ]
+            hit = None
+            exact = False
+            if image_hash is not None:
+                for key, e in candidates:
+                    if e["hash"] == image_hash:
+                        hit, exact = (key, e), True
+                        break
+
+            if hit is None and serial is not None and radec is not None:
+                tiles = [(k, e) for k, e in candidates if e.get("radec") is not None]
+                if tiles:
+                    sep = self._sep_arcsec(
+                        radec[0],
+                        radec[1],
+                        np.array([e["radec"][0] for _, e in tiles]),
+                        np.array([e["radec"][1] for _, e in tiles]),
+                    )
+                    near = [
+                        (t, s) for t, s in zip(tiles, sep) if s <= self.tile_radius_arcsec
+                    ]
+                    if near:
+                        hit = max(near, key=lambda ts: ts[0][1]["last_used"])[0]
+
+            if hit is None:
+                return None
+
+            key, entry = hit
+            try:
+                wcs_header = fits.Header.fromfile(self._path(key, ".wcs"))
+            except Exception as e:
+                self.logger.warning(f"Solution cache entry {key} unreadable, dropping: {e}")
+                self._drop(key)
+                self._dirty = True
+                return None
+
+            entry["last_used"] = time.time()
+            entry["hits"] = int(entry.get("hits", 0)) + 1
+            self._dirty = True
+
+        corr_path = self._path(key, ".corr")
+        return CachedSolution(
+            key=key,
+            wcs_header=wcs_header,
+            corr_path=corr_path if os.path.exists(corr_path) else None,
+            radec=tuple(entry["radec"]) if entry.get("radec") else None,
+            exact=exact,
+        )
+
+    def put(
+        self,
+        serial: Optional[str],
+        shape: Sequence[int],
+        radec: Optional[Tuple[float, float]],
+        image_hash: str,
+        wcs_header: fits.Header,
+        corr_path: Optional[str] = None,
+    ) -> str:
+        """
+        Store a solution (WCS header + copy of the .corr) and evict LRU entries.
+
+        A solution for the same serial, shape and image hash is replaced in place.
+        """
+        serial = None if serial is None else str(serial)
+        shape = [int(n) for n in shape]
+        with self._lock:
+            key = next(
+                (
+                    k
+                    for k, e in self._entries.items()
+                    if e["hash"] == image_hash
+                    and e["serial"] == serial
+                    and e["shape"] == shape
+                ),
+                None,
+            )
+        if key is None:
+            key = uuid.uuid4().hex[:16]
+
+        # replace the files atomically: a concurrent lookup() may be reading them
+        tmp = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        wcs_path = self._path(key, ".wcs")
+        wcs_header.tofile(wcs_path + tmp, overwrite=True)
+        os.replace(wcs_path + tmp, wcs_path)
+        size = os.path.getsize(wcs_path)
+        cache_corr = self._path(key, ".corr")
+        if corr_path and os.path.exists(corr_path):
+            shutil.copyfile(corr_path, cache_corr + tmp)
+            os.replace(cache_corr + tmp, cache_corr)
+            size += os.path.getsize(cache_corr)
+        elif os.path.exists(cache_corr):
+            os.remove(cache_corr)
+
+        now = time.time()
+        with self._lock:
+            previous = self._entries.get(key, {})
+            self._entries[key] = {
+                "serial": serial,
+                "shape": shape,
+                "radec": [float(radec[0]), float(radec[1])] if radec else None,
+                "hash": image_hash,
+                "bytes": size,
+                "created": previous.get("created", now),
+                "last_used": now,
+                "hits": int(previous.get("hits", 0)),
+            }
+            self._evict()
+            self._save_index()
+        return key
+
+    def _drop(self, key: str) -> None:
+        self._entries.pop(key, None)
+        for ext in (".wcs", ".corr"):
+            try:
+                os.remove(self._path(key, ext))
+            except OSError:
+                pass
+
+    def _evict(self) -> None:
+        by_age = sorted(self._entries, key=lambda k: self._entries[k]["last_used"])
+        total = self.total_bytes
+        evicted = 0
+        for key in by_age:
+            if len(self._entries) <= self.max_entries and total <= self.max_bytes:
+                break
+            total -= int(self._entries[key].get("bytes", 0))
+            self._drop(key)
+            evicted += 1
+        if evicted:
+            self.logger.info(f"Solution cache: evicted {evicted} least recently used entries.")
+
+    def close(self) -> None:
+        self.flush()
+        atexit.unregister(self.flush)
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in list(self._entries):
+                self._drop(key)
+            self._save_index()
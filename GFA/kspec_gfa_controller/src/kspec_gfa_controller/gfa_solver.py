@@ -0,0 +1,241 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# @Filename: gfa_solver.py
+
+"""
+Bounded pool of solve-field child processes.
+
+Jobs run as asyncio subprocesses on a private event loop thread, so they can be
+awaited from the server loop (SolverPool.run) as well as from worker threads
+(SolverPool.run_sync, e.g. preproc and gfa_getcrval). Each child is started in its
+own process group; a job that times out or whose caller is cancelled has the
+whole group killed at once, so stopping guiding frees the CPU immediately.
+"""
+
+import asyncio
+import logging
+import os
+import signal
+import subprocess
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+from .gfa_metrics import metrics
+
+__all__ = ["SolveResult", "SolverPool"]
+
+
+@dataclass
+class SolveResult:
+    """
+    Outcome of one job (same fields as subprocess.CompletedProcess, plus timing).
+
+    Attributes
+    ----------
+    wait : float
+        Seconds spent queued for a free worker.
+    elapsed : float
+        Seconds the process ran.
+    """
+
+    args: List[str]
+    returncode: int
+    stdout: str
+    stderr: str
+    wait: float = 0.0
+    elapsed: float = 0.0
+
+
+class SolverPool:
+    """
+    Parameters
+    ----------
+    max_workers : int
+        Maximum number of solve-field processes running at once.
+    timeout : float, optional
+        Default hard limit (s) per job; the process group is killed after it.
+    logger : logging.Logger, optional
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        timeout: Optional[float] = None,
+        logger: Optional[logging.Logger] = None,
+    ) -> None:
+        self.max_workers = max(1, int(max_workers))
+        self.timeout = timeout
+        self.logger = logger or logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._sem: Optional[asyncio.Semaphore] = None
+        self._jobs: Dict[asyncio.Task, Optional[asyncio.subprocess.Process]] = {}
+
+    # ------------------------------------------------------------------
+    # Pool loop
+    # ------------------------------------------------------------------
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(
+                    target=loop.run_forever, name="gfa-solver", daemon=True
+                )
+                thread.start()
+                self._loop, self._thread = loop, thread
+            return self._loop
+
+    @staticmethod
+    def _kill(proc: asyncio.subprocess.Process) -> None:
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    async def _run(
+        self,
+        cmd: List[str],
+        env: Optional[dict],
+        timeout: Optional[float],
+        cwd: Optional[str],
+        label: str,
+    ) -> SolveResult:
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(self.max_workers)
+        task = asyncio.current_task()
+        self._jobs[task] = None
+        t0 = time.perf_counter()
+        try:
+            async with self._sem:
+                wait = time.perf_counter() - t0
+                t1 = time.perf_counter()
+                proc = await asyncio.create_subprocess_exec(
+                    *cmd,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    env=env,
+                    cwd=cwd,
+                    start_new_session=True,
+                )
+                self._jobs[task] = proc
+                try:
+                    out, err = await asyncio.wait_for(proc.communicate(), timeout)
+                except asyncio.TimeoutError:
+                    self._kill(proc)
+                    await proc.wait()
+                    self.logger.error(
+                        f"[{label}] solve-field killed after {timeout:g}s timeout."
+                    )
+                    raise subprocess.TimeoutExpired(cmd, timeout)
+                except asyncio.CancelledError:
+                    self._kill(proc)
+                    await proc.wait()
+                    self.logger.info(f"[{label}] solve-field cancelled and killed.")
+                    raise
+        finally:
+            self._jobs.pop(task, None)
+
+        return SolveResult(
+            args=list(cmd),
+            returncode=proc.returncode,
+            stdout=out.decode(errors="replace"),
+            stderr=err.decode(errors="replace"),
+            wait=wait,
+            elapsed=time.perf_counter() - t1,
+        )
+
+    def _submit(self, cmd, env, timeout, cwd, label):
+        cmd = [str(c) for c in cmd]
+        timeout = self.timeout if timeout is None else timeout
+        label = label or os.path.basename(cmd[1] if len(cmd) > 1 else cmd[0])
+        return asyncio.run_coroutine_threadsafe(
+            self._run(cmd, env, timeout, cwd, label), self._ensure_loop()
+        )
+
+    @staticmethod
+    def _record(result: SolveResult) -> SolveResult:
+        metrics.record("solve_wait", result.wait)
+        metrics.record("solve", result.elapsed)
+        return result
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    async def run(
+        self,
+        cmd: Sequence[str],
+        env: Optional[dict] = None,
+        timeout: Optional[float] = None,
+        cwd: Optional[str] = None,
+        label: Optional[str] = None,
+    ) -> SolveResult:
+        """
+        Run one job and await its result.
+
+        Cancelling the caller kills the process. Raises subprocess.TimeoutExpired
+        when the job exceeds `timeout` (default: the pool timeout).
+        """
+        future = self._submit(cmd, env, timeout, cwd, label)
+        return self._record(await asyncio.wrap_future(future))
+
+    def run_sync(
+        self,
+        cmd: Sequence[str],
+        env: Optional[dict] = None,
+        timeout: Optional[float] = None,
+        cwd: Optional[str] = None,
+        label: Optional[str] = None,
+    ) -> SolveResult:
+        """Blocking version of run() for worker threads."""
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("run_sync() called from the solver loop thread")
+        return self._record(self._submit(cmd, env, timeout, cwd, label).result())
+
+    def status(self) -> Dict[str, int]:
+        running = sum(1 for proc in list(self._jobs.values()) if proc is not None)
+        return {
+            "workers": self.max_workers,
+            "running": running,
+            "queued": len(self._jobs) - running,
+        }
+
+    def cancel_all(self) -> int:
+        """Cancel queued jobs and kill running ones. Returns the number of jobs."""
+        loop = self._loop
+        if loop is None:
+            return 0
+        tasks = list(self._jobs)
+        for task in tasks:
+            loop.call_soon_threadsafe(task.cancel)
+        if tasks:
+            self.logger.info(f"Cancelling {len(tasks)} solve-field job(s).")
+        return len(tasks)
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Kill all jobs and stop the pool loop (it restarts on the next job)."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+
+        async def _stop():
+            tasks = list(self._jobs)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        try:
+            asyncio.run_coroutine_threadsafe(_stop(), loop).result(timeout)
+        except Exception as e:
+            self.logger.warning(f"Solver shutdown: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+        if not thread.is_alive():
+            loop.close()
+        self._sem = None
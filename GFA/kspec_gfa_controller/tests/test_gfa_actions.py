@@ -32,6 +32,7 @@ class FakeController:
     def __init__(self, grabone_result=None):
         self._grabone_result = grabone_result if grabone_result is not None else []
         self.grabone_calls = []
+        self.grab_stream_calls = []
         self.grab_calls = []
         self.ping_calls = []
         self.status_called = 0
@@ -39,6 +40,7 @@ class FakeController:
 
         self.open_all_called = 0
         self.close_all_called = 0
+        self.session_calls = []
 
     async def open_all_cameras(self):
         self.open_all_called += 1
@@ -48,10 +50,32 @@ class FakeController:
         self.close_all_called += 1
         return None
 
+    async def start_session(self):
+        self.session_calls.append("start")
+
+    async def end_session(self):
+        self.session_calls.append("end")
+
     async def grabone(self, **kwargs):
         self.grabone_calls.append(kwargs)
         return list(self._grabone_result)
 
+    async def grab_stream(self, **kwargs):
+        self.grab_stream_calls.append(kwargs)
+        cam_num = kwargs["CamNum"]
+        images = [[[cam_num]]] * kwargs["ExpNum"]
+        combiner = kwargs.get("combiner")
+        if combiner is not None:
+            combiner.extend(images)
+            images = []
+        return {
+            "cam_num": cam_num,
+            "serial": f"S{cam_num}",
+            "images": images,
+            "nframes": kwargs["ExpNum"],
+            "timeout": False,
+        }
+
     async def grab(self, CamNum, ExpTime, Binning, **kwargs):
         self.grab_calls.append((CamNum, ExpTime, Binning, kwargs))
         return []
@@ -104,6 +128,13 @@ class FakeAstrometry:
     def clear_raw_files(self):
         self.clear_raw_called += 1
 
+    def solve_frame(self, frame, cam_token):
+        frame.wcs = "wcs"
+        return frame
+
+    async def solve_frame_async(self, frame, cam_token):
+        return self.solve_frame(frame, cam_token)
+
 
 class FakeGuider:
     def __init__(self, fdx=1.0, fdy=2.0, fwhm=3.0):
@@ -114,6 +145,14 @@ class FakeGuider:
         self.exe_called += 1
         return self._ret
 
+    def measure_frame(self, frame, file_counter, cutoutn_stack):
+        return [1.0], [2.0], [0]
+
+    def combine_offsets(self, dxpp, dypp, pindpp, cutoutn_stack):
+        if not dxpp:
+            return float("nan"), float("nan"), float("nan")
+        return self._ret
+
 
 class FakeEnv:
     def __init__(
@@ -824,3 +863,382 @@ async def test_pointing_save_true_copies_files(actions, monkeypatch, tmp_path):
     )
     assert r["status"] == "success"
     assert len(copy_calls) == 2
+
+
+# -------------------------
+# camera session
+# -------------------------
+@pytest.mark.asyncio
+async def test_start_and_end_session(actions):
+    r1 = await actions.start_session()
+    r2 = await actions.end_session()
+
+    assert r1["status"] == "success"
+    assert r2["status"] == "success"
+    assert actions.env.controller.session_calls == ["start", "end"]
+
+
+@pytest.mark.asyncio
+async def test_start_session_error(actions, monkeypatch):
+    async def boom():
+        raise RuntimeError("open failed")
+
+    monkeypatch.setattr(actions.env.controller, "start_session", boom)
+    r = await actions.start_session()
+
+    assert r["status"] == "error"
+    assert "open failed" in r["message"]
+
+
+@pytest.mark.asyncio
+async def test_grab_multi_frame_uses_streaming(actions, monkeypatch, tmp_path):
+    saved = []
+
+    class _FakeCombiner:
+        def __init__(self):
+            self.frames = []
+
+        @property
+        def count(self):
+            return len(self.frames)
+
+        def extend(self, frames):
+            self.frames.extend(frames)
+
+    class _FakeImg:
+        def frame_combiner(self, **kwargs):
+            return _FakeCombiner()
+
+        def save_fits(self, **kwargs):
+            saved.append(kwargs)
+
+    actions.env.controller.img_class = _FakeImg()
+
+    r = await actions.grab(CamNum=[1, 2], ExpTime=1.0, ExpNum=3, path=str(tmp_path))
+
+    assert r["status"] == "success"
+    assert actions.env.controller.grabone_calls == []
+    assert [c["CamNum"] for c in actions.env.controller.grab_stream_calls] == [1, 2]
+    assert all(c["ExpNum"] == 3 for c in actions.env.controller.grab_stream_calls)
+    # frames are handed to save_fits through the per-camera combiner
+    assert [k["image_array"].count for k in saved] == [3, 3]
+    assert all(k["exptime"] == 3.0 for k in saved)
+
+
+class _CountingCombiner:
+    def __init__(self):
+        self.count = 0
+
+    def extend(self, frames):
+        self.count += len(frames)
+
+
+@pytest.mark.asyncio
+async def test_grab_saves_cameras_concurrently_and_syncs(actions, tmp_path):
+    import threading
+
+    barrier = threading.Barrier(2, timeout=5)
+    saved = []
+
+    class _FakeImg:
+        def frame_combiner(self, **kwargs):
+            return _CountingCombiner()
+
+        def save_fits(self, **kwargs):
+            barrier.wait()  # both cameras must be saving at the same time
+            saved.append(kwargs)
+            return kwargs["filename"]
+
+    actions.env.controller.img_class = _FakeImg()
+
+    r = await actions.grab(CamNum=[1, 2], ExpTime=1.0, ExpNum=2, path=str(tmp_path))
+
+    assert r["status"] == "success"
+    assert len(r["grab_files"]) == 2
+    assert all(k["fsync"] is True for k in saved)
+
+
+@pytest.mark.asyncio
+async def test_grab_reports_failed_saves(actions, tmp_path):
+    class _FakeImg:
+        def frame_combiner(self, **kwargs):
+            return _CountingCombiner()
+
+        def save_fits(self, **kwargs):
+            if "_S2_" in kwargs["filename"]:
+                raise OSError("disk full")
+            return kwargs["filename"]
+
+    actions.env.controller.img_class = _FakeImg()
+
+    r = await actions.grab(CamNum=[1, 2], ExpTime=1.0, ExpNum=2, path=str(tmp_path))
+
+    assert r["status"] == "success"
+    assert [os.path.basename(f).split("_")[2] for f in r["grab_files"]] == ["S1"]
+    assert "save failed" in r["message"].lower()
+
+
+@pytest.mark.asyncio
+async def test_grab_background_returns_before_files_are_written(actions, tmp_path):
+    import threading
+
+    release = threading.Event()
+    saved = []
+
+    class _FakeImg:
+        def frame_combiner(self, **kwargs):
+            return _CountingCombiner()
+
+        def save_fits(self, **kwargs):
+            release.wait(5)
+            saved.append(kwargs)
+            return kwargs["filename"]
+
+    actions.env.controller.img_class = _FakeImg()
+
+    r = await actions.grab(
+        CamNum=[1, 2], ExpTime=1.0, ExpNum=2, path=str(tmp_path), background=True
+    )
+
+    assert r["status"] == "success"
+    assert len(r["grab_files"]) == 2
+    assert saved == []
+    assert len(actions._pending_writes) == 2
+
+    release.set()
+    await actions.wait_for_writes()
+
+    assert len(saved) == 2
+    assert all(k["fsync"] is False for k in saved)
+    assert not actions._pending_writes
+
+
+@pytest.mark.asyncio
+async def test_take_calibration_dark_builds_masters_per_serial(actions, tmp_path):
+    from kspec_gfa_controller.gfa_calib import GFACalibration
+
+    actions.env.calibration = GFACalibration(str(tmp_path))
+
+    r = await actions.take_calibration("dark", ExpTime=2.0, ExpNum=3, CamNum=[1, 2])
+
+    assert r["status"] == "success"
+    assert sorted(r["calib_files"]) == [1, 2]
+    assert (tmp_path / "S2" / "bin4" / "dark_2s.npy").exists()
+    assert all(c["ExpTime"] == 2.0 for c in actions.env.controller.grab_stream_calls)
+    assert actions.env.controller.close_all_called == 1
+
+
+# -------------------------
+# guiding_pipeline(): staged per-camera processing
+# -------------------------
+class _FakeFrame:
+    def __init__(self, name, provenance):
+        self.name = name
+        self.provenance = dict(provenance, name=name)
+        self.wcs = None
+        self.written = []
+        self.written_wcs = []
+
+    def write(self, path, with_wcs=True):
+        self.written.append(path)
+        self.written_wcs.append(with_wcs)
+        return path
+
+
+class _FakeImg:
+    def __init__(self):
+        self.frames = []
+
+    def make_frame(self, image_array, exptime, name=None, ra=None, dec=None, **prov):
+        frame = _FakeFrame(name, prov)
+        self.frames.append(frame)
+        return frame
+
+
+def _pipeline_actions(actions, tmp_path):
+    actions.env.save_root = str(tmp_path)
+    actions.env.controller.img_class = _FakeImg()
+
+    async def fake_grabone(**kwargs):
+        cam = kwargs["CamNum"]
+        return {"cam_num": cam, "serial": f"S{cam}", "image": [[cam]], "timeout": False}
+
+    actions.env.controller.grabone = fake_grabone
+    return actions
+
+
+@pytest.mark.asyncio
+async def test_guiding_pipeline_overlaps_next_grab_with_solve(actions, tmp_path):
+    import threading
+
+    _pipeline_actions(actions, tmp_path)
+    actions.env.camera_ids = [1, 2]
+    grabs = []
+    second_exposure = threading.Event()
+
+    async def fake_grabone(**kwargs):
+        cam = kwargs["CamNum"]
+        grabs.append(cam)
+        if len(grabs) > 2:
+            second_exposure.set()
+        return {"cam_num": cam, "serial": f"S{cam}", "image": [[cam]], "timeout": False}
+
+    actions.env.controller.grabone = fake_grabone
+
+    overlapped = []
+
+    def measure_frame(frame, file_counter, cutoutn_stack):
+        # Exposure 1 is still being measured when exposure 2 is taken
+        overlapped.append(second_exposure.wait(timeout=5))
+        return [1.0], [2.0], [0]
+
+    actions.env.guider.measure_frame = measure_frame
+
+    results = [
+        r
+        async for r in actions.guiding_pipeline(
+            ExpTime=1.0, SaveGrabRaw=False, max_cycles=2
+        )
+    ]
+
+    assert [r["cycle"] for r in results] == [1, 2]
+    # tagged with the exposure start, so ICS can drop corrections older than a move
+    assert results[0]["exposure_start"] <= results[1]["exposure_start"]
+    assert all(r["status"] == "success" for r in results)
+    assert all(r["cameras"] == [1, 2] for r in results)
+    assert overlapped[:2] == [True, True]
+    assert actions.env.controller.close_all_called == 1
+
+
+@pytest.mark.asyncio
+async def test_guiding_pipeline_skips_failed_camera(actions, tmp_path):
+    _pipeline_actions(actions, tmp_path)
+
+    def measure_frame(frame, file_counter, cutoutn_stack):
+        if "_S2_" in frame.name:
+            raise RuntimeError("solve failed")
+        return [1.0], [2.0], [0]
+
+    actions.env.guider.measure_frame = measure_frame
+
+    results = [
+        r
+        async for r in actions.guiding_pipeline(SaveGrabRaw=False, max_cycles=1)
+    ]
+
+    assert len(results) == 1
+    assert results[0]["status"] == "success"
+    assert results[0]["cameras"] == [1, 3]
+    assert any("Cam2 failed" in m for _, m in actions.env.logger.logs)
+
+
+@pytest.mark.asyncio
+async def test_guiding_pipeline_uses_requested_binning(actions, tmp_path):
+    _pipeline_actions(actions, tmp_path)
+    actions.env.camera_ids = [1]
+    grabs, lookups = [], []
+
+    async def fake_grabone(**kwargs):
+        grabs.append(kwargs["Binning"])
+        return {"cam_num": 1, "serial": "S1", "image": [[1]], "timeout": False}
+
+    actions.env.controller.grabone = fake_grabone
+    actions._calibration = lambda cam_id, Binning, ExpTime: lookups.append(Binning)
+    actions.env.guider.measure_frame = lambda *a: ([1.0], [2.0], [0])
+
+    [
+        r
+        async for r in actions.guiding_pipeline(
+            SaveGrabRaw=False, Binning=2, max_cycles=1
+        )
+    ]
+
+    assert grabs == [2] and lookups == [2]
+
+
+@pytest.mark.asyncio
+async def test_guiding_pipeline_no_guide_stars_is_warning(actions, tmp_path):
+    _pipeline_actions(actions, tmp_path)
+    actions.env.guider.measure_frame = lambda *a: None
+
+    results = [
+        r
+        async for r in actions.guiding_pipeline(SaveGrabRaw=False, max_cycles=1)
+    ]
+
+    assert results[0]["status"] == "warning"
+    assert results[0]["cameras"] == []
+
+
+@pytest.mark.asyncio
+async def test_guiding_pipeline_writes_fits_only_through_sinks(actions, tmp_path):
+    _pipeline_actions(actions, tmp_path)
+    actions.env.camera_ids = [1]
+
+    results = [
+        r
+        async for r in actions.guiding_pipeline(
+            SaveGrabRaw=True, SaveAstro=True, max_cycles=1
+        )
+    ]
+
+    (frame,) = actions.env.controller.img_class.frames
+    assert frame.wcs == "wcs"
+    assert [Path(p).name for p in frame.written] == [
+        f"{frame.name}.fits",
+        f"astro_{frame.name}.fits",
+    ]
+    # the raw file is written without WCS whatever the solve timing; astro_ with it
+    assert frame.written_wcs == [False, True]
+    assert results[0]["astrometry_files"] == [f"astro_{frame.name}.fits"]
+
+
+@pytest.mark.asyncio
+async def test_prewarm_astrometry_runs_in_background(actions):
+    import asyncio
+
+    calls = []
+    actions.env.astrometry.prewarm_indexes = lambda ra, dec, cancel: calls.append(
+        (ra, dec)
+    ) or {
+        "files": 2,
+        "bytes": 10,
+        "skipped": 0,
+        "seconds": 0.0,
+    }
+
+    task = actions.start_prewarm("10:00:00", "+20:00:00")
+    assert actions.start_prewarm(None, None) is None
+    r = await task
+    await asyncio.sleep(0)
+
+    assert calls == [("10:00:00", "+20:00:00")]
+    assert r["status"] == "success" and r["index"]["files"] == 2
+    assert not actions._prewarm_tasks
+
+
+@pytest.mark.asyncio
+async def test_prewarm_astrometry_failure_and_unsupported(actions):
+    r = await actions.prewarm_astrometry(10.0, 20.0)
+    assert r["status"] == "normal"  # FakeAstrometry has no prewarm_indexes
+
+    def boom(ra, dec, cancel):
+        raise OSError("disk")
+
+    actions.env.astrometry.prewarm_indexes = boom
+    r = await actions.prewarm_astrometry(10.0, 20.0)
+    assert r["status"] == "error" and "disk" in r["message"]
+
+
+@pytest.mark.asyncio
+async def test_stop_prewarm_cancels_pending_preloads(actions):
+    seen = []
+    actions.env.astrometry.prewarm_indexes = lambda ra, dec, cancel: seen.append(
+        cancel.is_set()
+    ) or {"files": 0, "bytes": 0, "skipped": 0, "seconds": 0.0}
+
+    task = actions.start_prewarm(10.0, 20.0)
+    actions.stop_prewarm()  # before the worker thread has started
+    await task
+
+    assert seen == [True]
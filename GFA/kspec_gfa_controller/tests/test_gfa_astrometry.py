@@ -8,6 +8,8 @@ import pytest
 from astropy.io import fits
 
 import kspec_gfa_controller.gfa_astrometry as gfa_astrometry
+from kspec_gfa_controller.gfa_frame import GFAFrame
+from kspec_gfa_controller.gfa_solver import SolveResult
 from kspec_gfa_controller.gfa_astrometry import (
     GFAAstrometry,
     _get_default_logger,
@@ -61,6 +63,20 @@ def _patch_solve_field_missing(monkeypatch, fake_path="/tmp/fake/solve-field"):
     monkeypatch.setenv("ASTROMETRY_SOLVE_FIELD", fake_path)
 
 
+def _patch_solver_run(monkeypatch, ast, fake_run):
+    """solver pool 대신 fake_run(cmd)을 실행 (sync/async 둘 다)."""
+
+    def run_sync(cmd, env=None, timeout=None, cwd=None, label=None):
+        r = fake_run(cmd)
+        return SolveResult(list(cmd), r.returncode, r.stdout, r.stderr)
+
+    async def run(cmd, **kwargs):
+        return run_sync(cmd, **kwargs)
+
+    monkeypatch.setattr(ast.solver, "run_sync", run_sync)
+    monkeypatch.setattr(ast.solver, "run", run)
+
+
 def _write_config(path: Path, tmp_path: Path):
     """
     최신 소스는 base_dir + config.paths.directories.* 를 join 하지만,
@@ -75,6 +91,7 @@ def _write_config(path: Path, tmp_path: Path):
                 "star_catalog": str(
                     tmp_path / "stars.fits"
                 ),  # 파일로도 가능(소스가 지원)
+                "solution_cache": str(tmp_path / "solution_cache"),
             }
         },
         "settings": {"cpu": {"limit": 2}},
@@ -183,15 +200,13 @@ def test_astrometry_raw_new_not_created_raises_runtimeerror(tmp_path, monkeypatc
     raw = raw_dir / "img.fits"
     _write_raw_fits(raw, np.zeros((4, 4), dtype=np.float32), ra=11.0, dec=-22.0)
 
-    # subprocess.run은 returncode만 주고, .new는 만들어주지 않음 -> RuntimeError
+    # solve-field은 returncode만 주고, .new는 만들어주지 않음 -> RuntimeError
     class R:
         returncode = 1
         stdout = ""
         stderr = "boom"
 
-    monkeypatch.setattr(
-        "kspec_gfa_controller.gfa_astrometry.subprocess.run", lambda *a, **k: R()
-    )
+    _patch_solver_run(monkeypatch, ast, lambda cmd: R())
 
     with pytest.raises(RuntimeError):
         ast.astrometry_raw(str(raw))
@@ -212,8 +227,8 @@ def test_astrometry_raw_success_reads_crval_and_moves_and_writes_header(
     raw = raw_dir / "img.fits"
     _write_raw_fits(raw, np.zeros((4, 4), dtype=np.float32), ra=111.0, dec=-22.0)
 
-    # subprocess.run 호출 후에 .new / .corr 만들어주기
-    def fake_run(cmd, capture_output, text, env):
+    # solve-field 호출 후에 .new / .corr 만들어주기
+    def fake_run(cmd):
         # cmd에 -D work_dir, -o outbase가 있음
         work_dir = cmd[cmd.index("-D") + 1]
         outbase = cmd[cmd.index("-o") + 1]
@@ -242,7 +257,7 @@ def test_astrometry_raw_success_reads_crval_and_moves_and_writes_header(
 
         return R()
 
-    monkeypatch.setattr("kspec_gfa_controller.gfa_astrometry.subprocess.run", fake_run)
+    _patch_solver_run(monkeypatch, ast, fake_run)
 
     cr1, cr2, astro_path, corr_path = ast.astrometry_raw(str(raw))
 
@@ -270,7 +285,7 @@ def test_astrometry_raw_header_read_failure_raises(tmp_path, monkeypatch):
     raw = raw_dir / "img.fits"
     _write_raw_fits(raw, np.zeros((4, 4), dtype=np.float32), ra=1.0, dec=2.0)
 
-    def fake_run(cmd, capture_output, text, env):
+    def fake_run(cmd):
         work_dir = Path(cmd[cmd.index("-D") + 1])
         outbase = cmd[cmd.index("-o") + 1]
         work_dir.mkdir(parents=True, exist_ok=True)
@@ -286,7 +301,7 @@ def test_astrometry_raw_header_read_failure_raises(tmp_path, monkeypatch):
 
         return R()
 
-    monkeypatch.setattr("kspec_gfa_controller.gfa_astrometry.subprocess.run", fake_run)
+    _patch_solver_run(monkeypatch, ast, fake_run)
 
     with pytest.raises(RuntimeError):
         ast.astrometry_raw(str(raw))
@@ -892,3 +907,470 @@ def test_preproc_runs_only_missing_outputs(tmp_path, monkeypatch):
     assert called["paths"] == ["b.fits"]
     assert len(res) == 1
     assert len(corr_ok) == 1
+
+
+# -------------------------
+# solve_frame(): in-memory frames, per-camera reuse / re-solve
+# -------------------------
+def _make_frame(name="D20260121_T171500_111_exp1s", ra="10.0", dec="20.0"):
+    hdr = fits.Header()
+    hdr["RA"] = ra
+    hdr["DEC"] = dec
+    return GFAFrame(
+        data=np.zeros((4, 4), np.float32), header=hdr, provenance={"name": name}
+    )
+
+
+def _wcs_header(crval1=10.0, crval2=20.0):
+    hdr = fits.Header()
+    hdr["CTYPE1"] = "RA---TAN"
+    hdr["CTYPE2"] = "DEC--TAN"
+    hdr["CRVAL1"] = crval1
+    hdr["CRVAL2"] = crval2
+    hdr["CRPIX1"] = 2.0
+    hdr["CRPIX2"] = 2.0
+    hdr["CDELT1"] = -0.001
+    hdr["CDELT2"] = 0.001
+    return hdr
+
+
+def test_solve_frame_solves_once_then_reuses_in_memory(tmp_path, monkeypatch):
+    cfgp = tmp_path / "cfg.json"
+    _write_config(cfgp, tmp_path)
+    _patch_solve_field_ok(monkeypatch)
+
+    ast = GFAAstrometry(config=str(cfgp), logger=_get_default_logger())
+
+    solved = []
+
+    def fake_astrometry_frame(frame):
+        solved.append(frame.name)
+        return _wcs_header(), str(tmp_path / "x.corr")
+
+    def fake_build(corr_files=None, **k):
+        Path(ast.combined_star_path).write_bytes(b"x")
+
+    monkeypatch.setattr(ast, "astrometry_frame", fake_astrometry_frame)
+    monkeypatch.setattr(ast, "build_combined_star_from_corr", fake_build)
+
+    f1 = ast.solve_frame(_make_frame("D20260121_T171500_111_exp1s"), "111")
+    f2 = ast.solve_frame(_make_frame("D20260121_T171510_111_exp1s"), "111")
+
+    assert solved == ["D20260121_T171500_111_exp1s"]
+    assert f1.provenance["wcs"] == "solve"
+    assert f2.provenance["wcs"] == "reuse"
+    assert tuple(f2.wcs.wcs.crval) == (10.0, 20.0)
+    assert list(Path(ast.final_astrometry_dir).glob("astro_*.fits")) == []
+
+
+def test_solve_frame_session_mismatch_resolves(tmp_path, monkeypatch):
+    cfgp = tmp_path / "cfg.json"
+    _write_config(cfgp, tmp_path)
+    _patch_solve_field_ok(monkeypatch)
+
+    ast = GFAAstrometry(config=str(cfgp), logger=_get_default_logger())
+    Path(ast.combined_star_path).write_bytes(b"x")
+
+    solved = []
+    monkeypatch.setattr(
+        ast,
+        "astrometry_frame",
+        lambda frame: solved.append(frame.name) or (_wcs_header(), None),
+    )
+    monkeypatch.setattr(ast, "build_combined_star_from_corr", lambda **k: None)
+
+    ast.solve_frame(_make_frame("a", ra="10.0", dec="20.0"), "111")
+    ast.solve_frame(_make_frame("b", ra="11.0", dec="20.0"), "111")
+    ast.solve_frame(_make_frame("c", ra="11.0", dec="20.0"), "222")
+
+    assert solved == ["a", "b", "c"]
+
+
+def test_astrometry_frame_reads_wcs_and_removes_input(tmp_path, monkeypatch):
+    cfgp = tmp_path / "cfg.json"
+    _write_config(cfgp, tmp_path)
+    _patch_solve_field_ok(monkeypatch)
+
+    ast = GFAAstrometry(config=str(cfgp), logger=_get_default_logger())
+    frame = _make_frame("D20260121_T171500_111_exp1s")
+    calls = []
+
+    class _P:
+        returncode = 0
+        stdout = ""
+        stderr = ""
+
+    def fake_run(cmd):
+        calls.append(cmd)
+        work_dir = cmd[cmd.index("-D") + 1]
+        assert os.path.exists(cmd[1])
+        fits.PrimaryHDU(header=_wcs_header(30.0, 40.0)).writeto(
+            os.path.join(work_dir, f"{frame.name}.wcs")
+        )
+        return _P()
+
+    _patch_solver_run(monkeypatch, ast, fake_run)
+
+    wcs_header, corr_path = ast.astrometry_frame(frame)
+
+    assert wcs_header["CRVAL1"] == 30.0
+    assert corr_path.endswith(f"{frame.name}.corr")
+    assert calls[0][-2:] == ["--new-fits", "none"]
+    assert not os.path.exists(calls[0][1])
+
+
+# -------------------------
+# refine_wcs(): incremental WCS from the previous solve + .corr stars
+# -------------------------
+def _tan_header(crval1, crval2, rot_deg=0.0, scale=0.5 / 3600, crpix=(256.5, 256.5)):
+    c, s = np.cos(np.radians(rot_deg)), np.sin(np.radians(rot_deg))
+    hdr = fits.Header()
+    hdr["CTYPE1"] = "RA---TAN"
+    hdr["CTYPE2"] = "DEC--TAN"
+    hdr["CRVAL1"] = crval1
+    hdr["CRVAL2"] = crval2
+    hdr["CRPIX1"], hdr["CRPIX2"] = crpix
+    hdr["CD1_1"], hdr["CD1_2"] = -scale * c, scale * s
+    hdr["CD2_1"], hdr["CD2_2"] = scale * s, scale * c
+    return hdr
+
+
+def _star_field(tmp_path, true_hdr, n=40, shape=(512, 512), seed=3):
+    """Render n stars at their true-WCS positions; write their sky coords as a .corr."""
+    from astropy.wcs import WCS
+
+    rng = np.random.default_rng(seed)
+    x = rng.uniform(20, shape[1] - 20, n)
+    y = rng.uniform(20, shape[0] - 20, n)
+    flux = rng.uniform(2000, 20000, n)
+    ra, dec = WCS(true_hdr).all_pix2world(x, y, 0)
+
+    yy, xx = np.mgrid[: shape[0], : shape[1]]
+    img = rng.normal(100.0, 5.0, shape)
+    for xi, yi, fi in zip(x, y, flux):
+        sl = (slice(int(yi) - 6, int(yi) + 7), slice(int(xi) - 6, int(xi) + 7))
+        img[sl] += fi / (2 * np.pi * 1.5**2) * np.exp(
+            -((xx[sl] - xi) ** 2 + (yy[sl] - yi) ** 2) / (2 * 1.5**2)
+        )
+
+    corr = tmp_path / "cam.corr"
+    fits.BinTableHDU.from_columns(
+        [
+            fits.Column(name="index_ra", format="D", array=ra),
+            fits.Column(name="index_dec", format="D", array=dec),
+            fits.Column(name="FLUX", format="D", array=flux),
+        ]
+    ).writeto(corr)
+    return img.astype(np.float32), str(corr)
+
+
+def test_refine_wcs_recovers_pointing_change(tmp_path, monkeypatch):
+    from astropy.wcs import WCS
+
+    cfgp = tmp_path / "cfg.json"
+    _write_config(cfgp, tmp_path)
+    _patch_solve_field_ok(monkeypatch)
+    ast = GFAAstrometry(config=str(cfgp), logger=_get_default_logger())
+
+    # previous solve at (150, 30); telescope moved by the header delta plus
+    # a 6 arcsec pointing error and a small rotation the header doesn't know
+    old_hdr = _tan_header(150.0, 30.0)
+    true_hdr = _tan_header(150.0 + 20 / 3600 + 6 / 3600, 30.0 - 10 / 3600, rot_deg=0.05)
+    img, corr = _star_field(tmp_path, true_hdr)
+
+    frame = _make_frame("moved", ra=str(150.0 + 20 / 3600), dec=str(30.0 - 10 / 3600))
+    frame.data = img
+
+    refined = ast.refine_wcs(frame, old_hdr, ("150.0", "30.0"), corr)
+
+    assert refined is not None
+    x, y = np.array([10.0, 500.0]), np.array([10.0, 400.0])
+    got = np.array(WCS(refined).all_pix2world(x, y, 0))
+    want = np.array(WCS(true_hdr).all_pix2world(x, y, 0))
+    assert np.max(np.abs(got - want)) * 3600 < 0.1
+
+
+def test_refine_wcs_rejects_unrelated_field(tmp_path, monkeypatch):
+    cfgp = tmp_path / "cfg.json"
+    _write_config(cfgp, tmp_path)
+    _patch_solve_field_ok(monkeypatch)
+    ast = GFAAstrometry(config=str(cfgp), logger=_get_default_logger())
+
+    img, _ = _star_field(tmp_path, _tan_header(150.0, 30.0), seed=1)
+    other = tmp_path / "other"
+    other.mkdir()
+    _, corr = _star_field(other, _tan_header(150.0, 30.0), seed=2)
+
+    frame = _make_frame("other", ra="150.0", dec="30.0")
+    frame.data = img
+
+    assert ast.refine_wcs(frame, _tan_header(150.0, 30.0), None, corr) is None
+
+
+def test_solve_frame_refines_after_pointing_change(tmp_path, monkeypatch):
+    cfgp = tmp_path / "cfg.json"
+    _write_config(cfgp, tmp_path)
+    _patch_solve_field_ok(monkeypatch)
+    ast = GFAAstrometry(config=str(cfgp), logger=_get_default_logger())
+    Path(ast.combined_star_path).write_bytes(b"x")
+    monkeypatch.setattr(ast, "build_combined_star_from_corr", lambda **k: None)
+
+    img, corr = _star_field(tmp_path, _tan_header(150.0 + 60 / 3600, 30.0))
+    solved = []
+    monkeypatch.setattr(
+        ast,
+        "astrometry_frame",
+        lambda frame: solved.append(frame.name) or (_tan_header(150.0, 30.0), corr),
+    )
+
+    first = _make_frame("a", ra="150.0", dec="30.0")
+    first.data = img
+    ast.solve_frame(first, "111")
+
+    moved = _make_frame("b", ra=str(150.0 + 60 / 3600), dec="30.0")
+    moved.data = img
+    ast.solve_frame(moved, "111")
+
+    assert solved == ["a"]
+    assert moved.provenance["wcs"] == "refine"
+
+    # refine fails (no stars) -> solve-field fallback
+    blank = _make_frame("c", ra=str(150.0 + 120 / 3600), dec="30.0")
+    blank.data = np.zeros((512, 512), np.float32)
+    ast.solve_frame(blank, "111")
+    assert solved == ["a", "c"]
+
+
+@pytest.mark.asyncio
+async def test_solve_frame_async_cancel_removes_input(tmp_path, monkeypatch):
+    import asyncio
+
+    cfgp = tmp_path / "cfg.json"
+    _write_config(cfgp, tmp_path)
+    _patch_solve_field_ok(monkeypatch)
+    ast = GFAAstrometry(config=str(cfgp), logger=_get_default_logger())
+
+    started = asyncio.Event()
+    inputs = []
+
+    async def hanging_run(cmd, **kwargs):
+        inputs.append(cmd[1])
+        started.set()
+        await asyncio.sleep(60)
+
+    monkeypatch.setattr(ast.solver, "run", hanging_run)
+
+    task = asyncio.create_task(ast.solve_frame_async(_make_frame("a"), "111"))
+    await asyncio.wait_for(started.wait(), 5)
+    assert os.path.exists(inputs[0])
+
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert not os.path.exists(inputs[0])
+    assert "111" not in ast._camera_wcs
+
+
+# -------------------------
+# xylist input: sources detected in-process, solve-field gets X/Y/FLUX only
+# -------------------------
+def test_write_xylist_detects_sources(tmp_path, monkeypatch):
+    cfgp = tmp_path / "cfg.json"
+    _write_config(cfgp, tmp_path)
+    _patch_solve_field_ok(monkeypatch)
+    ast = GFAAstrometry(config=str(cfgp), logger=_get_default_logger())
+
+    img, _ = _star_field(tmp_path, _tan_header(150.0, 30.0), n=30)
+    xyls = tmp_path / "a.xyls"
+
+    args = ast.write_xylist(img, str(xyls))
+
+    assert args == ["--width", "512", "--height", "512"]
+    with fits.open(xyls) as hdul:
+        tab = hdul[1].data
+        assert hdul[1].header["IMAGEW"] == 512
+        assert 25 <= len(tab) <= 30
+        assert np.all(np.diff(tab["FLUX"]) <= 0)  # brightest first
+        assert tab["X"].min() >= 1.0
+
+    # blank frame -> no xylist, image input is used instead
+    assert ast.write_xylist(np.zeros((64, 64), np.float32), str(tmp_path / "b.xyls")) is None
+
+
+def test_astrometry_frame_uses_xylist_when_stars_found(tmp_path, monkeypatch):
+    cfgp = tmp_path / "cfg.json"
+    _write_config(cfgp, tmp_path)
+    _patch_solve_field_ok(monkeypatch)
+    ast = GFAAstrometry(config=str(cfgp), logger=_get_default_logger())
+
+    img, _ = _star_field(tmp_path, _tan_header(150.0, 30.0))
+    frame = _make_frame("xy")
+    frame.data = img
+    calls = []
+
+    def fake_run(cmd):
+        calls.append(list(cmd))
+        assert cmd[1].endswith(".xyls") and os.path.exists(cmd[1])
+        fits.PrimaryHDU(header=_wcs_header(150.0, 30.0)).writeto(
+            os.path.join(cmd[cmd.index("-D") + 1], "xy.wcs")
+        )
+
+        class R:
+            returncode = 0
+            stdout = ""
+            stderr = ""
+
+        return R()
+
+    _patch_solver_run(monkeypatch, ast, fake_run)
+
+    wcs_header, _ = ast.astrometry_frame(frame)
+
+    assert wcs_header["CRVAL1"] == 150.0
+    assert calls[0][-6:] == ["--width", "512", "--height", "512", "--new-fits", "none"]
+    assert not os.path.exists(calls[0][1])
+
+
+def test_astrometry_raw_xylist_builds_astro_file_from_wcs(tmp_path, monkeypatch):
+    cfgp = tmp_path / "cfg.json"
+    _write_config(cfgp, tmp_path)
+    _patch_solve_field_ok(monkeypatch)
+    ast = GFAAstrometry(config=str(cfgp), logger=_get_default_logger())
+
+    img, _ = _star_field(tmp_path, _tan_header(150.0, 30.0))
+    raw = Path(ast.dir_path) / "img.fits"
+    _write_raw_fits(raw, img, ra=150.0, dec=30.0)
+
+    def fake_run(cmd):
+        assert cmd[1].endswith(".xyls")
+        work_dir = Path(cmd[cmd.index("-D") + 1])
+        fits.PrimaryHDU(header=_wcs_header(150.5, 30.5)).writeto(work_dir / "img.wcs")
+
+        class R:
+            returncode = 0
+            stdout = ""
+            stderr = ""
+
+        return R()
+
+    _patch_solver_run(monkeypatch, ast, fake_run)
+
+    cr1, cr2, astro_path, _ = ast.astrometry_raw(str(raw))
+
+    assert (cr1, cr2) == (150.5, 30.5)
+    data, hdr = fits.getdata(astro_path, header=True)
+    np.testing.assert_array_equal(data, img)
+    assert hdr["CTYPE1"] == "RA---TAN"
+    assert not list(Path(ast.temp_dir).rglob("*.xyls"))
+
+
+def test_solve_frame_uses_solution_cache_across_instances(tmp_path, monkeypatch):
+    cfgp = tmp_path / "cfg.json"
+    _write_config(cfgp, tmp_path)
+    _patch_solve_field_ok(monkeypatch)
+
+    img, corr = _star_field(tmp_path, _tan_header(150.0 + 60 / 3600, 30.0))
+    solved = []
+
+    def _new():
+        ast = GFAAstrometry(config=str(cfgp), logger=_get_default_logger())
+        monkeypatch.setattr(ast, "build_combined_star_from_corr", lambda **k: None)
+        monkeypatch.setattr(
+            ast,
+            "astrometry_frame",
+            lambda frame: solved.append(frame.name) or (_tan_header(150.0, 30.0), corr),
+        )
+        return ast
+
+    first = _make_frame("a", ra="150.0", dec="30.0")
+    first.data = img
+    _new().solve_frame(first, "111", build_star_catalog=False)
+    os.remove(corr)  # the solve's tempfiles are gone; the cache keeps its own copy
+
+    # restarted server, same image -> exact hit
+    again = _make_frame("b", ra="150.0", dec="30.0")
+    again.data = img.copy()
+    _new().solve_frame(again, "111", build_star_catalog=False)
+    assert again.provenance["wcs"] == "cache"
+    assert tuple(again.wcs.wcs.crval) == (150.0, 30.0)
+
+    # same tile, new pointing -> cached WCS refined against the cached .corr
+    moved = _make_frame("c", ra=str(150.0 + 60 / 3600), dec="30.0")
+    moved.data = img + 1.0
+    ast = _new()
+    ast.solve_frame(moved, "111", build_star_catalog=False)
+    assert moved.provenance["wcs"] == "refine"
+    assert abs(moved.wcs.wcs.crval[0] - (150.0 + 60 / 3600)) * 3600 < 0.5
+    assert ast._camera_corr["111"].startswith(str(tmp_path / "solution_cache"))
+
+    # another camera does not share solutions
+    other = _make_frame("d", ra="150.0", dec="30.0")
+    other.data = img
+    _new().solve_frame(other, "222", build_star_catalog=False)
+    assert solved == ["a", "d"]
+
+
+def test_astrometry_raw_repeated_run_hits_solution_cache(tmp_path, monkeypatch):
+    cfgp = tmp_path / "cfg.json"
+    _write_config(cfgp, tmp_path)
+    _patch_solve_field_ok(monkeypatch)
+    ast = GFAAstrometry(config=str(cfgp), logger=_get_default_logger())
+
+    img, _ = _star_field(tmp_path, _tan_header(150.0, 30.0))
+    raw = Path(ast.dir_path) / "D20260121_T171500_111_exp1s.fits"
+    _write_raw_fits(raw, img, ra=150.0, dec=30.0)
+    calls = []
+
+    def fake_run(cmd):
+        calls.append(cmd)
+        work_dir = Path(cmd[cmd.index("-D") + 1])
+        stem = raw.stem
+        fits.PrimaryHDU(header=_wcs_header(150.5, 30.5)).writeto(
+            work_dir / f"{stem}.wcs", overwrite=True
+        )
+        fits.BinTableHDU.from_columns(
+            [fits.Column(name="index_ra", format="D", array=[150.5])]
+        ).writeto(work_dir / f"{stem}.corr", overwrite=True)
+
+        class R:
+            returncode = 0
+            stdout = ""
+            stderr = ""
+
+        return R()
+
+    _patch_solver_run(monkeypatch, ast, fake_run)
+    ast.astrometry_raw(str(raw))
+
+    # gfaguidestop wipes astroimg; tempfiles are removed after preproc
+    ast.delete_all_files_in_dir(ast.final_astrometry_dir)
+    ast.rm_tempfiles()
+
+    cr1, cr2, astro_path, corr_path = ast.astrometry_raw(str(raw))
+
+    assert len(calls) == 1
+    assert (cr1, cr2) == (150.5, 30.5)
+    assert os.path.exists(astro_path) and os.path.exists(corr_path)
+    np.testing.assert_array_equal(fits.getdata(astro_path), img)
+
+
+def test_prewarm_indexes_uses_configured_dirs(tmp_path, monkeypatch):
+    cfgp = tmp_path / "cfg.json"
+    _write_config(cfgp, tmp_path)
+    cfg = json.loads(cfgp.read_text())
+    cfg["astrometry"]["index"] = {"dirs": [str(tmp_path / "idx")]}
+    cfgp.write_text(json.dumps(cfg))
+    _patch_solve_field_ok(monkeypatch)
+    ast = GFAAstrometry(config=str(cfgp), logger=_get_default_logger())
+
+    (tmp_path / "idx").mkdir()
+    fits.PrimaryHDU(data=np.zeros(16, np.float32)).writeto(
+        tmp_path / "idx" / "index-4110.fits"
+    )
+
+    r = ast.prewarm_indexes("00:40:00", "+41:00:00")
+    assert r["files"] == 1 and r["bytes"] > 0
+
+    cfg["astrometry"]["index"]["enabled"] = False
+    ast.inpar = cfg
+    assert ast.prewarm_indexes(10.0, 41.0) is None
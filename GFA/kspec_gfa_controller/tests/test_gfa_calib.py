@@ -0,0 +1,68 @@
+# tests/test_gfa_calib.py
+import numpy as np
+import pytest
+
+from kspec_gfa_controller.gfa_calib import CalibrationSet, GFACalibration
+
+
+def _frames(value, n=5, shape=(8, 10), seed=0):
+    rng = np.random.default_rng(seed)
+    return [rng.normal(value, 1.0, shape).astype(np.float32) for _ in range(n)]
+
+
+def test_build_and_get_memory_mapped_masters(tmp_path):
+    store = GFACalibration(str(tmp_path))
+    darks = _frames(110.0)
+    for d in darks:
+        d[2, 3] = 4000.0
+
+    written = store.build("111", 4, bias_frames=_frames(100.0), dark_frames=darks, dark_exptime=2.0)
+
+    assert set(written) == {"bias", "dark", "badpix"}
+    assert (tmp_path / "111" / "bin4" / "dark_2s.npy").exists()
+
+    calib = store.get("111", 4, 1.0)
+    assert isinstance(calib.bias, np.memmap)
+    assert calib.dark_exptime == 2.0
+    assert calib.dark_scale == pytest.approx(0.5)
+    assert calib.badpix[2, 3]
+    assert calib.label == "bias+dark+badpix"
+    assert store.get("111", 4, 1.0) is calib  # cached per exposure time
+
+
+def test_get_without_masters_returns_none(tmp_path):
+    store = GFACalibration(str(tmp_path))
+    assert store.get("missing", 4, 1.0) is None
+    assert store.get(None, 4, 1.0) is None
+
+
+def test_get_picks_nearest_dark(tmp_path):
+    store = GFACalibration(str(tmp_path))
+    store.build("111", 4, dark_frames=_frames(10.0), dark_exptime=1.0)
+    store.build("111", 4, dark_frames=_frames(50.0), dark_exptime=5.0)
+
+    assert store.get("111", 4, 4.0).dark_exptime == 5.0
+    assert store.get("111", 4, 0.5).dark_exptime == 1.0
+
+
+def test_apply_subtracts_and_repairs_bad_pixels_in_batch():
+    shape = (5, 5)
+    badpix = np.zeros(shape, dtype=bool)
+    badpix[0, 0] = badpix[2, 2] = True
+    calib = CalibrationSet(
+        bias=np.full(shape, 100.0, dtype=np.float32),
+        dark=np.full(shape, 20.0, dtype=np.float32),
+        dark_exptime=2.0,
+        exptime=1.0,
+        badpix=badpix,
+    )
+    frames = np.full((2,) + shape, 150, dtype=np.uint16)
+    frames[1] += 10
+    frames[:, 2, 2] = 4095
+    frames[:, 0, 0] = 0
+
+    out = calib.apply(frames)
+
+    assert out.dtype == np.float32
+    np.testing.assert_allclose(out[0], 40.0)
+    np.testing.assert_allclose(out[1], 50.0)
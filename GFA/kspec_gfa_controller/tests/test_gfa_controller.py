@@ -576,3 +576,321 @@ def test_open_camera_open_failure_raises(controller, monkeypatch):
 
     with pytest.raises(Exception):
         controller.open_camera(2)
+
+
+# -------------------------
+# session mode
+# -------------------------
+@pytest.mark.asyncio
+async def test_session_keeps_cameras_open_across_grabs(controller, monkeypatch):
+    import kspec_gfa_controller.gfa_controller as real_mod
+
+    created = []
+
+    def cam_factory(dev_info):
+        cam = FakeInstantCamera(dev_info, open_state=False)
+        created.append(cam)
+        return cam
+
+    monkeypatch.setattr(real_mod.py, "InstantCamera", cam_factory, raising=True)
+
+    await controller.start_session()
+    assert len(created) == 2
+
+    for _ in range(3):
+        await controller.open_all_cameras()
+        await controller.close_all_cameras()
+
+    assert len(created) == 2
+    assert all(cam.IsOpen() for cam in created)
+
+    await controller.end_session()
+    assert controller.session_active is False
+    assert controller.open_cameras == {}
+    assert not any(cam.IsOpen() for cam in created)
+
+
+@pytest.mark.asyncio
+async def test_session_reopens_unhealthy_camera(controller, monkeypatch):
+    import kspec_gfa_controller.gfa_controller as real_mod
+
+    created = []
+
+    def cam_factory(dev_info):
+        cam = FakeInstantCamera(dev_info, open_state=False)
+        created.append(cam)
+        return cam
+
+    monkeypatch.setattr(real_mod.py, "InstantCamera", cam_factory, raising=True)
+
+    await controller.start_session()
+    stale = controller.open_cameras["Cam1"]
+    stale.Close()  # e.g. link dropped
+
+    await controller.open_all_cameras()
+
+    assert len(created) == 3
+    assert controller.open_cameras["Cam1"] is not stale
+    assert controller.open_cameras["Cam1"].IsOpen() is True
+
+
+@pytest.mark.asyncio
+async def test_session_grab_error_drops_camera_for_reopen(controller, monkeypatch):
+    cam = FakeInstantCamera(object(), open_state=True)
+    controller.open_cameras["Cam1"] = cam
+    controller.session_active = True
+
+    async def boom(*a, **k):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(controller, "configure_and_grab", boom)
+
+    out = await controller.grabone(CamNum=1, ExpTime=1.0, Binning=1)
+    assert out["timeout"] is True
+    assert "Cam1" not in controller.open_cameras
+    assert cam.IsOpen() is False
+
+
+def test_close_camera_closes_and_forgets(controller):
+    cam = FakeInstantCamera(object(), open_state=True)
+    controller.open_cameras["Cam1"] = cam
+
+    controller.close_camera(1)
+    controller.close_camera(2)  # not open: no-op
+
+    assert cam.IsOpen() is False
+    assert "Cam1" not in controller.open_cameras
+
+
+# -------------------------
+# parameter cache
+# -------------------------
+_GRAB_KW = dict(
+    Binning=4,
+    packet_size=1500,
+    ipd=10,
+    ftd_base=39000,
+    cam_index=0,
+    output_dir="OUT",
+    serial_hint="SERIALX",
+    save=False,
+)
+
+
+@pytest.mark.asyncio
+async def test_configure_and_grab_writes_unchanged_params_once(controller):
+    cam = FakeInstantCamera(object(), open_state=True)
+
+    await controller.configure_and_grab(cam=cam, ExpTime=1.0, **_GRAB_KW)
+    await controller.configure_and_grab(cam=cam, ExpTime=1.0, **_GRAB_KW)
+    await controller.configure_and_grab(cam=cam, ExpTime=2.0, **_GRAB_KW)
+
+    assert cam.GevSCPSPacketSize.set_calls == [1500]
+    assert cam.GevSCPD.set_calls == [10]
+    assert cam.BinningHorizontal.set_calls == [4]
+    assert cam.BinningVertical.set_calls == [4]
+    assert cam.PixelFormat.set_calls == ["Mono12"]
+    assert cam.ExposureTime.set_calls == [1_000_000, 2_000_000]
+
+
+@pytest.mark.asyncio
+async def test_apply_params_failure_invalidates_cache(controller):
+    cam = FakeInstantCamera(object(), open_state=True)
+    assert await controller.apply_params(cam, [("GevSCPD", 10)]) == ["GevSCPD"]
+    assert await controller.apply_params(cam, [("GevSCPD", 10)]) == []
+
+    def fail(_v):
+        raise RuntimeError("write failed")
+
+    cam.ExposureTime.SetValue = fail
+    with pytest.raises(RuntimeError):
+        await controller.apply_params(cam, [("ExposureTime", 5)])
+
+    # Everything is written again after a failed write
+    assert await controller.apply_params(cam, [("GevSCPD", 10)]) == ["GevSCPD"]
+
+
+@pytest.mark.asyncio
+async def test_close_all_cameras_forgets_applied_params(controller):
+    cam = FakeInstantCamera(object(), open_state=True)
+    controller.open_cameras["Cam1"] = cam
+    await controller.apply_params(cam, [("GevSCPD", 10)])
+
+    await controller.close_all_cameras()
+
+    assert controller._applied_params == {}
+
+
+# -------------------------
+# continuous acquisition
+# -------------------------
+class FakeStreamResult:
+    def __init__(self, arr, ok=True, skipped=0):
+        self._arr = arr
+        self._ok = ok
+        self._skipped = skipped
+        self.released = False
+
+    def GrabSucceeded(self):
+        return self._ok
+
+    def GetNumberOfSkippedImages(self):
+        return self._skipped
+
+    def GetArray(self):
+        return self._arr
+
+    def Release(self):
+        self.released = True
+
+
+class FakeStreamingCamera(FakeInstantCamera):
+    def __init__(self, results=None, raise_timeout=False):
+        super().__init__(object(), open_state=True)
+        self.MaxNumBuffer = FakeNode(10)
+        self._results = list(results or [])
+        self._stream_timeout = raise_timeout
+        self._grabbing = False
+        self.start_calls = []
+        self.stop_calls = 0
+
+    def StartGrabbingMax(self, n, strategy):
+        self.start_calls.append((n, strategy))
+        self._results = self._results[:n]
+        self._grabbing = True
+
+    def IsGrabbing(self):
+        return self._grabbing
+
+    def RetrieveResult(self, timeout_ms, handling):
+        if self._stream_timeout:
+            raise FakeTimeoutException("timeout")
+        result = self._results.pop(0)
+        if not self._results:
+            self._grabbing = False
+        return result
+
+    def StopGrabbing(self):
+        self.stop_calls += 1
+        self._grabbing = False
+
+
+@pytest.fixture
+def stream_constants(gc_module, monkeypatch):
+    monkeypatch.setattr(gc_module.py, "GrabStrategy_OneByOne", "OneByOne", raising=False)
+    monkeypatch.setattr(
+        gc_module.py, "TimeoutHandling_ThrowException", "Throw", raising=False
+    )
+
+
+def test_frame_ring_reuses_preallocated_buffers(gc_module):
+    import numpy as np
+
+    ring = gc_module.FrameRing(2)
+    a = ring.store(np.full((2, 2), 1, dtype=np.uint16))
+    b = ring.store(np.full((2, 2), 2, dtype=np.uint16))
+    c = ring.store(np.full((2, 2), 3, dtype=np.uint16))
+
+    assert a is c  # slot reused after `size` frames
+    assert a is not b
+    assert int(b[0, 0]) == 2 and int(c[0, 0]) == 3
+
+    with pytest.raises(ValueError):
+        gc_module.FrameRing(0)
+
+
+@pytest.mark.asyncio
+async def test_grab_stream_configures_once_and_counts(controller, stream_constants):
+    import numpy as np
+
+    results = [
+        FakeStreamResult(np.full((2, 2), i, dtype=np.uint16), skipped=1 if i == 2 else 0)
+        for i in range(4)
+    ]
+    results.insert(1, FakeStreamResult(None, ok=False))
+    cam = FakeStreamingCamera(results)
+    controller.open_cameras["Cam1"] = cam
+
+    out = await controller.grab_stream(CamNum=1, ExpTime=1.0, Binning=4, ExpNum=5)
+
+    assert cam.start_calls == [(5, "OneByOne")]
+    assert cam.stop_calls == 1
+    assert cam.ExposureTime.set_calls == [1_000_000]
+    assert all(r.released for r in results)
+
+    assert [int(img[0, 0]) for img in out["images"]] == [0, 1, 2, 3]
+    assert out["serial"] == "SERIAL123"
+    assert out["timeout"] is True  # one failed frame: 4/5 delivered
+
+    stats = controller.status()["stream"]["Cam1"]
+    assert stats["frames"] == 4
+    assert stats["failed"] == 1
+    assert stats["skipped"] == 1
+    assert stats["timeouts"] == 0
+
+
+@pytest.mark.asyncio
+async def test_grab_stream_feeds_combiner(controller, stream_constants):
+    import numpy as np
+
+    added = []
+
+    class _Combiner:
+        def add(self, frame):
+            added.append(int(frame[0, 0]))
+
+    results = [FakeStreamResult(np.full((2, 2), i, dtype=np.uint16)) for i in range(3)]
+    controller.open_cameras["Cam1"] = FakeStreamingCamera(results)
+
+    out = await controller.grab_stream(
+        CamNum=1, ExpTime=1.0, Binning=4, ExpNum=3, combiner=_Combiner()
+    )
+
+    assert added == [0, 1, 2]
+    assert out["images"] == []
+    assert out["nframes"] == 3
+    assert out["timeout"] is False
+
+
+@pytest.mark.asyncio
+async def test_stream_frames_slow_consumer_drops_instead_of_overwriting(
+    controller, stream_constants
+):
+    import asyncio
+    import numpy as np
+
+    results = [FakeStreamResult(np.full((2, 2), i, dtype=np.uint16)) for i in range(6)]
+    cam = FakeStreamingCamera(results)
+
+    seen = []
+    async for frame in controller.stream_frames(
+        cam,
+        1.0,
+        4,
+        6,
+        packet_size=1500,
+        ipd=10,
+        ftd_base=0,
+        cam_key="Cam1",
+        ring_size=1,
+    ):
+        seen.append(int(frame[0, 0]))
+        await asyncio.sleep(0.01)
+
+    stats = controller.stream_stats["Cam1"]
+    assert stats["frames"] + stats["dropped"] == 6
+    assert len(seen) == stats["frames"]
+    assert seen == sorted(seen)
+
+
+@pytest.mark.asyncio
+async def test_grab_stream_timeout(controller, stream_constants):
+    cam = FakeStreamingCamera(raise_timeout=True)
+    controller.open_cameras["Cam1"] = cam
+
+    out = await controller.grab_stream(CamNum=1, ExpTime=1.0, Binning=4, ExpNum=3)
+
+    assert out["images"] == []
+    assert out["timeout"] is True
+    assert controller.stream_stats["Cam1"]["timeouts"] == 1
+    assert cam.stop_calls == 1
@@ -0,0 +1,74 @@
+# tests/test_gfa_frame.py
+import numpy as np
+from astropy.io import fits
+
+from kspec_gfa_controller.gfa_frame import GFAFrame
+
+
+def _frame(ra="10.0", dec="20.0"):
+    hdr = fits.Header()
+    hdr["RA"] = ra
+    hdr["DEC"] = dec
+    hdr["EXPTIME"] = 1.0
+    return GFAFrame(
+        data=np.arange(16, dtype=np.float32).reshape(4, 4),
+        header=hdr,
+        provenance={"name": "D20260121_T171409_111_exp1s", "cam_num": 1},
+    )
+
+
+def _wcs_header():
+    hdr = fits.Header()
+    hdr["CTYPE1"] = "RA---TAN"
+    hdr["CTYPE2"] = "DEC--TAN"
+    hdr["CRVAL1"] = 10.0
+    hdr["CRVAL2"] = 20.0
+    hdr["CRPIX1"] = 2.0
+    hdr["CRPIX2"] = 2.0
+    hdr["CDELT1"] = -0.001
+    hdr["CDELT2"] = 0.001
+    return hdr
+
+
+def test_radec_unknown_is_none():
+    assert _frame().radec == ("10.0", "20.0")
+    assert _frame(ra="UNKNOWN").radec is None
+
+
+def test_set_wcs_records_source():
+    frame = _frame()
+    frame.set_wcs(_wcs_header(), source="reuse")
+
+    assert tuple(frame.wcs.wcs.crval) == (10.0, 20.0)
+    assert frame.provenance["wcs"] == "reuse"
+
+
+def test_write_merges_wcs_and_records_file(tmp_path):
+    frame = _frame()
+    frame.set_wcs(_wcs_header())
+
+    raw = frame.write(str(tmp_path / "raw" / "a.fits"), with_wcs=False)
+    astro = frame.write(str(tmp_path / "astro_a.fits"))
+
+    assert "CRVAL1" not in fits.getheader(raw)
+    hdr = fits.getheader(astro)
+    assert hdr["CRVAL1"] == 10.0
+    assert hdr["EXPTIME"] == 1.0
+    assert np.array_equal(fits.getdata(astro), frame.data)
+    assert frame.provenance["files"] == [raw, astro]
+
+
+def test_write_fsync_overwrites_and_syncs(tmp_path, monkeypatch):
+    import os
+
+    synced = []
+    real_fsync = os.fsync
+    monkeypatch.setattr(os, "fsync", lambda fd: synced.append(fd) or real_fsync(fd))
+
+    path = tmp_path / "frame.fits"
+    path.write_bytes(b"old")
+    _frame().write(str(path), fsync=True)
+
+    assert len(synced) == 1
+    with fits.open(path) as hdul:
+        assert hdul[0].data.shape == (4, 4)
@@ -562,6 +562,7 @@ def test_get_crvals_from_images_preserves_order_and_nan(tmp_path, monkeypatch, l
         keep_work_dir=False,
         solve_field=None,
         subprocess_env=None,
+        solver=None,
     ):
         name = Path(p).name
         if name in ("i1.fits", "i3.fits"):
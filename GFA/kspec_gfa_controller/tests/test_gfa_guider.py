@@ -1088,3 +1088,47 @@ def test_exe_cal_success_minimal_flow(tmp_path, guider_config, monkeypatch):
 
     fdx, fdy, fwhm = g.exe_cal()
     assert fdx == 1.23 and fdy == 4.56 and fwhm == 0.78
+
+
+# -------------------------
+# measure_frame(): in-memory frame
+# -------------------------
+def test_measure_frame_uses_frame_data_and_wcs(guider_config, monkeypatch):
+    g = _mk_guider(guider_config)
+
+    class _Frame:
+        name = "D20260121_T171409_111_exp1s"
+        data = np.zeros((4, 4))
+        wcs = object()
+        wcs_header = {"CRVAL1": 10.0, "CRVAL2": 20.0}
+
+    frame = _Frame()
+    seen = {}
+
+    def fake_measure_image(data, wcs, crval1, crval2, label, counter, stack):
+        seen.update(data=data, wcs=wcs, crval=(crval1, crval2), label=label)
+        return "ok"
+
+    monkeypatch.setattr(g, "measure_image", fake_measure_image)
+    monkeypatch.setattr(
+        g,
+        "load_only_image",
+        lambda *a: (_ for _ in ()).throw(AssertionError("no FITS read expected")),
+    )
+
+    assert g.measure_frame(frame, 1, []) == "ok"
+    assert seen["data"] is frame.data
+    assert seen["wcs"] is frame.wcs
+    assert seen["crval"] == (10.0, 20.0)
+    assert seen["label"] == frame.name
+
+
+def test_measure_frame_without_wcs_raises(guider_config):
+    g = _mk_guider(guider_config)
+
+    class _Frame:
+        name = "x"
+        wcs = None
+
+    with pytest.raises(ValueError):
+        g.measure_frame(_Frame(), 1, [])
@@ -410,3 +410,134 @@ def test_hot_pixel_removal_keep_dtype_integer_roundtrip():
     assert out.dtype == np.uint16
     # 주변 median=0 => 치환되면 0
     assert out[2, 2] == 0
+
+
+def test_make_frame_keeps_image_in_memory(tmp_path, logger, monkeypatch):
+    img = GFAImage(logger=logger)
+    frames = [np.ones((4, 4), dtype=np.uint16) * 10 for _ in range(3)]
+
+    monkeypatch.chdir(tmp_path)
+    frame = img.make_frame(
+        frames,
+        exptime=3.0,
+        date_obs="2025-12-17",
+        time_obs="00:00:00",
+        ra="10.0",
+        dec="20.0",
+        name="D20251217_T000000_111_exp1s",
+        cam_num=1,
+        serial="111",
+    )
+
+    assert list(tmp_path.iterdir()) == []
+    assert frame.data.dtype == np.float32
+    assert frame.header["NCOMB"] == 3
+    assert frame.radec == ("10.0", "20.0")
+    assert frame.provenance == {
+        "cam_num": 1,
+        "serial": "111",
+        "name": "D20251217_T000000_111_exp1s",
+    }
+
+
+@pytest.mark.parametrize("mode", ["mirror", "reflect", "nearest", "wrap", "constant"])
+def test_ring_median_matches_scipy_median_filter(mode):
+    from scipy.ndimage import median_filter
+
+    rng = np.random.default_rng(1)
+    img = rng.normal(100.0, 10.0, (17, 23)).astype(np.float32)
+    footprint = np.array([[1, 1, 1], [1, 0, 1], [1, 1, 1]], dtype=np.uint8)
+
+    expected = median_filter(img, footprint=footprint, mode=mode)
+    assert np.array_equal(mod._ring_median(img, mode=mode), expected)
+
+
+def test_hot_pixel_removal_batch_matches_per_frame():
+    rng = np.random.default_rng(2)
+    frames = rng.normal(100.0, 5.0, (3, 12, 12)).astype(np.float32)
+    frames[0, 3, 4] = 5000.0
+    frames[2, 0, 0] = 8000.0
+
+    batch = GFAImage.hot_pixel_removal_median_ratio(frames, factor=1.5, n_iter=2)
+    single = [
+        GFAImage.hot_pixel_removal_median_ratio(f, factor=1.5, n_iter=2)
+        for f in frames
+    ]
+
+    assert batch.shape == frames.shape
+    for got, want in zip(batch, single):
+        assert np.array_equal(got, want)
+    assert batch[0, 3, 4] < 200.0
+    assert batch[2, 0, 0] < 200.0
+
+
+@pytest.mark.parametrize("nframes", [2, 5, 16])
+def test_frame_combiner_matches_sigma_clip_mean(nframes):
+    from astropy.stats import sigma_clip
+
+    rng = np.random.default_rng(3)
+    stack = rng.normal(1000.0, 30.0, (nframes, 16, 16)).round().astype(np.uint16)
+    stack[0, ::3, ::5] = 4000
+    stack[-1, ::4, ::7] = 10
+
+    expected = np.ma.mean(sigma_clip(stack.astype(float), sigma=3, axis=0), axis=0)
+    expected = expected.filled(np.nan).astype(np.float32)
+
+    comb = mod.FrameCombiner(sigma=3)
+    comb.extend(stack)
+
+    assert comb.count == nframes
+    np.testing.assert_allclose(comb.result(), expected, rtol=1e-6)
+
+
+def test_frame_combiner_bounded_chunks_reject_outliers():
+    frames = [np.full((4, 4), 100.0 + (i % 3), dtype=np.float32) for i in range(30)]
+    frames[14] = frames[14].copy()
+    frames[14][1, 1] = 9000.0
+
+    comb = mod.FrameCombiner(chunk_size=12)
+    comb.extend(frames)
+
+    assert comb._chunk.shape[0] == 12
+    out = comb.result()
+    assert out.dtype == np.float32
+    assert out[1, 1] < 102.0
+
+    with pytest.raises(ValueError):
+        comb.add(np.zeros((3, 3)))
+
+
+def test_make_frame_accepts_filled_combiner(logger):
+    img = GFAImage(logger)
+    frames = [np.full((6, 6), v, dtype=np.uint16) for v in (10, 12, 14)]
+
+    comb = img.frame_combiner()
+    comb.extend(frames)
+    frame = img.make_frame(comb, exptime=3.0, date_obs="2024-01-01", time_obs="00:00:00")
+
+    assert frame.header["NCOMB"] == 3
+    assert frame.header["COMBINE"] == "SIGMA_MEAN"
+    np.testing.assert_allclose(frame.data, 12.0)
+
+
+def test_make_frame_uses_calibration_instead_of_hot_pixel_search(logger, monkeypatch):
+    from kspec_gfa_controller.gfa_calib import CalibrationSet
+
+    img = GFAImage(logger)
+    monkeypatch.setattr(
+        GFAImage,
+        "hot_pixel_removal_median_ratio",
+        staticmethod(lambda *a, **k: pytest.fail("hot pixel search not expected")),
+    )
+    badpix = np.zeros((6, 6), dtype=bool)
+    badpix[3, 3] = True
+    calib = CalibrationSet(bias=np.full((6, 6), 10.0, np.float32), badpix=badpix)
+    raw = np.full((6, 6), 30, dtype=np.uint16)
+    raw[3, 3] = 4000
+
+    frame = img.make_frame(
+        [raw, raw], exptime=2.0, date_obs="2024-01-01", time_obs="00:00:00", calib=calib
+    )
+
+    np.testing.assert_allclose(frame.data, 20.0)
+    assert frame.header["CALIB"] == "bias+badpix"
@@ -0,0 +1,103 @@
+# tests/test_gfa_index.py
+import os
+import threading
+import time
+
+import numpy as np
+from astropy.io import fits
+
+from kspec_gfa_controller.gfa_index import (
+    IndexWarmer,
+    index_dirs_from_config,
+    radec_to_healpix,
+)
+
+
+def _index(path, healpix=None, nside=None, nbytes=4096):
+    hdr = fits.Header()
+    if healpix is not None:
+        hdr["HEALPIX"] = healpix
+        hdr["HPNSIDE"] = nside
+    fits.PrimaryHDU(data=np.zeros(nbytes // 4, np.float32), header=hdr).writeto(path)
+    return str(path)
+
+
+def test_radec_to_healpix_base_pixels():
+    # equatorial base pixels are centred on RA 0/90/180/270; polar ones in between
+    assert [radec_to_healpix(ra, 0.0, 1) for ra in (0, 90, 180, 270)] == [4, 5, 6, 7]
+    assert [radec_to_healpix(ra, 60.0, 1) for ra in (45, 135, 225, 315)] == [0, 1, 2, 3]
+    assert [radec_to_healpix(ra, -60.0, 1) for ra in (45, 135, 225, 315)] == [8, 9, 10, 11]
+    # sub pixels stay inside their base pixel
+    for ra, dec in [(10.0, 5.0), (100.0, 50.0), (300.0, -70.0)]:
+        for nside in (2, 4):
+            assert radec_to_healpix(ra, dec, nside) // nside**2 == radec_to_healpix(
+                ra, dec, 1
+            )
+
+
+def test_select_and_warm_tile_indexes(tmp_path):
+    here = radec_to_healpix(0.0, 0.0, 2)
+    far = radec_to_healpix(180.0, 0.0, 2)
+    tile = _index(tmp_path / f"index-5206-{here:02d}.fits", here, 2)
+    _index(tmp_path / f"index-5206-{far:02d}.fits", far, 2)
+    allsky = _index(tmp_path / "index-4110.fits")
+
+    w = IndexWarmer([str(tmp_path)], rewarm_s=60)
+
+    assert [f.path for f in w.select(0.0, 0.0, 2.0)] == [allsky, tile]
+
+    r = w.warm(0.0, 0.0, 2.0)
+    assert r["files"] == 2
+    assert r["bytes"] == os.path.getsize(tile) + os.path.getsize(allsky)
+
+    # still warm: not read again
+    again = w.warm(0.0, 0.0, 2.0)
+    assert again["bytes"] == 0 and again["skipped"] == 2
+
+
+def test_stop_aborts_warm(tmp_path):
+    _index(tmp_path / "index-4110.fits")
+    w = IndexWarmer([str(tmp_path)])
+    w._warm_file = lambda path, cancel: w.stop()
+    r = w.warm(0.0, 0.0, 2.0)
+    assert r["bytes"] == 0
+    assert not w._warmed
+
+    # a later warm() is not affected by the earlier stop()
+    del w._warm_file
+    assert w.warm(0.0, 0.0, 2.0)["files"] == 1 and w._warmed
+
+    # a token set before the call starts aborts it
+    cancel = threading.Event()
+    cancel.set()
+    w2 = IndexWarmer([str(tmp_path)])
+    assert w2.warm(0.0, 0.0, 2.0, cancel=cancel)["bytes"] == 0
+    assert not w2._warmed
+
+
+def test_overlapping_warms_skip_files_in_flight(tmp_path):
+    allsky = _index(tmp_path / "index-4110.fits")
+    w = IndexWarmer([str(tmp_path)])
+    inner = []
+
+    def warm_file(path, cancel):
+        # a second warm() of the same tile while this file is being read
+        if not inner:
+            inner.append(w.warm(0.0, 0.0, 2.0))
+
+    w._warm_file = warm_file
+    r = w.warm(0.0, 0.0, 2.0)
+
+    assert inner[0]["skipped"] == 1 and inner[0]["bytes"] == 0
+    assert r["bytes"] == os.path.getsize(allsky)
+    assert not w._reading
+
+
+def test_index_dirs_from_config(tmp_path):
+    cfg = tmp_path / "etc" / "astrometry.cfg"
+    cfg.parent.mkdir()
+    cfg.write_text(
+        "inparallel\n# add_path /nope\nadd_path ../data  # local\nadd_path /abs/idx\n"
+    )
+    assert index_dirs_from_config(str(cfg)) == [str(tmp_path / "data"), "/abs/idx"]
+    assert index_dirs_from_config(str(tmp_path / "missing.cfg")) == []
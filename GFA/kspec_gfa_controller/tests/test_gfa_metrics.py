@@ -0,0 +1,69 @@
+# tests/test_gfa_metrics.py
+import asyncio
+import json
+import time
+
+from kspec_gfa_controller.gfa_metrics import StageMetrics
+
+
+def test_stage_records_rolling_stats_per_camera():
+    m = StageMetrics(window=3)
+    for sec in (0.1, 0.2, 0.3, 0.4):
+        m.record("grab", sec, camera="Cam1")
+    with m.camera("Cam2"):
+        with m.stage("get_array"):
+            time.sleep(0.001)
+
+    s = m.summary()
+    assert s["stages"]["grab"]["n"] == 3  # window
+    assert s["stages"]["grab"]["last"] == 0.4
+    assert s["stages"]["grab"]["max"] == 0.4
+    assert s["cameras"]["Cam1"] == {"grab": 0.4}
+    assert s["cameras"]["Cam2"]["get_array"] > 0
+    assert s["last_cycle"] is None
+
+
+def test_cycle_collects_stages_from_tasks_and_threads(tmp_path):
+    m = StageMetrics()
+    path = tmp_path / "metrics" / "gfa.jsonl"
+    m.configure(path)
+
+    def _work():
+        m.record("solve", 0.5)
+
+    async def _camera(cam):
+        m.set_camera(cam)
+        m.record("grab", 0.1)
+        await asyncio.to_thread(_work)
+
+    async def _run():
+        record = m.start_cycle("guide", cycle=1)
+        tasks = [asyncio.create_task(_camera(f"Cam{i}")) for i in (1, 2)]
+        # a stage recorded after the next cycle started belongs to the old one
+        m.start_cycle("guide", cycle=2)
+        await asyncio.gather(*tasks)
+        return m.end_cycle(record, ok=True)
+
+    record = asyncio.run(_run())
+    m.configure(None)
+
+    assert record["stages"] == {"grab": 0.2, "solve": 1.0}
+    assert record["cameras"]["Cam2"] == {"grab": 0.1, "solve": 0.5}
+    assert record["ok"] is True and record["total"] >= 0
+    assert "_t0" not in record
+
+    line = json.loads(path.read_text().strip())
+    assert line["cycle"] == 1 and line["kind"] == "guide"
+    assert m.summary()["last_cycle"]["cycle"] == 1
+
+
+def test_metrics_file_is_rotated(tmp_path):
+    m = StageMetrics()
+    path = tmp_path / "gfa.jsonl"
+    m.configure(path, max_bytes=300, backup_count=2)
+    for i in range(20):
+        m.end_cycle(m.start_cycle("grab", cycle=i))
+    m.configure(None)
+
+    assert (tmp_path / "gfa.jsonl.1").exists()
+    assert not (tmp_path / "gfa.jsonl.3").exists()
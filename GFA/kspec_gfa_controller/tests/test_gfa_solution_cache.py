@@ -0,0 +1,77 @@
+# tests/test_gfa_solution_cache.py
+import json
+
+import numpy as np
+from astropy.io import fits
+
+from kspec_gfa_controller.gfa_solution_cache import SolutionCache
+
+
+def _hdr(crval1=10.0):
+    hdr = fits.Header()
+    hdr["CTYPE1"] = "RA---TAN"
+    hdr["CTYPE2"] = "DEC--TAN"
+    hdr["CRVAL1"] = crval1
+    hdr["CRVAL2"] = 20.0
+    return hdr
+
+
+def test_lookup_exact_then_same_tile(tmp_path):
+    cache = SolutionCache(tmp_path / "cache", tile_radius_arcsec=60)
+    data = np.arange(16, dtype=np.float32).reshape(4, 4)
+    corr = tmp_path / "x.corr"
+    corr.write_bytes(b"corr")
+    h = SolutionCache.image_hash(data)
+
+    cache.put("111", data.shape, (10.0, 20.0), h, _hdr(), str(corr))
+
+    hit = cache.lookup("111", (4, 4), (10.0, 20.0), SolutionCache.image_hash(data.copy()))
+    assert hit.exact and hit.wcs_header["CRVAL1"] == 10.0
+    assert open(hit.corr_path, "rb").read() == b"corr"
+
+    # different image, same camera and tile (30 arcsec away)
+    tile = cache.lookup("111", (4, 4), (10.0, 20.0 + 30 / 3600), "other")
+    assert tile is not None and not tile.exact and tile.radec == (10.0, 20.0)
+
+    assert cache.lookup("111", (4, 4), (10.0, 20.1), "other") is None  # off tile
+    assert cache.lookup("222", (4, 4), (10.0, 20.0), "other") is None  # camera
+    assert cache.lookup("111", (2, 2), (10.0, 20.0), "other") is None  # binning
+
+
+def test_index_persists_and_lru_eviction(tmp_path):
+    root = tmp_path / "cache"
+    cache = SolutionCache(root, max_entries=2)
+    for i in range(2):
+        cache.put("111", (4, 4), (10.0 + i, 20.0), f"h{i}", _hdr(10.0 + i))
+    assert cache.lookup("111", (4, 4), None, "h0") is not None  # h0 now most recent
+    cache.put("111", (4, 4), (12.0, 20.0), "h2", _hdr(12.0))
+
+    reopened = SolutionCache(root, max_entries=2)
+    assert len(reopened) == 2
+    assert reopened.lookup("111", (4, 4), None, "h1") is None  # evicted
+    assert reopened.lookup("111", (4, 4), None, "h0").wcs_header["CRVAL1"] == 10.0
+    assert len(list(root.glob("*.wcs"))) == 2
+    assert len(json.loads((root / "index.json").read_text())["entries"]) == 2
+
+
+def test_size_bound_evicts(tmp_path):
+    cache = SolutionCache(tmp_path / "cache", max_bytes=1)
+    cache.put("111", (4, 4), (10.0, 20.0), "h0", _hdr())
+    assert len(cache) == 0 and cache.total_bytes == 0
+
+
+def test_put_same_image_replaces_entry_and_hits_save_lazily(tmp_path):
+    root = tmp_path / "cache"
+    cache = SolutionCache(root)
+    first = cache.put("111", (4, 4), (10.0, 20.0), "h0", _hdr(10.0))
+    assert cache.put("111", (4, 4), (10.0, 20.0), "h0", _hdr(11.0)) == first
+    assert len(cache) == 1 and len(list(root.glob("*.wcs"))) == 1
+    assert cache.lookup("111", (4, 4), None, "h0").wcs_header["CRVAL1"] == 11.0
+
+    # a hit does not rewrite index.json; flush() does
+    saved = (root / "index.json").stat().st_mtime_ns
+    on_disk = json.loads((root / "index.json").read_text())["entries"][first]
+    assert on_disk["hits"] == 0
+    assert (root / "index.json").stat().st_mtime_ns == saved
+    cache.close()
+    assert json.loads((root / "index.json").read_text())["entries"][first]["hits"] == 1
@@ -0,0 +1,105 @@
+# tests/test_gfa_solver.py
+import asyncio
+import subprocess
+
+import pytest
+
+from kspec_gfa_controller.gfa_solver import SolverPool
+
+
+@pytest.fixture
+def pool():
+    p = SolverPool(max_workers=2, timeout=10)
+    yield p
+    p.shutdown()
+
+
+def _alive(pid):
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            state = f.read().rsplit(")", 1)[1].split()[0]
+    except FileNotFoundError:
+        return False
+    # a killed grandchild may linger as a zombie until init reaps it
+    return state != "Z"
+
+
+@pytest.mark.asyncio
+async def test_run_returns_output_and_timing(pool):
+    r = await pool.run(["sh", "-c", "echo out; echo err >&2; exit 3"])
+
+    assert r.returncode == 3
+    assert r.stdout.strip() == "out"
+    assert r.stderr.strip() == "err"
+    assert r.elapsed >= 0 and r.wait >= 0
+
+
+@pytest.mark.asyncio
+async def test_worker_count_bounds_concurrency(pool):
+    results = await asyncio.gather(*[pool.run(["sleep", "0.3"]) for _ in range(4)])
+
+    waits = sorted(r.wait for r in results)
+    assert waits[1] < 0.2  # two start at once
+    assert waits[2] > 0.2  # the others queue for a worker
+
+
+@pytest.mark.asyncio
+async def test_timeout_kills_process_group(pool, tmp_path):
+    pidfile = tmp_path / "child.pid"
+
+    with pytest.raises(subprocess.TimeoutExpired):
+        await pool.run(
+            ["sh", "-c", f"sleep 30 & echo $! > {pidfile}; wait"], timeout=0.5
+        )
+
+    await asyncio.sleep(0.1)
+    assert not _alive(int(pidfile.read_text()))
+    assert pool.status()["running"] == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelling_caller_kills_job(pool, tmp_path):
+    pidfile = tmp_path / "child.pid"
+    task = asyncio.create_task(
+        pool.run(["sh", "-c", f"sleep 30 & echo $! > {pidfile}; wait"])
+    )
+    for _ in range(50):
+        if pidfile.exists() and pidfile.read_text().strip():
+            break
+        await asyncio.sleep(0.05)
+
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    await asyncio.sleep(0.2)
+    assert not _alive(int(pidfile.read_text()))
+    assert pool.status() == {"workers": 2, "running": 0, "queued": 0}
+
+
+def test_run_sync_and_cancel_all_from_threads(pool):
+    import threading
+
+    results = []
+    t = threading.Thread(
+        target=lambda: results.append(_catch(pool.run_sync, ["sleep", "30"]))
+    )
+    t.start()
+    for _ in range(50):
+        if pool.status()["running"]:
+            break
+        threading.Event().wait(0.05)
+
+    assert pool.cancel_all() == 1
+    t.join(5)
+
+    assert not t.is_alive()
+    assert results and isinstance(results[0], BaseException)
+    assert pool.run_sync(["true"]).returncode == 0
+
+
+def _catch(fn, *args):
+    try:
+        return fn(*args)
+    except BaseException as e:  # CancelledError from the pool
+        return e
@@ -4,10 +4,10 @@ import kspec_gfa_controller as pkg
 
 
 def test_dunder_all_exports_expected_names():
-    assert set(pkg.__all__) == {"GFAActions", "GFAEnvironment", "GFAGuider"}
+    assert set(pkg.__all__) == {"GFAActions", "GFAEnvironment", "GFAFrame", "GFAGuider"}
 
 
-@pytest.mark.parametrize("name", ["GFAActions", "GFAEnvironment", "GFAGuider"])
+@pytest.mark.parametrize("name", ["GFAActions", "GFAEnvironment", "GFAFrame", "GFAGuider"])
 def test_getattr_lazy_import_returns_type(name):
     """
     다른 테스트에서 sys.modules/monkeypatch로 실제 클래스가 Fake로 치환될 수 있으므로,
@@ -4,7 +4,8 @@ import asyncio
 import json
 from aio_pika import IncomingMessage
 
-from Lib.AMQ import AMQclass, UDPClientProtocol, TCPClient
+from Lib.AMQ import AMQclass, UDPClient, TelcomClient, decode_message
+from Lib.config import get_config
 from ADC.adccli import handle_adc
 from GFA.gfacli import handle_gfa
 from FBP.fbpcli import handle_fbp
@@ -29,14 +30,18 @@ class KSPECRunner:
         self.SPEC_response_queue = asyncio.Queue()
 
         self.command_list = self.load_command_list()
-        self.tcsagentIP, self.tcsagentPort, self.telcomIP, self.telcomPort = self.load_config()
+        self.tcsagentIP, self.tcsagentPort, self.telcomIP, self.telcomPort, telcom_cache_ttl = self.load_config()
+        self.telcom_client = TelcomClient(self.telcomIP, self.telcomPort, cache_ttl=telcom_cache_ttl)
+        get_config().watch(self.on_tcs_config_change, section='TCS')
+        self.tcs_udp = UDPClient(self.tcsagentIP, self.tcsagentPort)
         self.scriptrun = script()
+        self.scriptrun.udp_metrics = self.tcs_udp.metrics
         
     def load_command_list(self):
         return {
             "adc": ["adcstatus", "adcactivate", "adcadjust", "adcconnect", "adcdisconnect", "adchome", "adczero",
             "adcpoweroff", "adcrotate1", "adcrotate2", "adcstop", "adcpark", "adcctrotate", "adccorotate"],
-            "gfa": ["gfastatus", "gfagrab", "gfaguidestop", "gfaguide","fdgrab"],
+            "gfa": ["gfastatus", "gfagrab", "gfaguidestop", "gfaguide","gfacalib","fdgrab"],
             "fbp": ["fbpstatus", "fbpzero", "fbpmove", "fbpoffset"],
 #            "endo": ["endoguide", "endotest", "endofocus", "endostop","endoexpset","endoclear","endostatus"],
             "mtl": ["mtlstatus", "mtlexp", "mtlcal"],
@@ -58,16 +63,21 @@ class KSPECRunner:
     
     def load_config(self):
         """Loads configuration settings from KSPEC.ini."""
-        with open('./Lib/KSPEC.ini', 'r') as f:
-            kspecinfo = json.load(f)
+        kspecinfo = get_config()
 
         return (
             kspecinfo['TCS']['TCSagentIP'],
             kspecinfo['TCS']['TCSagentPort'],
             kspecinfo['TCS']['TelcomIP'],
-            kspecinfo['TCS']['TelcomPort']
+            kspecinfo['TCS']['TelcomPort'],
+            kspecinfo['TCS'].get('TelcomCacheTTL', 0.5)
         )
 
+    def on_tcs_config_change(self, changed, config):
+        """Apply a reloaded TelcomCacheTTL without restarting."""
+        if ('TCS', 'TelcomCacheTTL') in changed:
+            self.telcom_client.cache_ttl = config.get('TCS', 'TelcomCacheTTL', 0.5)
+
     def find_category(self, cmd):
         """Finds the category of a given command."""
         return next((cat for cat, cmds in self.command_list.items() if cmd in cmds), None)
@@ -109,7 +119,7 @@ class KSPECRunner:
     async def on_ics_message(self, message: IncomingMessage):
         async with message.process():
             try:
-                response_data = json.loads(message.body)
+                response_data = decode_message(message.body, message.content_type)
                 print(response_data)
                 inst = response_data.get('inst', 'None')
                 process = response_data.get('process', 'None')
@@ -123,6 +133,9 @@ class KSPECRunner:
                 else:
                     print(f'\033[94m[ICS] received from {inst}: {response_data["message"]}\033[0m\n', flush=True)
 
+                if self.ICS_client.resolve_reply(response_data):
+                    return
+
                 queue_map = {"GFA": self.GFA_response_queue, "ADC": self.ADC_response_queue, "SPEC": self.SPEC_response_queue}
                 if inst in queue_map and process == 'ING':
                     await queue_map[inst].put(response_data)
@@ -133,27 +146,18 @@ class KSPECRunner:
                 print(f"Error in wait_for_response: {e}", flush=True)
 
     ### Sending command to udp, telcom and rabbitmq ###
-    async def send_udp_message(self, message):
+    async def send_udp_message(self, message, wait_reply=False, timeout=1.0):
         """
-        Sends a message to the TCS Agent via UDP using UDPClientProtocol 
+        Sends a message to the TCS Agent over the persistent UDP endpoint.
+        If wait_reply is True, returns the reply datagram (None on timeout).
         """
-        loop = asyncio.get_running_loop()
-        on_con_lost = loop.create_future()
-        transport, protocol = await loop.create_datagram_endpoint(
-            lambda: UDPClientProtocol(on_con_lost),
-            remote_addr=(self.tcsagentIP, self.tcsagentPort)
-        )
 
         print(f"\033[32m[ICS] sent TCS message to TCS Agent: {message}\033[0m", flush=True)
-        transport.sendto(message.encode())
-        transport.close()        
+        return await self.tcs_udp.send(message, wait_reply=wait_reply, timeout=timeout)
 
     async def send_telcom_command(self,message):
         """Sends a command to the Telcom system via TCP."""
-        telcom_client = TCPClient(self.telcomIP,self.telcomPort)
-        await telcom_client.connect()
-        result = await handle_telcom(message,telcom_client)
-        await telcom_client.close()
+        result = await handle_telcom(message,self.telcom_client)
         return result
 
     async def send_command(self, category, message):
@@ -183,6 +187,8 @@ class KSPECRunner:
                     print("Exiting user input mode and shutting down", flush=True)
                     self.running = False
                     await self.ICS_client.disconnect()
+                    await self.telcom_client.close()
+                    self.tcs_udp.close()
                     break
                 
                 print('\n')
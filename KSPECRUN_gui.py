@@ -22,7 +22,8 @@ from datetime import datetime, timezone
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 import numpy as np
-from Lib.AMQ import AMQclass, UDPClientProtocol, TCPClient
+from Lib.AMQ import AMQclass, UDPClient, TelcomClient, decode_message, json_default
+from Lib.config import get_config
 from ADC.adccli import handle_adc
 from GFA.gfacli import handle_gfa
 from FBP.fbpcli import handle_fbp
@@ -169,7 +170,11 @@ class MainWindow(QMainWindow):
         self.observer = None
         self.obsdir = None
         self.command_list = self.load_command_list()
-        self.tcsagentIP, self.tcsagentPort, self.telcomIP, self.telcomPort = self.load_config()
+        self.tcsagentIP, self.tcsagentPort, self.telcomIP, self.telcomPort, telcom_cache_ttl = self.load_config()
+        self.telcom_client = TelcomClient(self.telcomIP, self.telcomPort, cache_ttl=telcom_cache_ttl)
+        get_config().watch(self.on_tcs_config_change, section='TCS')
+        self.tcs_udp = UDPClient(self.tcsagentIP, self.tcsagentPort)
+        self.scriptrun.udp_metrics = self.tcs_udp.metrics
 
         self.gfaexpt = None
         self.gfacam = 0
@@ -377,7 +382,7 @@ class MainWindow(QMainWindow):
 ### Logging function ###
     def logging(self,message,status: str='success', level: str='send', save: str=True):
         if isinstance(message,dict):
-            message=json.dumps(message)
+            message=json.dumps(message, default=json_default)
 
         color_map={
                 "send": "green", "receive": "blue", "error": "red", "warning": "orange",
@@ -1735,7 +1740,7 @@ class MainWindow(QMainWindow):
     async def on_ics_message(self, message: IncomingMessage):
         async with message.process():
             try:
-                response_data = json.loads(message.body)
+                response_data = decode_message(message.body, message.content_type)
 
                 inst = response_data.get("inst", "None")
                 process = response_data.get("process", "None")
@@ -1752,22 +1757,28 @@ class MainWindow(QMainWindow):
                 # 2. 수신 로그 출력
                 self._log_received_message(inst, msg, status)
 
-                # 3. 진행 중 메시지는 각 장비별 queue로 전달
+                # 3. request()로 보낸 명령의 응답은 대기 중인 future로 전달
+                if self.ICS_client is not None and self.ICS_client.resolve_reply(response_data):
+                    if inst == "SPEC" and response_data.get("filename") != "None":
+                        self.show_spec(response_data)
+                    return
+
+                # 4. 진행 중 메시지는 각 장비별 queue로 전달
                 if await self._handle_in_progress_response(response_data, inst, process):
                     return
 
-                # 4. GFA POINT 완료 처리
+                # 5. GFA POINT 완료 처리
                 if inst == "GFA" and process == "Done" and subinst == "POINT":
                     await self._handle_gfa_point_response(response_data, status)
                     return
 
-                # 5. SPEC image 처리
+                # 6. SPEC image 처리
                 if inst == "SPEC" and response_data.get("filename") != "None":
                     self.show_spec(response_data)
                     await self.response_queue.put(response_data)
                     return
 
-                # 6. 그 외 일반 응답
+                # 7. 그 외 일반 응답
                 await self.response_queue.put(response_data)
 
             except Exception as e:
@@ -1776,28 +1787,19 @@ class MainWindow(QMainWindow):
 
 
     ### Sending command to udp, telcom and rabbitmq ###
-    async def send_udp_message(self, message):
+    async def send_udp_message(self, message, wait_reply=False, timeout=1.0):
         """
-        Sends a message to the TCS Agent via UDP using UDPClientProtocol 
+        Sends a message to the TCS Agent over the persistent UDP endpoint.
+        If wait_reply is True, returns the reply datagram (None on timeout).
         """
-        loop = asyncio.get_running_loop()
-        on_con_lost = loop.create_future()
-        transport, protocol = await loop.create_datagram_endpoint(
-            lambda: UDPClientProtocol(on_con_lost),
-            remote_addr=(self.tcsagentIP, self.tcsagentPort)
-        )
 
         print(f"\033[32m[ICS] sent TCS message to TCS Agent: {message}\033[0m", flush=True)
         self.logging(f'sent TCS message to TCS Agent: {message}',level='send')
-        transport.sendto(message.encode())
-        transport.close()
+        return await self.tcs_udp.send(message, wait_reply=wait_reply, timeout=timeout)
 
     async def send_telcom_command(self,message):
         """Sends a command to the Telcom system via TCP."""
-        telcom_client = TCPClient(self.telcomIP,self.telcomPort)
-        await telcom_client.connect()
-        result = await handle_telcom(message,telcom_client)
-        await telcom_client.close()
+        result = await handle_telcom(message,self.telcom_client)
         self.ui.lineEdit_cmd.clear()
         self.ui.lineEdit_cmd_2.clear()
         return result
@@ -1899,16 +1901,21 @@ class MainWindow(QMainWindow):
 
     def load_config(self):
         """Loads configuration settings from KSPEC.ini."""
-        with open('./Lib/KSPEC.ini', 'r') as f:
-            kspecinfo = json.load(f)
+        kspecinfo = get_config()
 
         return (
             kspecinfo['TCS']['TCSagentIP'],
             kspecinfo['TCS']['TCSagentPort'],
             kspecinfo['TCS']['TelcomIP'],
-            kspecinfo['TCS']['TelcomPort']
+            kspecinfo['TCS']['TelcomPort'],
+            kspecinfo['TCS'].get('TelcomCacheTTL', 0.5)
         )
 
+    def on_tcs_config_change(self, changed, config):
+        """Apply a reloaded TelcomCacheTTL without restarting."""
+        if ('TCS', 'TelcomCacheTTL') in changed:
+            self.telcom_client.cache_ttl = config.get('TCS', 'TelcomCacheTTL', 0.5)
+
     def find_category(self, cmd):
         """Finds the category of a given command."""
         return next((cat for cat, cmds in self.command_list.items() if cmd in cmds), None)
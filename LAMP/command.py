@@ -4,66 +4,30 @@ import Lib.mkmessage as mkmsg
 import json
 import asyncio
 import time
+from Lib.offload import run_blocking
+from Lib.dispatcher import Dispatcher
+
+lamp = Dispatcher('LAMP', mkmsg.lampmsg)
+
 
 async def identify_execute(server,cmd):
-    dict_data=json.loads(cmd)
-    func=dict_data['func']
-
-    if func == 'lampstatus':
-        comment=lamp_status()
-        reply_data=mkmsg.lampmsg()
-        reply_data.update(message=comment,process='Done')
-        rsp=json.dumps(reply_data)
-        print('\033[32m'+'[LAMP]', comment+'\033[0m')
-        await server.send_message('ICS',rsp)
-
-    if func == 'arcon':
-        comment=arc_on()
-        reply_data=mkmsg.lampmsg()
-        reply_data.update(message=comment,process='ING',status='success',subinst='ARC')
-        rsp=json.dumps(reply_data)
-        print('\033[32m'+'[LAMP]', comment+'\033[0m')
-        await server.send_message('ICS',rsp)
-
-    if func == 'arcoff':
-        comment=arc_off()
-        reply_data=mkmsg.lampmsg()
-        reply_data.update(message=comment,process='Done',status='success',subinst='ARC')
-        rsp=json.dumps(reply_data)
-        print('\033[32m'+'[LAMP]', comment+'\033[0m')
-        await server.send_message('ICS',rsp)
-
-    if func == 'flaton':
-        comment=flat_on()
-        reply_data=mkmsg.lampmsg()
-        reply_data.update(message=comment,process='ING',status='success',subinst='FLAT')
-        rsp=json.dumps(reply_data)
-        print('\033[32m'+'[LAMP]', comment+'\033[0m')
-        await server.send_message('ICS',rsp)
-
-    if func == 'flatoff':
-        comment=flat_off()
-        reply_data=mkmsg.lampmsg()
-        reply_data.update(message=comment,process='Done',status='success',subinst='FLAT')
-        rsp=json.dumps(reply_data)
-        print('\033[32m'+'[LAMP]', comment+'\033[0m')
-        await server.send_message('ICS',rsp)
-
-    if func == 'fiducialon':
-        comment=fiducial_on()
-        reply_data=mkmsg.lampmsg()
-        reply_data.update(message=comment,process='ING',status='success',subinst='FIDUCIAL')
-        rsp=json.dumps(reply_data)
-        print('\033[32m'+'[LAMP]', comment+'\033[0m')
-        await server.send_message('ICS',rsp)
-
-    if func == 'fiducialoff':
-        comment=fiducial_off()
-        reply_data=mkmsg.lampmsg()
-        reply_data.update(message=comment,process='Done',status='success',subinst='FIDUCIAL')
-        rsp=json.dumps(reply_data)
-        print('\033[32m'+'[LAMP]', comment+'\033[0m')
-        await server.send_message('ICS',rsp)
+    await lamp.dispatch(server, cmd)
+
+
+@lamp.command('lampstatus')
+async def handle_lampstatus(server, dict_data):
+    comment=await run_blocking(lamp_status)
+    await lamp.reply(server, message=comment, process='Done')
+
+
+def register_switch(func, switch, process, subinst):
+    """Register a lamp on/off command. Switching the same lamp is serialized."""
+    @lamp.command(func, policy='exclusive', group=subinst)
+    async def handle_switch(server, dict_data):
+        comment=await run_blocking(switch)
+        await lamp.reply(server, message=comment, process=process, status='success', subinst=subinst)
+    return handle_switch
+
 
 # Below functions are for simulation. When connect the instruments, please annotate
 def lamp_status():
@@ -100,3 +64,11 @@ def fiducial_off():
     time.sleep(5)    # function to turn on the flat lamp'
     rsp_msg='Fiducial lamp turns off.'
     return rsp_msg
+
+
+register_switch('arcon', arc_on, 'ING', 'ARC')
+register_switch('arcoff', arc_off, 'Done', 'ARC')
+register_switch('flaton', flat_on, 'ING', 'FLAT')
+register_switch('flatoff', flat_off, 'Done', 'FLAT')
+register_switch('fiducialon', fiducial_on, 'ING', 'FIDUCIAL')
+register_switch('fiducialoff', fiducial_off, 'Done', 'FIDUCIAL')
@@ -4,9 +4,115 @@ import threading
 import json
 import uuid
 import socket
+import contextvars
+import time
+import struct
+from collections import deque
+
+import numpy as np
+
+# (correlation id, reply_to) of the request a server is currently handling.
+# Set by define_consumer, read by send_message to stamp the reply.
+_reply_context = contextvars.ContextVar('amq_reply_context', default=None)
+
+# Message bodies are JSON unless a message carries NumPy arrays. Such a message is sent as
+#   b'KSPA' + uint32 header length + JSON header + 8-byte aligned raw array buffers
+# where each array in the header is replaced by {"__ndarray__": index} and
+# header['__arrays__'] lists [dtype, shape, offset, nbytes] per index.
+JSON_CONTENT_TYPE = 'application/json'
+ARRAY_CONTENT_TYPE = 'application/x-kspec-array'
+ARRAY_MIN_SIZE = 64             # Smaller arrays are cheaper as JSON lists
+_ARRAY_MAGIC = b'KSPA'
+_ARRAY_ALIGN = 8
+
+
+def json_default(value):
+    """json.dump(s) default= hook for NumPy values (e.g. when saving a decoded message to file)."""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _pack_arrays(value, arrays):
+    if isinstance(value, dict):
+        return {key: _pack_arrays(item, arrays) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_pack_arrays(item, arrays) for item in value]
+    if isinstance(value, np.ndarray):
+        if value.size < ARRAY_MIN_SIZE or value.dtype.kind not in 'biuf':
+            return value.tolist()
+        arrays.append(np.ascontiguousarray(value))
+        return {'__ndarray__': len(arrays) - 1}
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _unpack_arrays(value, arrays):
+    if isinstance(value, dict):
+        if len(value) == 1 and '__ndarray__' in value:
+            return arrays[value['__ndarray__']]
+        return {key: _unpack_arrays(item, arrays) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_unpack_arrays(item, arrays) for item in value]
+    return value
+
+
+def encode_message(dict_data):
+    """Return (body, content_type) for a message dict.
+
+    Plain messages are JSON. NumPy arrays of at least ARRAY_MIN_SIZE elements are
+    carried as raw buffers after a JSON header instead of per-element JSON numbers.
+    """
+    arrays = []
+    header = _pack_arrays(dict_data, arrays)
+    if not arrays:
+        return json.dumps(header).encode(), JSON_CONTENT_TYPE
+
+    table = []
+    offset = 0
+    for array in arrays:
+        offset += -offset % _ARRAY_ALIGN
+        table.append([array.dtype.str, list(array.shape), offset, array.nbytes])
+        offset += array.nbytes
+    header['__arrays__'] = table
+
+    header_bytes = json.dumps(header).encode()
+    start = len(_ARRAY_MAGIC) + 4 + len(header_bytes)
+    start += -start % _ARRAY_ALIGN
+    body = bytearray(start + offset)
+    body[:len(_ARRAY_MAGIC)] = _ARRAY_MAGIC
+    struct.pack_into('<I', body, len(_ARRAY_MAGIC), len(header_bytes))
+    body[len(_ARRAY_MAGIC) + 4:len(_ARRAY_MAGIC) + 4 + len(header_bytes)] = header_bytes
+    for array, (_, _, array_offset, nbytes) in zip(arrays, table):
+        body[start + array_offset:start + array_offset + nbytes] = array.tobytes()
+    return bytes(body), ARRAY_CONTENT_TYPE
+
+
+def decode_message(body, content_type=None):
+    """Decode a message body into a dict. Arrays come back as read-only NumPy views of body."""
+    if content_type != ARRAY_CONTENT_TYPE and body[:len(_ARRAY_MAGIC)] != _ARRAY_MAGIC:
+        return json.loads(body)
+
+    (header_length,) = struct.unpack_from('<I', body, len(_ARRAY_MAGIC))
+    header_end = len(_ARRAY_MAGIC) + 4 + header_length
+    header = json.loads(body[len(_ARRAY_MAGIC) + 4:header_end])
+    start = header_end + (-header_end % _ARRAY_ALIGN)
+
+    arrays = []
+    for dtype, shape, offset, nbytes in header.pop('__arrays__'):
+        dtype = np.dtype(dtype)
+        array = np.frombuffer(body, dtype=dtype, count=nbytes // dtype.itemsize, offset=start + offset)
+        arrays.append(array.reshape(shape))
+    return _unpack_arrays(header, arrays)
 
 class AMQclass():
-    def __init__(self,ipaddr,idname,password,whoami,exchange):
+    # (ipaddr, idname) -> [connection, number of AMQclass instances using it]
+    shared_connections = {}
+
+    def __init__(self,ipaddr,idname,password,whoami,exchange,prefetch_count=10,share_connection=False):
         self.ipaddr=ipaddr
         self.id=idname
         self.pw=password
@@ -14,16 +120,32 @@ class AMQclass():
         self.im=whoami
         self.exchange = exchange
         self.queue = None
-        self.channel = None
+        self.channel = None             # Consumer channel
+        self.publish_channel = None     # Publisher channel with publisher confirms
+        self.cmd_exchange = None
         self.connection = None
+        self.prefetch_count = prefetch_count
+        self.share_connection = share_connection
         self.futures = {}
+        self.expired = deque(maxlen=256)
+        self.unconfirmed = set()
         self.stop_event = None
         self.mission = False
         self.heartbeat_interval = 60
 
     async def connect(self):
-        self.connection = await aio_pika.connect_robust(host=self.ipaddr,login=self.id,password=self.pw,heartbeat=self.heartbeat_interval)
-        self.channel = await self.connection.channel()
+        key = (self.ipaddr, self.id)
+        shared = self.shared_connections.get(key) if self.share_connection else None
+        if shared is not None and not shared[0].is_closed:
+            self.connection = shared[0]
+            shared[1] += 1
+        else:
+            self.connection = await aio_pika.connect_robust(host=self.ipaddr,login=self.id,password=self.pw,heartbeat=self.heartbeat_interval)
+            if self.share_connection:
+                self.shared_connections[key] = [self.connection, 1]
+
+        self.channel = await self.connection.channel(publisher_confirms=False)
+        self.publish_channel = await self.connection.channel(publisher_confirms=True, on_return_raises=True)
         print('RabbitMQ server connected', flush=True)
         react='RabbitMQ server connected'
         return react
@@ -49,13 +171,23 @@ class AMQclass():
                 except Exception as de:
                     print(f"Warning: queue cancel failed: {de}", flush=True)
 
-            # Close the channel if it exists
-            if self.channel:
-                await self.channel.close()
-                print("Channel closed.", flush=True)
+            # Wait for outstanding publisher confirms
+            await self.flush()
+
+            # Close the channels if they exist
+            for channel in (self.channel, self.publish_channel):
+                if channel and not channel.is_closed:
+                    await channel.close()
+            print("Channel closed.", flush=True)
 
-            # Close the connection if it exists
+            # Close the connection if it exists and no other instance shares it
             if self.connection:
+                shared = self.shared_connections.get((self.ipaddr, self.id))
+                if shared is not None and shared[0] is self.connection:
+                    shared[1] -= 1
+                    if shared[1] > 0:
+                        return
+                    del self.shared_connections[(self.ipaddr, self.id)]
                 await self.connection.close()
                 print("RabbitMQ connection closed.", flush=True)
 
@@ -63,26 +195,136 @@ class AMQclass():
             print(f"Error during RabbitMQ disconnect: {e}", flush=True)
 
     async def define_producer(self):
-        self.cmd_exchange = await self.channel.declare_exchange(self.exchange, aio_pika.ExchangeType.DIRECT)
+        self.cmd_exchange = await self.publish_channel.declare_exchange(self.exchange, aio_pika.ExchangeType.DIRECT)
         print(f'{self.exchange} exchange was defined', flush=True)
         react=f'{self.exchange} exchange was defined'
         return react
 
-    async def send_message(self, _routing_key, message):
-        await self.cmd_exchange.publish(
-                aio_pika.Message(body=message.encode()),
-                routing_key=_routing_key,
-            )
-        dict_data=json.loads(message)
-        print(f"\033[32m[{self.im}] sent message to device '{_routing_key}'. message: {dict_data['message']}\033[0m", flush=True)
+    async def send_message(self, _routing_key, message, wait_confirm=True):
+        """Publish a message. Returns True once the broker confirmed it was routed, False if
+        no queue is bound to _routing_key or the broker nacked it. With wait_confirm=False the confirm is awaited in
+        the background (see flush()) and None is returned.
+        message is a JSON string or a dict; a dict holding NumPy arrays is sent with
+        encode_message()'s binary layout."""
+        if isinstance(message, dict):
+            dict_data = dict(message)
+        else:
+            dict_data = json.loads(message)
+        correlation_id = None
+        reply_context = _reply_context.get()
+        if reply_context is not None and reply_context[1] == _routing_key:
+            correlation_id = reply_context[0]
+            dict_data.setdefault('corr_id', correlation_id)
 
-    async def define_consumer(self,_routing_key,callback):
+        body, content_type = encode_message(dict_data)
+        publishing = self.publish(
+                aio_pika.Message(body=body, content_type=content_type, correlation_id=correlation_id),
+                _routing_key, dict_data['message'])
+        if wait_confirm:
+            await self.flush()          # Keep order behind background publishes
+            return await publishing
+
+        task = asyncio.ensure_future(publishing)
+        self.unconfirmed.add(task)
+        task.add_done_callback(self.unconfirmed.discard)
+
+    async def publish(self, amq_message, _routing_key, text, kind='message'):
+        if self.cmd_exchange is None:
+            await self.define_producer()
+        try:
+            await self.cmd_exchange.publish(amq_message, routing_key=_routing_key)
+        except aio_pika.exceptions.DeliveryError as e:
+            # PublishError (returned as unroutable) and a broker nack both derive from DeliveryError
+            reason = 'was not routed. Is the server running?' if isinstance(e, aio_pika.exceptions.PublishError) else 'was rejected by the broker.'
+            print(f"\033[31m[{self.im}] {kind} to device '{_routing_key}' {reason} message: {text}\033[0m", flush=True)
+            return False
+        print(f"\033[32m[{self.im}] sent {kind} to device '{_routing_key}'. message: {text}\033[0m", flush=True)
+        return True
+
+    async def flush(self):
+        """Wait until all messages sent with wait_confirm=False are confirmed."""
+        if self.unconfirmed:
+            await asyncio.gather(*list(self.unconfirmed), return_exceptions=True)
+
+    async def request(self, _routing_key, message, timeout=None, until=None):
+        """Send a command and wait for the reply carrying the same correlation id.
+
+        The command is stamped with 'corr_id' and 'reply_to' so that the device server
+        echoes the id in its reply. Without until, the first reply is returned.
+        With until, a dict of reply fields (e.g. {'process': 'Done'} or
+        {'pos_state': 'assign'}), replies are skipped until one matches; a 'Done'
+        reply always ends the wait so that a failed command does not hang.
+        Raises asyncio.TimeoutError if no matching reply arrives within timeout seconds.
+        """
+        corr_id = uuid.uuid4().hex
+        dict_data = dict(message) if isinstance(message, dict) else json.loads(message)
+        dict_data.update(corr_id=corr_id, reply_to=self.im)
+        body, content_type = encode_message(dict_data)
+
+        future = asyncio.get_running_loop().create_future()
+        self.futures[corr_id] = (future, until)
+        try:
+            routed = await self.publish(
+                    aio_pika.Message(body=body, content_type=content_type, correlation_id=corr_id, reply_to=self.im),
+                    _routing_key, dict_data['message'], kind='request')
+            if not routed:
+                raise ConnectionError(f"Request to '{_routing_key}' was not delivered.")
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self.expired.append(corr_id)
+            print(f"[{self.im}] request to '{_routing_key}' timed out after {timeout} seconds.", flush=True)
+            raise
+        finally:
+            self.futures.pop(corr_id, None)
+
+    def resolve_reply(self, dict_data):
+        """Hand a received reply to the pending request() waiting for it.
+
+        Returns True if the reply belongs to a request (pending or already timed out),
+        so that the caller does not also put it into the ordered response queues.
+        """
+        corr_id = dict_data.get('corr_id')
+        if corr_id is None:
+            return False
+
+        entry = self.futures.get(corr_id)
+        if entry is None:
+            if corr_id in self.expired:
+                print(f"[{self.im}] dropped late reply from {dict_data.get('inst')} for timed out request.", flush=True)
+                return True
+            return False
+
+        future, until = entry
+        if future.done():
+            return True
+        if until is None or dict_data.get('process') == 'Done' \
+                or all(dict_data.get(key) == value for key, value in until.items()):
+            future.set_result(dict_data)
+        return True
+
+    async def define_consumer(self,_routing_key,callback,prefetch_count=None):
+        """Consume {whoami}_queue. At most prefetch_count messages are unacknowledged at once,
+        so a slow handler holds one slot instead of stalling the whole consumer."""
+        if self.cmd_exchange is None:
+            await self.define_producer()
         if self.queue is None:
-            self.cmd_exchange = await self.channel.declare_exchange(self.exchange, aio_pika.ExchangeType.DIRECT)
+            consume_exchange = await self.channel.declare_exchange(self.exchange, aio_pika.ExchangeType.DIRECT)
             self.queue = await self.channel.declare_queue(f'{self.im}_queue',durable=True)
-            await self.queue.bind(self.cmd_exchange,routing_key=_routing_key)
+            await self.queue.bind(consume_exchange,routing_key=_routing_key)
+
+        await self.channel.set_qos(prefetch_count=prefetch_count or self.prefetch_count)
 
-        self.consumer_tag = await self.queue.consume(callback)
+        async def on_message(message):
+            token = None
+            if message.correlation_id and message.reply_to:
+                token = _reply_context.set((message.correlation_id, message.reply_to))
+            try:
+                await callback(message)
+            finally:
+                if token is not None:
+                    _reply_context.reset(token)
+
+        self.consumer_tag = await self.queue.consume(on_message)
 
 #    async def receive_message(self,_routing_key):
 #        await self.queue.bind(self.cmd_exchange,routing_key=_routing_key)
@@ -119,14 +361,18 @@ class AMQclass():
 
 
 class UDPClientProtocol:
-    def __init__(self, on_con_lost):
+    def __init__(self, on_con_lost, on_datagram=None):
         self.on_con_lost = on_con_lost  # Future to signal connection lost
+        self.on_datagram = on_datagram  # Optional callback for received datagrams
 
     def connection_made(self, transport):
         self.transport = transport  # Save the transport for sending data
 
     def datagram_received(self, data, addr):
-        print(f"From server: {data.decode()}")  # Print received message
+        if self.on_datagram is not None:
+            self.on_datagram(data)
+        else:
+            print(f"From server: {data.decode()}")  # Print received message
 
     def error_received(self, exc):
         print(f"Error received: {exc}")
@@ -140,6 +386,94 @@ class UDPClientProtocol:
 
 
 
+# Persistent UDP client
+class UDPClient:
+    """
+    One UDP endpoint to the TCS agent, kept open for the life of the process.
+
+    send() can wait for a reply datagram. Replies are handed to the oldest waiter
+    whose match(data) is true (any reply by default); unmatched datagrams are printed.
+    Send counts, reply timeouts and the send rate are available from metrics().
+    """
+    def __init__(self, host, port, rate_window=50):
+        self.host = host
+        self.port = port
+        self.transport = None
+        self.protocol = None
+        self.connect_lock = None
+        self.waiters = []
+        self.send_times = deque(maxlen=rate_window)
+        self.counts = {'sent': 0, 'replies': 0, 'timeouts': 0, 'unmatched': 0}
+
+    async def connect(self):
+        loop = asyncio.get_running_loop()
+        on_con_lost = loop.create_future()
+        self.transport, self.protocol = await loop.create_datagram_endpoint(
+            lambda: UDPClientProtocol(on_con_lost, self._on_datagram),
+            remote_addr=(self.host, self.port)
+        )
+
+    async def send(self, message, wait_reply=False, timeout=1.0, match=None):
+        """Send a message. If wait_reply, return the reply bytes (None on timeout)."""
+        if self._needs_connect():
+            if self.connect_lock is None:
+                self.connect_lock = asyncio.Lock()
+            async with self.connect_lock:
+                # Another send may have reconnected while this one waited for the lock
+                if self._needs_connect():
+                    await self.connect()
+
+        future = None
+        if wait_reply:
+            future = asyncio.get_running_loop().create_future()
+            self.waiters.append((match, future))
+
+        self.transport.sendto(message.encode())
+        self.counts['sent'] += 1
+        self.send_times.append(time.monotonic())
+        if future is None:
+            return None
+
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self.counts['timeouts'] += 1
+            print(f"No reply from {self.host}:{self.port} for '{message}' within {timeout} seconds.")
+            return None
+        finally:
+            self.waiters = [w for w in self.waiters if w[1] is not future]
+
+    def _needs_connect(self):
+        return self.transport is None or self.transport.is_closing() or self.protocol.on_con_lost.done()
+
+    def _on_datagram(self, data):
+        for match, future in self.waiters:
+            if not future.done() and (match is None or match(data)):
+                future.set_result(data)
+                self.counts['replies'] += 1
+                return
+        self.counts['unmatched'] += 1
+        print(f"From server: {data.decode(errors='ignore')}")
+
+    def metrics(self):
+        """Return send/reply counts, the recent send rate (Hz) and interval jitter (s)."""
+        result = dict(self.counts)
+        intervals = [b - a for a, b in zip(self.send_times, list(self.send_times)[1:])]
+        if intervals:
+            mean = sum(intervals) / len(intervals)
+            result['rate_hz'] = 1.0 / mean if mean > 0 else float('inf')
+            result['jitter_s'] = (sum((x - mean) ** 2 for x in intervals) / len(intervals)) ** 0.5
+        else:
+            result['rate_hz'] = 0.0
+            result['jitter_s'] = 0.0
+        return result
+
+    def close(self):
+        if self.transport is not None:
+            self.transport.close()
+            self.transport = None
+
+
 # Async TCP Client
 class TCPClient:
     def __init__(self, host, port):
@@ -173,3 +507,154 @@ class TCPClient:
             await self.writer.wait_closed()
             print("Connection closed.")
 
+
+
+# Persistent Telcom client
+class TelcomClient:
+    """
+    Long-lived TCP client for the Telcom server.
+
+    Commands are queued and sent one at a time over a single connection, which is
+    re-opened automatically when it drops. Replies are framed on '\\n' or '\\x00'.
+    Identical REQUEST queries in flight share one round trip, and their replies
+    are cached for cache_ttl seconds. Any COMMAND invalidates the cache.
+    """
+    def __init__(self, host, port, cache_ttl=0.5, timeout=5.0, frame_gap=0.2):
+        self.host = host
+        self.port = port
+        self.cache_ttl = cache_ttl
+        self.timeout = timeout          # Wait for the first byte of a reply
+        self.frame_gap = frame_gap      # Wait for the rest of an unterminated reply
+        self.reader = None
+        self.writer = None
+        self.buffer = b''
+        self.cache = {}
+        self.pending = {}
+        self.queue = None
+        self.worker = None
+
+    async def connect(self):
+        try:
+            self.reader, self.writer = await asyncio.wait_for(
+                    asyncio.open_connection(self.host, self.port), timeout=self.timeout)
+            self.buffer = b''
+            print(f"Connected to {self.host}:{self.port}")
+        except Exception as e:
+            self.reader = self.writer = None
+            print(f"Connection error: {e}")
+            raise
+
+    async def send_receive(self, message):
+        """Queue a Telcom message and return its reply as bytes, or None on error."""
+        loop = asyncio.get_running_loop()
+        is_request = message.split()[3:4] == ['REQUEST']
+
+        if is_request:
+            cached = self.cache.get(message)
+            if cached is not None and loop.time() - cached[0] < self.cache_ttl:
+                return cached[1]
+            if message in self.pending:
+                return await asyncio.shield(self.pending[message])
+        else:
+            self.cache.clear()
+
+        if self.worker is None or self.worker.done():
+            self.queue = asyncio.Queue()
+            self.worker = asyncio.create_task(self._process_queue())
+
+        future = loop.create_future()
+        if is_request:
+            self.pending[message] = future
+        await self.queue.put((message, is_request, future))
+        return await asyncio.shield(future)
+
+    async def _process_queue(self):
+        while True:
+            message, is_request, future = await self.queue.get()
+            data = None
+            try:
+                data = await self._exchange(message, retry=is_request)
+                if is_request:
+                    self.cache[message] = (asyncio.get_running_loop().time(), data)
+            except Exception as e:
+                print(f"Error: {e}")
+            finally:
+                # Also on close(): the caller waiting for this message gets None
+                self.pending.pop(message, None)
+                if not future.done():
+                    future.set_result(data)
+
+    async def _exchange(self, message, retry):
+        """Send one message and read its reply. REQUESTs are retried once on a fresh connection."""
+        for attempt in range(2):
+            sent = False
+            try:
+                if self.writer is None:
+                    await self.connect()
+                self.writer.write(message.encode())
+                await self.writer.drain()
+                sent = True
+                print(f"Sent: {message}")
+
+                data = await self._read_frame()
+                print(f"Received: {data.decode(errors='ignore')}")
+                return data
+            except (OSError, ConnectionError, asyncio.TimeoutError, asyncio.IncompleteReadError) as e:
+                await self._drop()
+                # A COMMAND that reached the server must not be executed twice
+                if attempt == 1 or (sent and not retry):
+                    raise ConnectionError(f"Telcom exchange failed for '{message}': {e!r}") from e
+                print(f"Telcom connection lost ({e!r}). Reconnecting...")
+
+    async def _read_frame(self):
+        while True:
+            self.buffer = self.buffer.lstrip(b'\n\x00')
+            ends = [i for i in (self.buffer.find(b'\n'), self.buffer.find(b'\x00')) if i >= 0]
+            if ends:
+                end = min(ends) + 1
+                frame, self.buffer = self.buffer[:end], self.buffer[end:]
+                return frame
+
+            try:
+                chunk = await asyncio.wait_for(self.reader.read(1024),
+                        timeout=self.frame_gap if self.buffer else self.timeout)
+            except asyncio.TimeoutError:
+                if self.buffer:                     # Reply without terminator, e.g. 'KMTNET TCS 123 OK'
+                    frame, self.buffer = self.buffer, b''
+                    return frame
+                raise
+            if not chunk:
+                raise ConnectionError("Telcom server closed the connection")
+            self.buffer += chunk
+
+    async def _drop(self):
+        if self.writer:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except Exception:
+                pass
+        self.reader = self.writer = None
+        self.buffer = b''
+
+    async def close(self):
+        """Close the connection. Messages still queued are answered with None."""
+        if self.worker:
+            self.worker.cancel()
+            try:
+                await self.worker
+            except asyncio.CancelledError:
+                pass
+            self.worker = None
+        if self.queue is not None:
+            while not self.queue.empty():
+                _, _, future = self.queue.get_nowait()
+                if not future.done():
+                    future.set_result(None)
+        for future in self.pending.values():
+            if not future.done():
+                future.set_result(None)
+        self.pending.clear()
+        if self.writer:
+            await self._drop()
+            print("Connection closed.")
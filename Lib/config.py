@@ -0,0 +1,253 @@
+"""
+Cached, hot-reloadable access to ./Lib/KSPEC.ini.
+
+The file is parsed once and kept as an immutable snapshot. On access the file is
+stat()ed at most once per check_interval seconds; when its mtime or size changed
+it is re-parsed, validated against SCHEMA and swapped in as a whole, so a reader
+never sees a half-applied file. A file that fails to parse or validate is
+reported and the previous snapshot stays in use.
+
+    from Lib.config import get_config
+
+    kspecinfo = get_config()
+    gfafilepath = kspecinfo['GFA']['gfafilepath']
+    port = kspecinfo.get('TCS', 'TelcomPort')
+
+Watchers are called with {(section, key): (old, new)} after a reload:
+
+    kspecinfo.watch(on_tcs_change, section='TCS')
+
+While watchers are registered, a background thread also checks the file every
+check_interval seconds, so they fire even for keys nobody reads. A watcher
+registered from a running event loop is called on that loop.
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+from types import MappingProxyType
+
+DEFAULT_PATH = './Lib/KSPEC.ini'
+
+# Expected value types per section. Values are coerced on load; keys that are not
+# listed here are kept as they are in the file.
+SCHEMA = {
+    'RabbitMQ': {'idname': str, 'pwd': str, 'ip_addr': str},
+    'TCS': {
+        'TelcomIP': str,
+        'TelcomPort': int,
+        'TCSagentIP': str,
+        'TCSagentPort': int,
+        'TelcomCacheTTL': float,
+    },
+    'SCIOBS': {'obsplanpath': str, 'targetpath': str, 'motionpath': str, 'obsinfofile': str},
+    'FBP': {'fbpfilepath': str},
+    'GFA': {
+        'gfafilepath': str,
+        'final_astrometry_images': str,
+        'Simul_astrometry_images': str,
+        'guide_interval': float,
+        'guide_depth': int,
+        'guide_settle': float,
+    },
+    'MTL': {'mtlfilepath': str, 'mtlimagepath': str},
+    'ENDO': {'endoimagepath': str},
+    'SPEC': {'specimagepath': str, 'specinfopath': str},
+}
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _validate(data):
+    """Return a copy of data with SCHEMA types applied. Raises ValueError."""
+    if not isinstance(data, dict):
+        raise ValueError('top level should be an object.')
+
+    checked = dict(data)
+    for section, keys in SCHEMA.items():
+        if section not in checked:
+            continue
+        if not isinstance(checked[section], dict):
+            raise ValueError(f"section '{section}' should be an object.")
+        values = dict(checked[section])
+        for key, value_type in keys.items():
+            if key not in values:
+                continue
+            try:
+                values[key] = value_type(values[key])
+            except (TypeError, ValueError):
+                raise ValueError(f"'{section}.{key}' should be {value_type.__name__}. input value: {values[key]}")
+        checked[section] = values
+    return checked
+
+
+def _diff(old, new):
+    changed = {}
+    for section in set(old) | set(new):
+        old_value = old.get(section)
+        new_value = new.get(section)
+        if isinstance(old_value, MappingProxyType) or isinstance(new_value, MappingProxyType):
+            old_section = old_value if isinstance(old_value, MappingProxyType) else {}
+            new_section = new_value if isinstance(new_value, MappingProxyType) else {}
+            for key in set(old_section) | set(new_section):
+                if old_section.get(key) != new_section.get(key):
+                    changed[(section, key)] = (old_section.get(key), new_section.get(key))
+        elif old_value != new_value:
+            changed[(section, None)] = (old_value, new_value)
+    return changed
+
+
+class KSPECConfig:
+    def __init__(self, path=DEFAULT_PATH, check_interval=1.0):
+        """
+        Args:
+            path (str): Location of KSPEC.ini.
+            check_interval (float): Minimum seconds between two mtime checks.
+        """
+        self.path = path
+        self.check_interval = check_interval
+        self.watchers = []
+        self._lock = threading.Lock()
+        self._poller = None
+        self._stop_poll = threading.Event()
+        self._stamp = None
+        self._seen = None
+        self._checked = 0.0
+        self._data = MappingProxyType({})
+        self.reload(force=True)
+
+    def _read(self):
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"KSPEC.ini not found at {self.path}")
+        stat = os.stat(self.path)
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Error parsing KSPEC.ini: {e}")
+        except OSError as e:
+            raise IOError(f"Error reading KSPEC.ini: {e}")
+        try:
+            data = _validate(data)
+        except ValueError as e:
+            raise ValueError(f"Invalid KSPEC.ini: {e}")
+        return (stat.st_mtime_ns, stat.st_size), _freeze(data)
+
+    def reload(self, force=False):
+        """Re-read the file if it changed (or always with force). Returns the changed keys."""
+        with self._lock:
+            self._checked = time.monotonic()
+            if not force:
+                try:
+                    stat = os.stat(self.path)
+                except OSError:
+                    return {}
+                if (stat.st_mtime_ns, stat.st_size) in (self._stamp, self._seen):
+                    return {}
+                # A broken file is reported once, not on every access
+                self._seen = (stat.st_mtime_ns, stat.st_size)
+
+            try:
+                stamp, data = self._read()
+            except (OSError, ValueError) as e:
+                if force and self._stamp is None:
+                    raise
+                print(f"\033[31m[CONFIG] {e}. Keep the previous configuration.\033[0m", flush=True)
+                return {}
+
+            changed = _diff(self._data, data) if self._stamp is not None else {}
+            self._stamp = stamp
+            self._data = data
+            watchers = list(self.watchers)
+
+        if changed:
+            try:
+                current = asyncio.get_running_loop()
+            except RuntimeError:
+                current = None
+            for callback, section, loop in watchers:
+                selected = {key: value for key, value in changed.items() if section is None or key[0] == section}
+                if not selected:
+                    continue
+                if loop is None or loop is current:
+                    self._notify(callback, selected)
+                elif not loop.is_closed():
+                    loop.call_soon_threadsafe(self._notify, callback, selected)
+        return changed
+
+    def _notify(self, callback, selected):
+        try:
+            callback(selected, self)
+        except Exception as e:
+            print(f"\033[31m[CONFIG] Watcher {getattr(callback, '__name__', callback)} failed: {e}\033[0m", flush=True)
+
+    def _poll(self):
+        while not self._stop_poll.wait(self.check_interval):
+            if time.monotonic() - self._checked >= self.check_interval:
+                self.reload()
+
+    def snapshot(self):
+        """Return the current read-only configuration, reloading it first if the file changed."""
+        if time.monotonic() - self._checked >= self.check_interval:
+            self.reload()
+        return self._data
+
+    def watch(self, callback, section=None):
+        """Call callback(changed, config) after a reload changes keys (of one section if given).
+
+        The file is polled in the background from now on. Registered from a running event
+        loop, the callback runs on that loop; otherwise on the poll thread.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        with self._lock:
+            self.watchers.append((callback, section, loop))
+            if self._poller is None or not self._poller.is_alive():
+                self._stop_poll.clear()
+                self._poller = threading.Thread(target=self._poll, name='kspec-config', daemon=True)
+                self._poller.start()
+        return callback
+
+    def unwatch(self, callback):
+        with self._lock:
+            self.watchers = [entry for entry in self.watchers if entry[0] is not callback]
+            if not self.watchers:
+                self._stop_poll.set()
+                self._poller = None
+
+    def get(self, section, key=None, default=None):
+        data = self.snapshot()
+        if section not in data:
+            return default
+        if key is None:
+            return data[section]
+        return data[section].get(key, default)
+
+    def __getitem__(self, section):
+        return self.snapshot()[section]
+
+    def __contains__(self, section):
+        return section in self.snapshot()
+
+
+_configs = {}
+_configs_lock = threading.Lock()
+
+
+def get_config(path=DEFAULT_PATH):
+    """Return the shared KSPECConfig of a file, loading it on first use."""
+    key = os.path.abspath(path)
+    with _configs_lock:
+        config = _configs.get(key)
+        if config is None:
+            config = _configs[key] = KSPECConfig(path)
+        return config
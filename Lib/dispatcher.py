@@ -0,0 +1,206 @@
+"""
+Table-driven command dispatcher shared by the instrument servers.
+
+Each server builds one Dispatcher and registers a handler coroutine per 'func'
+together with its argument spec and concurrency policy:
+
+    fbp = Dispatcher('FBP', mkmsg.fbpmsg)
+
+    @fbp.command('fbpmove', policy='exclusive', group='motion')
+    async def fbpmove(server, msg):
+        ...
+
+Argument specs use the same table format as GFA_COMMAND_SPECS/ADC_COMMAND_SPECS
+('args', 'optional_args', 'fixed', 'validators') and are compiled once at
+registration. A message is decoded once, parsed, and the handler is called as
+handler(server, msg, *context, **parsed_args).
+
+Concurrency policies:
+    'parallel'        : run as soon as the message arrives (default).
+    'exclusive'       : handlers of the same group run one at a time.
+    'cancel_previous' : a new call cancels the running call of the same group
+                        and runs as a background task (e.g. gfaguide).
+"""
+import asyncio
+import json
+
+POLICIES = ('parallel', 'exclusive', 'cancel_previous')
+
+
+def is_missing_parameter(value):
+    return value is None or value == '' or value == 'None'
+
+
+def parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    if value is None:
+        return False
+    if isinstance(value, str):
+        normalized = value.strip().lower()
+        if normalized in ("true", "1", "yes", "y"):
+            return True
+        if normalized in ("false", "0", "no", "n"):
+            return False
+        raise ValueError(f"Invalid boolean value: {value}")
+
+    return bool(value)
+
+
+def parse_list(value):
+    if isinstance(value, list):
+        return value
+    raise ValueError(f"Expected list, got {type(value).__name__}")
+
+
+def decode(cmd):
+    """Return the command as a dict, decoding JSON bytes/str only if needed."""
+    if isinstance(cmd, dict):
+        return cmd
+    return json.loads(cmd)
+
+
+class CommandSpec:
+    """Compiled argument spec of one command."""
+
+    def __init__(self, func, spec=None):
+        spec = spec or {}
+        self.func = func
+        self.fixed = dict(spec.get('fixed', {}))
+        self.args = tuple(
+            (name, value_type, getattr(value_type, '__name__', str(value_type)))
+            for name, value_type in spec.get('args', ())
+        )
+        self.optional_args = tuple(
+            (name, value_type, default, getattr(value_type, '__name__', str(value_type)))
+            for name, value_type, default in spec.get('optional_args', ())
+        )
+        self.validators = tuple(spec.get('validators', ()))
+
+    def parse(self, dict_data):
+        """Return (parsed, None) or (None, error message)."""
+        func = self.func
+        parsed = dict(self.fixed)
+
+        for name, value_type, type_name in self.args:
+            raw_value = dict_data.get(name)
+            if is_missing_parameter(raw_value):
+                return None, f"'{func}' command needs '{name}' parameter."
+            try:
+                parsed[name] = value_type(raw_value)
+            except (TypeError, ValueError):
+                return None, f"'{func}' command parameter '{name}' should be {type_name}. input value: {raw_value}"
+
+        for name, value_type, default, type_name in self.optional_args:
+            raw_value = dict_data.get(name, default)
+            if is_missing_parameter(raw_value):
+                parsed[name] = default
+                continue
+            try:
+                parsed[name] = value_type(raw_value)
+            except (TypeError, ValueError):
+                return None, f"'{func}' command parameter '{name}' should be {type_name}. input value: {raw_value}"
+
+        for name, validator, message in self.validators:
+            if not validator(parsed[name]):
+                return None, f"{message} input value: {parsed[name]}"
+
+        return parsed, None
+
+
+class Dispatcher:
+    def __init__(self, device, make_reply):
+        """
+        Args:
+            device (str): Instrument name used in log lines and error messages.
+            make_reply (callable): Lib.mkmessage builder for reply dicts (e.g. mkmsg.fbpmsg).
+        """
+        self.device = device
+        self.make_reply = make_reply
+        self.handlers = {}
+        self.locks = {}
+        self.tasks = {}
+
+    def command(self, func, spec=None, *, policy='parallel', group=None):
+        """Decorator registering a handler coroutine for 'func'."""
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown dispatch policy: {policy}")
+
+        def register(handler):
+            self.handlers[func] = (handler, CommandSpec(func, spec), policy, group or func)
+            return handler
+        return register
+
+    def printing(self, message):
+        print(f"\033[32m[{self.device}] {message}\033[0m", flush=True)
+
+    async def reply(self, server, result=None, *, log=True, **updates):
+        """Build a reply with make_reply(), apply result/updates and send it to ICS.
+        NumPy arrays in the reply are sent as binary buffers (see Lib.AMQ.encode_message)."""
+        reply_data = self.make_reply()
+        if result is not None:
+            reply_data.update(result)
+        reply_data.update(updates)
+
+        if log and reply_data.get('message'):
+            self.printing(reply_data['message'])
+        # Progress updates do not wait for the broker confirm
+        await server.send_message('ICS', reply_data, wait_confirm=reply_data.get('process') != 'ING')
+        return reply_data
+
+    def running(self, group):
+        """Return the running cancel_previous task of a group, or None."""
+        task = self.tasks.get(group)
+        return task if task is not None and not task.done() else None
+
+    async def cancel(self, group):
+        """Cancel the running cancel_previous task of a group. Returns True if one was running."""
+        task = self.running(group)
+        if task is None:
+            return False
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        return True
+
+    async def dispatch(self, server, cmd, *context):
+        """Decode, validate and run one command message."""
+        try:
+            dict_data = decode(cmd)
+        except json.JSONDecodeError as e:
+            await self.reply(server, message=f"Invalid {self.device} command JSON: {e}", process='Done', status='error')
+            return
+        if not isinstance(dict_data, dict):
+            await self.reply(server, message=f"Invalid {self.device} command: JSON payload should be an object.",
+                             process='Done', status='error')
+            return
+
+        func = dict_data.get('func')
+        if is_missing_parameter(func):
+            await self.reply(server, message=f"Invalid {self.device} command: 'func' is required.",
+                             process='Done', status='error')
+            return
+        entry = self.handlers.get(func)
+        if entry is None:
+            await self.reply(server, message=f"Unknown {self.device} command: {func}", process='Done', status='error')
+            return
+
+        handler, spec, policy, group = entry
+        parsed, error = spec.parse(dict_data)
+        if error:
+            await self.reply(server, message=error, process='Done', status='error')
+            return
+
+        call = handler(server, dict_data, *context, **parsed)
+        if policy == 'parallel':
+            await call
+        elif policy == 'exclusive':
+            lock = self.locks.setdefault(group, asyncio.Lock())
+            async with lock:
+                await call
+        else:
+            if await self.cancel(group):
+                self.printing(f"Previous {func} task cancelled.")
+            self.tasks[group] = asyncio.create_task(call)
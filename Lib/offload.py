@@ -0,0 +1,64 @@
+"""
+Executor offload layer for the device servers.
+
+Blocking hardware/SDK calls (and the time.sleep simulations standing in for them)
+run in a shared thread pool, CPU-heavy analysis in a process pool, so the aio_pika
+consumer keeps serving status queries and stop commands while they run.
+
+Cancelling the awaiting coroutine returns control to the server immediately;
+the call already running in a worker finishes in the background.
+"""
+import asyncio
+import functools
+import multiprocessing
+import os
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+
+IO_WORKERS = 8
+CPU_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+
+_thread_pool = None
+_process_pool = None
+
+
+def thread_pool():
+    global _thread_pool
+    if _thread_pool is None:
+        _thread_pool = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix='kspec-io')
+    return _thread_pool
+
+
+def process_pool():
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=CPU_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+    return _process_pool
+
+
+def install():
+    """Use the shared thread pool as the default executor of the running loop (asyncio.to_thread etc.)."""
+    asyncio.get_running_loop().set_default_executor(thread_pool())
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Run a blocking call in the thread pool and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(thread_pool(), functools.partial(func, *args, **kwargs))
+
+
+async def run_cpu(func, *args, **kwargs):
+    """Run a CPU-heavy, picklable module-level function in the process pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(process_pool(), functools.partial(func, *args, **kwargs))
+
+
+def shutdown(wait=False):
+    """Shut down both pools. Pending calls not yet started are cancelled."""
+    global _thread_pool, _process_pool
+    if _thread_pool is not None:
+        _thread_pool.shutdown(wait=wait, cancel_futures=True)
+        _thread_pool = None
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=wait, cancel_futures=True)
+        _process_pool = None
@@ -1,6 +1,7 @@
 import os, sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(os.path.dirname(__file__)))))
 from Lib.AMQ import *
+import Lib.offload as offload
 import asyncio
 import aio_pika
 import json
@@ -35,21 +36,25 @@ async def main():
     async def on_mtl_message(message: aio_pika.IncomingMessage):
         async with message.process():
             try:
-                dict_data = json.loads(message.body)
+                dict_data = decode_message(message.body, message.content_type)
                 message_text = dict_data['message']
                 print('\033[94m' + '[MTL received: ' + message_text + '\033[0m')
 
-                await identify_execute(MTL_server, message.body)
+                await identify_execute(MTL_server, dict_data)
 
             except Exception as e:
                 print(f"Error in on_gfa_message: {e}", flush=True)
 
         print('Waiting for message from client......')
 
+    offload.install()
     await MTL_server.define_consumer('MTL',on_mtl_message)
     print('Waiting for message from client......')
-    while True:
-        await asyncio.sleep(1)
+    try:
+        while True:
+            await asyncio.sleep(1)
+    finally:
+        offload.shutdown()
 #        msg=await MTL_server.receive_message("MTL")
 #        dict_data=json.loads(msg)
 #        message=dict_data['message']
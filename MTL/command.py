@@ -4,86 +4,74 @@ from Lib.AMQ import *
 import Lib.mkmessage as mkmsg
 import json
 import asyncio
+import numpy as np
+from Lib.offload import run_blocking, run_cpu
+from Lib.config import get_config
+from Lib.dispatcher import Dispatcher, parse_list
 from .MTL.kspec_metrology.kspec_metrology.exposure import mtlexp
 from .MTL.kspec_metrology.kspec_metrology.analysis import mtlcal
 
 
+mtl = Dispatcher('MTL', mkmsg.mtlmsg)
+
+MTL_COMMAND_SPECS = {
+    'loadobj': {
+        'args': (('tile_id', str), ('ra', parse_list), ('dec', parse_list), ('xp', parse_list), ('yp', parse_list)),
+    },
+    'mtlexp': {
+        'args': (('time', float), ('file', str), ('nexposure', int)),
+    },
+    'mtlcal': {
+        'args': (('file', str),),
+    },
+}
+
+
 async def identify_execute(MTL_server,cmd):
-    receive_msg=json.loads(cmd)
-    func=receive_msg['func']
-
-    if func == 'mtlstatus':
-        comment=mtl_status()
-        reply_data=mkmsg.mtlmsg()
-        reply_data.update(message=comment,process='Done',status='success')
-        rsp=json.dumps(reply_data)
-        print('\033[32m'+'[MTL]', comment+'\033[0m')
-        await MTL_server.send_message('ICS',rsp)
-
-    if func == 'loadobj':
-        tid=receive_msg['tile_id']
-        ra=receive_msg['ra']
-        dec=receive_msg['dec']
-        xp=receive_msg['xp']
-        yp=receive_msg['yp']
-#        clss=receive_msg['class']     # For commission
-
-        status, comment=savedata(receive_msg)     # save the loaded objects
-        reply_data=mkmsg.mtlmsg()
-        reply_data.update(message=comment,process='Done',status=status)
-        rsp=json.dumps(reply_data)
-        print('\033[32m'+'[MTL]', comment+'\033[0m')
-        await MTL_server.send_message('ICS',rsp)
-
-    if func == 'mtlexp':
-        reply_data=mkmsg.mtlmsg()
-        reply_data.update(message='MTL exposure starts.',process='ING',status='success')
-        rsp=json.dumps(reply_data)
-        await MTL_server.send_message('ICS',rsp)
-
-        exptime=float(receive_msg['time'])
-        filename = str(receive_msg['file'])
-        nexposure = int(receive_msg['nexposure'])
-        status, comment=mtlexp.mtlexp(exptime,filename,nexposure=nexposure)
-        reply_data=mkmsg.mtlmsg()
-        reply_data.update(message=comment,process='Done',status=status)
-        rsp=json.dumps(reply_data)
-        print('\033[32m'+'[MTL]', comment+'\033[0m')
-        await MTL_server.send_message('ICS',rsp)
-
-    if func == 'mtlcal':
-        reply_data=mkmsg.mtlmsg()
-        reply_data.update(message='MTL calculation starts.',process='ING',status='success')
-        rsp=json.dumps(reply_data)
-        await MTL_server.send_message('ICS',rsp)
-
-
-        filename = str(receive_msg['file'])
-        nexposure = int(receive_msg['nexposure'])
-        status, comment, offx,offy = mtlcal.mtlcal()
-#        comment='Metrology analysis finished successfully. Offsets were calculated.'
-        reply_data=mkmsg.mtlmsg()
-        reply_data.update(savedata='True',filename='MTLresult.json',offsetx=offx.tolist(),offsety=offy.tolist(),message=comment)
-        reply_data.update(process='Done',status='success')
-        rsp=json.dumps(reply_data)
-
-        with open('./Lib/KSPEC.ini','r') as fs:
-            kspecinfo=json.load(fs)
-    
-        mtlfilepath=kspecinfo['MTL']['mtlfilepath']
-
-        with open(mtlfilepath+'MTLresult.json',"w") as f:
-            json.dump(reply_data, f)
-
-        print('\033[32m'+'[MTL]', comment+'\033[0m')
-        await MTL_server.send_message('ICS',rsp)
+    await mtl.dispatch(MTL_server, cmd)
 
 
-def savedata(data):
-    with open('./Lib/KSPEC.ini','r') as fs:
-        kspecinfo=json.load(fs)
+@mtl.command('mtlstatus')
+async def handle_mtlstatus(MTL_server, receive_msg):
+    comment=await run_blocking(mtl_status)
+    await mtl.reply(MTL_server, message=comment, process='Done', status='success')
+
+
+@mtl.command('loadobj', MTL_COMMAND_SPECS['loadobj'])
+async def handle_loadobj(MTL_server, receive_msg, **args):
+#    clss=receive_msg['class']     # For commission
+    status, comment=savedata(receive_msg)     # save the loaded objects
+    await mtl.reply(MTL_server, message=comment, process='Done', status=status)
+
+
+@mtl.command('mtlexp', MTL_COMMAND_SPECS['mtlexp'], policy='exclusive', group='camera')
+async def handle_mtlexp(MTL_server, receive_msg, **args):
+    await mtl.reply(MTL_server, message='MTL exposure starts.', process='ING', status='success', log=False)
+
+    status, comment=await run_blocking(mtlexp.mtlexp,args['time'],args['file'],nexposure=args['nexposure'])
+    await mtl.reply(MTL_server, message=comment, process='Done', status=status)
 
-    mtlfilepath=kspecinfo['MTL']['mtlfilepath']
+
+@mtl.command('mtlcal', MTL_COMMAND_SPECS['mtlcal'], policy='exclusive', group='camera')
+async def handle_mtlcal(MTL_server, receive_msg, file):
+    await mtl.reply(MTL_server, message='MTL calculation starts.', process='ING', status='success', log=False)
+
+    status, comment, offx,offy = await run_cpu(mtlcal.mtlcal)
+#    comment='Metrology analysis finished successfully. Offsets were calculated.'
+    reply_data=mkmsg.mtlmsg()
+    reply_data.update(savedata='True',filename='MTLresult.json',offsetx=np.asarray(offx),offsety=np.asarray(offy),message=comment)
+    reply_data.update(process='Done',status='success')
+
+    mtlfilepath=get_config()['MTL']['mtlfilepath']
+
+    with open(mtlfilepath+'MTLresult.json',"w") as f:
+        json.dump(reply_data, f, default=json_default)
+
+    await mtl.reply(MTL_server, reply_data)
+
+
+def savedata(data):
+    mtlfilepath=get_config()['MTL']['mtlfilepath']
 
     try:
         with open(mtlfilepath+'object.info','w') as savefile:
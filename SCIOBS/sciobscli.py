@@ -2,6 +2,7 @@ import os, sys
 sys.path.append(os.path.dirname(os.path.abspath(os.path.dirname(__file__))))
 from Lib.AMQ import *
 import Lib.mkmessage as mkmsg
+from Lib.config import get_config
 import asyncio
 import threading
 import numpy as np
@@ -24,8 +25,7 @@ class sciobscli:
         self.tile_id = None
         self.ra = None
         self.dec = None
-        with open('./Lib/KSPEC.ini','r') as fs:
-            kspecinfo=json.load(fs)
+        kspecinfo=get_config()
 
         self.obsplanpath=kspecinfo['SCIOBS']['obsplanpath']
         self.targetpath=kspecinfo['SCIOBS']['targetpath']
@@ -136,8 +136,8 @@ class sciobscli:
         motion_alpha={}
         motion_beta={}
         for i  in range(150):
-            motion_alpha[Fibnum[i]]=alpha[:,i].tolist()
-            motion_beta[Fibnum[i]]=beta[:,i].tolist()
+            motion_alpha[Fibnum[i]]=alpha[:,i]
+            motion_beta[Fibnum[i]]=beta[:,i]
 
         a_motion=mkmsg.fbpmsg()
         comment=f'Load Motion plan of alpha arm for Tile ID {self.tile_id}.'
@@ -149,9 +149,8 @@ class sciobscli:
         b_motion.update(func='loadmotion',message=comment,arm='beta',tileid=self.tile_id,process='Done')
         b_motion.update(motion_beta)
 
-        motionmsg1=json.dumps(a_motion)
-        motionmsg2=json.dumps(b_motion)
-        return motionmsg1,motionmsg2
+        # Paths stay NumPy arrays; send_message/request ship them as binary buffers.
+        return a_motion,b_motion
 
 
     def loadtile(self,tile_id):
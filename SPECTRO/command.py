@@ -4,97 +4,78 @@ import Lib.mkmessage as mkmsg
 import json
 import asyncio
 import time
+from Lib.offload import run_blocking
+from Lib.config import get_config
+from Lib.dispatcher import Dispatcher
 import random
 from astropy.io import fits
 import numpy as  np 
 
+spec = Dispatcher('SPEC', mkmsg.specmsg)
+
+SPEC_COMMAND_SPECS = {
+    'specinitial': {'args': (('dirname', str),)},
+    'getbias': {'args': (('numframe', int),)},
+    'getflat': {'args': (('time', float), ('numframe', int))},
+    'getarc': {'args': (('time', float), ('numframe', int))},
+    'getobj': {'args': (('time', float), ('numframe', int))},
+}
+
+
 async def identify_execute(SPEC_server,cmd):
-    dict_data=json.loads(cmd)
-    func=dict_data['func']
+    await spec.dispatch(SPEC_server, cmd)
 
-    if func == 'specinitial':
-        with open('./Lib/KSPEC.ini','r') as fs:
-            kspecinfo = json.load(fs)
 
-        specinfopath = kspecinfo['SPEC']['specinfopath']
+@spec.command('specinitial', SPEC_COMMAND_SPECS['specinitial'])
+async def handle_specinitial(SPEC_server, dict_data, dirname):
+    specinfopath = get_config()['SPEC']['specinfopath']
 
-        with open(specinfopath+'specinfo.json','w') as f:
-            json.dump(dict_data,f)
+    with open(specinfopath+'specinfo.json','w') as f:
+        json.dump(dict_data,f)
 
-        comment = 'Initializing of Spectrograph is finished.'
-        reply_data=mkmsg.specmsg()
-        reply_data.update(message=comment,process='Done',status='success')
-        rsp=json.dumps(reply_data)
-        print('\033[32m'+'[SPEC]', comment+'\033[0m')
-        await SPEC_server.send_message('ICS',rsp)
+    await spec.reply(SPEC_server, message='Initializing of Spectrograph is finished.', process='Done', status='success')
 
-    if func == 'getbias':
-        numframe=dict_data['numframe']
-        comment=get_bias(numframe) ### Position of back illumination light on function
-        reply_data=mkmsg.specmsg()
-        reply_data.update(message=comment,process='Done',status='success')
-        rsp=json.dumps(reply_data)
-        print('\033[32m'+'[SPEC]', comment+'\033[0m')
-        await SPEC_server.send_message('ICS',rsp)
 
-    if func == 'getflat':
-        reply_data=mkmsg.specmsg()
-        comment = 'Flat exposure starts.'
-        reply_data.update(message=comment,process='ING',status='success')
-        rsp=json.dumps(reply_data)
-        await SPEC_server.send_message('ICS',rsp)
-        exptime=dict_data['time']
-        numframe=dict_data['numframe']
-        comment=get_flat(exptime,numframe) ### Position of back illumination light on function
-        reply_data=mkmsg.specmsg()
-        reply_data.update(message=comment,process='Done',status='success')
-        rsp=json.dumps(reply_data)
-        print('\033[32m'+'[SPEC]', comment+'\033[0m')
-        await SPEC_server.send_message('ICS',rsp)
+@spec.command('getbias', SPEC_COMMAND_SPECS['getbias'], policy='exclusive', group='exposure')
+async def handle_getbias(SPEC_server, dict_data, numframe):
+    comment=await run_blocking(get_bias,numframe) ### Position of back illumination light on function
+    await spec.reply(SPEC_server, message=comment, process='Done', status='success')
 
-    if func == 'getarc':
-        reply_data=mkmsg.specmsg()
-        comment = 'Arc exposure starts.'
-        reply_data.update(message = comment, process='ING',status='success')
-        rsp=json.dumps(reply_data)
-        await SPEC_server.send_message('ICS',rsp)
-        exptime=dict_data['time']
-        numframe=dict_data['numframe']
-        comment=get_arc(exptime,numframe) ### Position of back illumination light on function
-        reply_data=mkmsg.specmsg()
-        reply_data.update(message=comment,process='Done',status='success')
-        rsp=json.dumps(reply_data)
-        print('\033[32m'+'[SPEC]', comment+'\033[0m')
-        await SPEC_server.send_message('ICS',rsp)
 
-    if func == 'illuon':
-        comment=illu_on() ### Position of back illumination light on function
-        reply_data=mkmsg.specmsg()
-        reply_data.update(message=comment,process='Done',status='success')
-        rsp=json.dumps(reply_data)
-        print('\033[32m'+'[SPEC]', comment+'\033[0m')
-        await SPEC_server.send_message('ICS',rsp)
+@spec.command('getflat', SPEC_COMMAND_SPECS['getflat'], policy='exclusive', group='exposure')
+async def handle_getflat(SPEC_server, dict_data, time, numframe):
+    await spec.reply(SPEC_server, message='Flat exposure starts.', process='ING', status='success', log=False)
+    comment=await run_blocking(get_flat,time,numframe) ### Position of back illumination light on function
+    await spec.reply(SPEC_server, message=comment, process='Done', status='success')
 
-    if func == 'illuoff':
-        comment=illu_off()                      ### Position of back illumination light off function
-        reply_data=mkmsg.specmsg()
-        reply_data.update(message=comment,process='Done',status='success')
-        rsp=json.dumps(reply_data)
-        print('\033[32m'+'[SPEC]', comment+'\033[0m')
-        await SPEC_server.send_message('ICS',rsp)
 
-    if func == 'getobj':
-        exptime=dict_data['time']
-        numframe=dict_data['numframe']
-        await get_obj(SPEC_server,float(exptime),int(numframe))
+@spec.command('getarc', SPEC_COMMAND_SPECS['getarc'], policy='exclusive', group='exposure')
+async def handle_getarc(SPEC_server, dict_data, time, numframe):
+    await spec.reply(SPEC_server, message='Arc exposure starts.', process='ING', status='success', log=False)
+    comment=await run_blocking(get_arc,time,numframe) ### Position of back illumination light on function
+    await spec.reply(SPEC_server, message=comment, process='Done', status='success')
 
-    if func == 'specstatus':
-        comment=spec_status()
-        reply_data=mkmsg.specmsg()
-        reply_data.update(message=comment,process='Done',status='success')
-        rsp=json.dumps(reply_data)
-        print('\033[32m'+'[SPEC]', comment+'\033[0m')
-        await SPEC_server.send_message('ICS',rsp)
+
+@spec.command('illuon', policy='exclusive', group='illumination')
+async def handle_illuon(SPEC_server, dict_data):
+    comment=await run_blocking(illu_on) ### Position of back illumination light on function
+    await spec.reply(SPEC_server, message=comment, process='Done', status='success')
+
+
+@spec.command('illuoff', policy='exclusive', group='illumination')
+async def handle_illuoff(SPEC_server, dict_data):
+    comment=await run_blocking(illu_off)                      ### Position of back illumination light off function
+    await spec.reply(SPEC_server, message=comment, process='Done', status='success')
+
+
+@spec.command('getobj', SPEC_COMMAND_SPECS['getobj'], policy='exclusive', group='exposure')
+async def handle_getobj(SPEC_server, dict_data, time, numframe):
+    await get_obj(SPEC_server,time,numframe)
+
+
+@spec.command('specstatus')
+async def handle_specstatus(SPEC_server, dict_data):
+    await spec.reply(SPEC_server, message=spec_status(), process='Done', status='success')
 
 # Below functions are for simulation. When connect the instruments, please annoate.
 
@@ -1,5 +1,6 @@
 import os, sys
 import json
+import time
 import redis
 sys.path.append(os.path.dirname(os.path.abspath(os.path.dirname(__file__))))
 import asyncio
@@ -9,16 +10,28 @@ from astropy.coordinates import Angle, SkyCoord
 import astropy.units as u
 from astropy.io import fits
 
-from GFA.gfacli import handle_gfa
-from MTL.mtlcli import handle_mtl
-from FBP.fbpcli import handle_fbp
-from ADC.adccli import handle_adc
+from GFA.gfacli import handle_gfa, gfa_status
+from MTL.mtlcli import handle_mtl, mtl_exp, mtl_cal
+from FBP.fbpcli import handle_fbp, fbp_move, fbp_offset, fbp_zero
+from ADC.adccli import handle_adc, adc_adjust, adc_stop, adc_zero
 from LAMP.lampcli import handle_lamp
-from SPECTRO.speccli import handle_spec
+from SPECTRO.speccli import handle_spec, get_flat, get_arc, get_obj, illu_on, illu_off
 from SCIOBS.sciobscli import sciobscli
+from Lib.config import get_config
 import Lib.process as processes
 from TCS.tcscli import handle_telcom
 
+# Default of KSPEC.ini GFA.guide_settle: seconds after a tmradec before a guiding
+# exposure is trusted again.
+GUIDE_SETTLE = 5.0
+
+# Reply timeouts (seconds) of the script steps. Exposures wait for their exposure
+# time plus READOUT_MARGIN; motions get a fixed budget.
+WAIT_TIMEOUT = 60.
+READOUT_MARGIN = 60.
+FBP_MOTION_TIMEOUT = 180.
+ADC_MOTION_TIMEOUT = 180.
+
 
 def printing(message):
     """Utility function for consistent printinging."""
@@ -104,6 +117,70 @@ async def clear_queue(queue):
         queue.task_done()
 
 
+async def run_steps(ICSclient, steps, timeout=60):
+    """
+    Run instrument command steps concurrently, respecting their dependencies.
+
+    Each step is a dict with 'name', 'inst' (routing key), 'message' (JSON command)
+    and optional 'after' (names of steps that must succeed first). A step is sent as
+    soon as its dependencies finished and waits only for its own 'Done' reply.
+
+    Returns:
+    - dict: step name -> reply data
+
+    Raises:
+    - RuntimeError: a step replied with status other than 'success'. Steps not yet
+      finished are cancelled.
+    - asyncio.TimeoutError: a step got no reply within timeout seconds.
+    """
+    names = {step['name'] for step in steps}
+    for step in steps:
+        unknown = set(step.get('after', ())) - names
+        if unknown:
+            raise ValueError(f"Step '{step['name']}' depends on unknown steps: {sorted(unknown)}")
+
+    tasks = {}
+
+    async def run(step):
+        for dep in step.get('after', ()):
+            await tasks[dep]
+        reply = await ICSclient.request(step['inst'], step['message'], timeout=timeout, until={'process': 'Done'})
+        if reply.get('status') != 'success':
+            raise RuntimeError(f"{step['name']} failed: {reply.get('message')}")
+        return reply
+
+    for step in steps:
+        tasks[step['name']] = asyncio.ensure_future(run(step))
+
+    try:
+        await asyncio.gather(*tasks.values())
+    except BaseException:
+        for task in tasks.values():
+            task.cancel()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+        raise
+
+    return {name: task.result() for name, task in tasks.items()}
+
+
+async def wait_reply(ICSclient, inst, message, timeout=WAIT_TIMEOUT, **until):
+    """
+    Send a command and wait until the instrument reports the requested state.
+
+    until fields are matched against the reply (process, status, pos_state, subinst...),
+    e.g. process='ING' for an exposure start or pos_state='assign' for fiber positioners.
+    Without them, waits for the 'Done' reply.
+
+    Raises:
+    - RuntimeError: the instrument replied with status 'fail' or 'error'.
+    - asyncio.TimeoutError: no matching reply within timeout seconds.
+    """
+    reply = await ICSclient.request(inst, message, timeout=timeout, until=until or {'process': 'Done'})
+    if reply.get('status') in ('fail', 'error'):
+        raise RuntimeError(f"{inst} replied with {reply.get('status')}: {reply.get('message')}")
+    return reply
+
+
 class script():
     def __init__(self):
         self.autoguide_task = None
@@ -121,6 +198,7 @@ class script():
         self.GFAexpT = 5.    # default GFA exposure time
         self.MTLexpN = 1
         self.MTLimgname = None
+        self.udp_metrics = None   # UDPClient.metrics of the TCS agent link, set by KSPECRUN
 
     def configure_cordinate(self, project, obsdate, tileid, value1, value2, obsnum, expT):
         self.project = project
@@ -154,6 +232,16 @@ class script():
     def GFA_set(self,exptime):
         self.GFAexpT = exptime
 
+    def stop_script(self, name, error, logging):
+        """Report why a script step stopped the sequence."""
+        if isinstance(error, asyncio.TimeoutError):
+            comment = f'{name} stopped: no reply in time.'
+        else:
+            comment = f'{name} stopped: {error}'
+        printing(comment)
+        if logging != None:
+            logging(comment, level='error')
+
     async def obs_initial(self,scriptrun,logging):
         """Initialize all instruments."""
         print('Start instruments intialization')
@@ -161,9 +249,10 @@ class script():
         await clear_queue(scriptrun.GFA_response_queue)
         await clear_queue(scriptrun.ADC_response_queue)
         await clear_queue(scriptrun.SPEC_response_queue)
-        await handle_gfa('gfastatus',scriptrun.ICSclient)
-        await scriptrun.response_queue.get()
-        await asyncio.sleep(2)
+        try:
+            await wait_reply(scriptrun.ICSclient, 'GFA', gfa_status())
+        except (asyncio.TimeoutError, RuntimeError, ConnectionError) as e:
+            self.stop_script('Instrument initialization', e, logging)
     #    await handle_fbp('fbpstatus',scriptrun.ICSclient)
     #    await scriptrun.response_queue.get()
     #    await handle_mtl('mtlstatus',scriptrun.ICSclient)
@@ -197,6 +286,15 @@ class script():
 #    async def handle_calib(self,ICSclient,send_udp_message, send_telcom_command, response_queue, GFA_response_queue, ADC_response_queue, SPEC_response_queue, logging):
     async def handle_calib(self,scriptrun,logging):
         """Handles the calibration process by controlling lamps and spectrometers."""
+        try:
+            await self.calib_sequence(scriptrun,logging)
+        except (asyncio.TimeoutError, RuntimeError, ConnectionError) as e:
+            self.stop_script('Calibration', e, logging)
+            # leave no lamp on
+            await handle_lamp('flatoff',scriptrun.ICSclient)
+            await handle_lamp('arcoff',scriptrun.ICSclient)
+
+    async def calib_sequence(self,scriptrun,logging):
         printing("New Calibration task started.")
         await clear_queue(scriptrun.response_queue)
         await clear_queue(scriptrun.GFA_response_queue)
@@ -207,38 +305,32 @@ class script():
         if logging != None:
             logging('Sent Flat on.', level='send')
 
-        await handle_lamp('flaton',scriptrun.ICSclient)
-        await scriptrun.response_queue.get()
+        await handle_lamp('flaton',scriptrun.ICSclient)          # Returns when the web relay switched the lamp
     
         if logging != None:
             logging('Sent getflat 10 10.', level='send')
 
-        await handle_spec('getflat 10 10',scriptrun.ICSclient)
-        await scriptrun.response_queue.get()
+        await wait_reply(scriptrun.ICSclient, 'SPEC', get_flat(10., 10), timeout=10. * 10 + READOUT_MARGIN)
         
         if logging != None:
             logging('Sent Flat off.', level='send')
 
         await handle_lamp('flatoff',scriptrun.ICSclient)
-        await scriptrun.response_queue.get()
         
         if logging != None:
             logging('Sent Arc on.',level='send')
 
         await handle_lamp('arcon',scriptrun.ICSclient)
-        await scriptrun.response_queue.get()
         
         if logging != None:
             logging('Sent getarc 10 10.',level='send')
 
-        await handle_spec('getarc 10 10',scriptrun.ICSclient)
-        await scriptrun.response_queue.get()
+        await wait_reply(scriptrun.ICSclient, 'SPEC', get_arc(10., 10), timeout=10. * 10 + READOUT_MARGIN)
         
         if logging != None:
             logging('Sent Arc off.',level='send')
 
         await handle_lamp('arcoff',scriptrun.ICSclient)
-        await scriptrun.response_queue.get()
 
         printing("All Calibration images were obtained.")
         self.scrpt_task = None
@@ -267,6 +359,10 @@ class script():
         return f"{sign}{int(value * 100):04d}"
 
     async def handle_autoguide(self, exptime, expnum, save, scriptrun, logging):
+        # Corrections of exposures that started before the last tmradec had settled
+        # are stale and dropped (GFA and ICS hosts are NTP synchronised).
+        settle = get_config()['GFA'].get('guide_settle', GUIDE_SETTLE)
+        moved_at = None
         try:
             ra_bytes = await scriptrun.send_telcom_command('getra')
             dec_bytes = await scriptrun.send_telcom_command('getdec')
@@ -283,6 +379,10 @@ class script():
                     continue
                 
                 if "fdx" in response_data:
+                    exposure_start = response_data.get('exposure_start')
+                    if moved_at is not None and (exposure_start is None or float(exposure_start) < moved_at + settle):
+                        logging(f"Skipped correction of guiding cycle {response_data.get('cycle')}: exposure taken before the last move settled.", level='normal')
+                        continue
                     fdx=response_data['fdx']
                     fdy=response_data['fdy']
                     self.fwhm=response_data['fwhm']
@@ -307,14 +407,21 @@ class script():
 
                 ### Autoguiding using New coordinate ###
                     logging(f'Calculated Offset (RA,DEC)=({fdx}, {fdy})', level='normal')
-                    ra_bytes = await scriptrun.send_telcom_command('getra')
-                    dec_bytes = await scriptrun.send_telcom_command('getdec')
+                    # Both queries are queued on the one Telcom connection back to back
+                    ra_bytes, dec_bytes = await asyncio.gather(
+                            scriptrun.send_telcom_command('getra'),
+                            scriptrun.send_telcom_command('getdec'))
                     rahms=bytes_to_sexagesimal(ra_bytes)
                     decdms=bytes_to_sexagesimal(dec_bytes)
                     new_coord=apply_offset(rahms,decdms,fdx,fdy)
                     logging(f'Applied Offset. New (RA,DEC) = {new_coord}', level='normal')
                     messagetcs = 'KSPEC>TC ' + 'tmradec ' + new_coord
                     await scriptrun.send_udp_message(messagetcs)
+                    moved_at = time.time()
+                    if self.udp_metrics is not None:
+                        udp = self.udp_metrics()
+                        logging(f"TCS UDP: {udp['sent']} sent, {udp['rate_hz']:.3f} Hz, "
+                                f"jitter {udp['jitter_s']:.2f} s, {udp['timeouts']} reply timeouts", level='normal')
 
         except asyncio.CancelledError:
             print("Autoguide task was cancelled.")
@@ -349,6 +456,14 @@ class script():
         self.script_task = asyncio.create_task(self.handle_obs(scriptrun, logging))
 
     async def handle_obs(self,scriptrun,logging):
+        try:
+            await self.obs_sequence(scriptrun,logging)
+        except (asyncio.TimeoutError, RuntimeError, ConnectionError) as e:
+            self.stop_script(f'Observation of Tile ID {self.select_tile}', e, logging)
+            if self.autoguide_task:
+                await self.autoguidestop(scriptrun,logging)
+
+    async def obs_sequence(self,scriptrun,logging):
         await clear_queue(scriptrun.response_queue)
         await clear_queue(scriptrun.GFA_response_queue)
         await clear_queue(scriptrun.ADC_response_queue)
@@ -359,10 +474,7 @@ class script():
         
         if logging == None:
             printing('###### Observation Script Start!!! ######')
-            with open('./Lib/KSPEC.ini','r') as fs:
-                kspecinfo=json.load(fs)
-            fs.close()
-            obsplanpath=kspecinfo['SCIOBS']['obsplanpath']
+            obsplanpath=get_config()['SCIOBS']['obsplanpath']
 
             ### Start CLI version ###
             while True:
@@ -415,43 +527,27 @@ class script():
 
             printing(f'RA and DEC of Tile ID {self.select_tile}: {self.ra} {self.dec}')
 
-            await scriptrun.ICSclient.send_message("GFA", guidemsg)
-            await scriptrun.response_queue.get()
-            await asyncio.sleep(2)
-
-            await scriptrun.ICSclient.send_message("MTL", objmsg)
-            await scriptrun.response_queue.get()
-            await asyncio.sleep(2)
-
             ##### In commission, FBP is not ready. #####
-            await scriptrun.ICSclient.send_message("FBP", objmsg)
-            await scriptrun.response_queue.get()
-            await asyncio.sleep(2)
-
-            await scriptrun.ICSclient.send_message("FBP", motionmsg1)
-            await scriptrun.response_queue.get()
-            await asyncio.sleep(2)
-
-            await scriptrun.ICSclient.send_message("FBP", motionmsg2)
-            await scriptrun.response_queue.get()
-            await asyncio.sleep(2)
+            await run_steps(scriptrun.ICSclient, [
+                {'name': 'gfa_loadguide', 'inst': 'GFA', 'message': guidemsg},
+                {'name': 'mtl_loadobj', 'inst': 'MTL', 'message': objmsg},
+                {'name': 'fbp_loadobj', 'inst': 'FBP', 'message': objmsg},
+                {'name': 'fbp_loadmotion1', 'inst': 'FBP', 'message': motionmsg1, 'after': ['fbp_loadobj']},
+                {'name': 'fbp_loadmotion2', 'inst': 'FBP', 'message': motionmsg2, 'after': ['fbp_loadmotion1']},
+            ])
 
             printing(f'All accessary files for observation of Tile ID {self.select_tile} are successfully loaded')
             ### End of CLI version ###
-        
-        await asyncio.sleep(2)
 
     
         printing(f'ADC Adjust Start')
     #    message=f'adcadjust {self.ra} {self.dec}'
     #    print(message)
-        message=f'adcadjust 02:34:56.44 -31:34:55.67'                           # Just for simulation. Remove or comment when real observation
-        await handle_adc(message,scriptrun.ICSclient)
-        await asyncio.sleep(2)
+        message=adc_adjust('02:34:56.44', '-31:34:55.67')                       # Just for simulation. Remove or comment when real observation
+        await wait_reply(scriptrun.ICSclient, 'ADC', message, process='ING')
   
         printing(f'Fiber positioner Moving Start')
-        await handle_fbp('fbpmove',scriptrun.ICSclient)
-        await scriptrun.response_queue.get()
+        fbp_moving = asyncio.create_task(wait_reply(scriptrun.ICSclient, 'FBP', fbp_move(), timeout=FBP_MOTION_TIMEOUT, pos_state='assign'))
 
         messagetcs = 'KSPEC>TC ' + 'tmradec ' + self.ra +' '+ self.dec
         printing(f'Slew Telescope to RA={self.ra}, DEC={self.dec}.')
@@ -473,45 +569,26 @@ class script():
             print('.',end=' ', flush=True)
             await asyncio.sleep(5)
 
-        await scriptrun.response_queue.get()                                    # Wait for Fiber movement finish
+        await fbp_moving                                                        # Wait for Fiber movement finish
 
-        await asyncio.sleep(3)
         printing(f'Autoguiding Start')
         logging(f'GFA guiding. Expoture time is {self.GFAexpT}', level='receive')
         await self.run_autoguide(scriptrun,self.GFAexpT,logging=logging)
-        await asyncio.sleep(2)
 
         await handle_lamp('fiducialon',scriptrun.ICSclient)
-        await scriptrun.response_queue.get()
-        await asyncio.sleep(2)
                 
-        await handle_mtl(f'mtlexp {self.MTLexpT} 1 "fiducial.fits"',scriptrun.ICSclient)                       # Change exposure time in real observation
-        await scriptrun.response_queue.get()                                     # Start MTL exposure message
-        await scriptrun.response_queue.get()                                     # Wait for MTL exposure finish
-        await asyncio.sleep(2)
+        await wait_reply(scriptrun.ICSclient, 'MTL', mtl_exp(self.MTLexpT, 1, 'fiducial.fits'), timeout=self.MTLexpT + READOUT_MARGIN)           # Change exposure time in real observation
 
-        await handle_spec('illuon',scriptrun.ICSclient)
-        await scriptrun.response_queue.get()
-        await asyncio.sleep(2)
+        await wait_reply(scriptrun.ICSclient, 'SPEC', illu_on())
 
         testfile = 'test.fits'
-        await handle_mtl(f'mtlcal {testfile}',scriptrun.ICSclient)
-        await scriptrun.response_queue.get()                                    # Start MTL calculation message
-        await scriptrun.response_queue.get()                                    # Wait for MTL calculation finish
-        await asyncio.sleep(2)
+        await wait_reply(scriptrun.ICSclient, 'MTL', mtl_cal(testfile))
 
-        await handle_fbp('fbpoffset',scriptrun.ICSclient)
-        await scriptrun.response_queue.get()                                    # Start offset message
-        await scriptrun.response_queue.get()                                    # Wait for FBP offset finish
-        await asyncio.sleep(2)
+        await wait_reply(scriptrun.ICSclient, 'FBP', fbp_offset(), timeout=FBP_MOTION_TIMEOUT)
 
-        await handle_spec('illuoff',scriptrun.ICSclient)
-        await scriptrun.response_queue.get()                                 
-        await asyncio.sleep(2)
+        await wait_reply(scriptrun.ICSclient, 'SPEC', illu_off())
 
         await handle_lamp('fiducialoff',scriptrun.ICSclient)
-        await scriptrun.response_queue.get()
-        await asyncio.sleep(2)
 
     
     #    print(f'FHWM is {self.fwhm:.5f}.')                                     # Remove in real observation
@@ -520,11 +597,9 @@ class script():
         printing(f'KSPEC starts {obs_num} exposures with {self.expT} seconds.')
         
         for i in range(int(obs_num)):
-            await clear_queue(scriptrun.SPEC_response_queue)
-            await handle_spec(f'getobj {self.expT} 1', scriptrun.ICSclient)
             printing(f'**** {i+1}/{obs_num}: {self.expT} seconds exposure start. ****')
             logging(f'**** {i+1}/{obs_num}: {self.expT} seconds exposure start. ****', level='receive')
-            spec_rsp=await scriptrun.response_queue.get()
+            spec_rsp=await wait_reply(scriptrun.ICSclient, 'SPEC', get_obj(float(self.expT), 1), timeout=float(self.expT) + READOUT_MARGIN)
 #            print(f'jhkjkjk {spec_rsp}')
             fram=f'{i+1}/{obs_num}'
             header_data = {"PROJECT": self.project, "EXPTIME": self.expT, "FRAME": fram, "Tile": self.select_tile, "PRORA": self.ra, "PRODEC": self.dec}
@@ -536,19 +611,14 @@ class script():
         printing('All exposures are completed.')
         logging('All exposures are completed.',level='receive')
 
-        await handle_adc('adcstop',scriptrun.ICSclient)
-        await scriptrun.response_queue.get()
+        await wait_reply(scriptrun.ICSclient, 'ADC', adc_stop())
     
         await self.autoguidestop(scriptrun,logging)
         await scriptrun.response_queue.get()
 
-        await handle_adc('adczero 2',scriptrun.ICSclient)
-        await scriptrun.response_queue.get()
-        await scriptrun.response_queue.get()
+        await wait_reply(scriptrun.ICSclient, 'ADC', adc_zero(2), timeout=ADC_MOTION_TIMEOUT)
 
-        await handle_fbp('fbpzero',scriptrun.ICSclient)
-        await scriptrun.response_queue.get()
-        await scriptrun.response_queue.get()
+        await wait_reply(scriptrun.ICSclient, 'FBP', fbp_zero(), timeout=FBP_MOTION_TIMEOUT, pos_state='zero')
         
 
         printing(f'###### Observation Script for Tile ID {self.select_tile} END!!! ######')